@@ -18,16 +18,22 @@ try:
     import json
 except ImportError:
     import simplejson as json
+import calendar
 import logging
 import os
+import threading
+import time
 
 from keystoneclient import access
 from keystoneclient.auth.identity.base import BaseIdentityPlugin
 import requests
+from requests import adapters
+from six.moves.urllib.parse import urlsplit
 
 from neutronclient.common import exceptions
 from neutronclient.common import utils
 from neutronclient.openstack.common.gettextutils import _
+from neutronclient.openstack.common import timeutils
 
 _logger = logging.getLogger(__name__)
 
@@ -42,13 +48,31 @@ else:
 logging.getLogger("requests").setLevel(_requests_log_level)
 
 
+def _response_body(resp, stream=False):
+    # The body of a successful streamed response is left on the socket so
+    # that the caller can decode it while it is being read.
+    if stream and resp.status_code == requests.codes.ok:
+        return resp, None
+    return resp, resp.text
+
+
 class NeutronClientMixin(object):
 
     USER_AGENT = 'python-neutronclient'
 
 
 class HTTPClient(NeutronClientMixin):
-    """Handles the REST calls and responses, include authn."""
+    """Handles the REST calls and responses, include authn.
+
+    A client can be shared by several threads: the authentication state is
+    only changed under a lock and a token rejected by several concurrent
+    requests is renewed once.
+
+    A token obtained with the credentials of the client is renewed
+    ``token_refresh_margin`` seconds before it expires, from a background
+    thread if ``background_token_refresh`` is set, so that callers keep
+    using the current token meanwhile instead of waiting for the renewal.
+    """
 
     def __init__(self, username=None, user_id=None,
                  tenant_name=None, tenant_id=None,
@@ -58,6 +82,11 @@ class HTTPClient(NeutronClientMixin):
                  endpoint_type='publicURL',
                  auth_strategy='keystone', ca_cert=None, log_credentials=False,
                  service_type='network',
+                 pool_connections=adapters.DEFAULT_POOLSIZE,
+                 pool_maxsize=adapters.DEFAULT_POOLSIZE,
+                 keep_alive=True, auth_cache=None,
+                 token_refresh_margin=60, background_token_refresh=False,
+                 timer=time.time, response_cache=None,
                  **kwargs):
 
         self.username = username
@@ -71,6 +100,7 @@ class HTTPClient(NeutronClientMixin):
         self.region_name = region_name
         self.timeout = timeout
         self.auth_token = token
+        self.auth_token_expires = None
         self.auth_tenant_id = None
         self.auth_user_id = None
         self.content_type = 'application/json'
@@ -81,6 +111,29 @@ class HTTPClient(NeutronClientMixin):
             self.verify_cert = False
         else:
             self.verify_cert = ca_cert if ca_cert else True
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.auth_cache = auth_cache
+        self.token_refresh_margin = token_refresh_margin
+        self.background_token_refresh = background_token_refresh
+        self._timer = timer
+        self._auth_lock = threading.RLock()
+        self._refresh_thread_lock = threading.Lock()
+        self._refresh_thread = None
+        self.response_cache = response_cache
+        self.session = self._make_session()
+
+    def _make_session(self):
+        # A single long-lived session lets every call made through this
+        # client reuse pooled TCP (and TLS) connections instead of paying
+        # a new handshake per request.
+        session = requests.Session()
+        adapter = adapters.HTTPAdapter(pool_connections=self.pool_connections,
+                                       pool_maxsize=self.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
     def _cs_request(self, *args, **kwargs):
         kargs = {}
@@ -96,6 +149,8 @@ class HTTPClient(NeutronClientMixin):
 
         if 'body' in kwargs:
             kargs['body'] = kwargs['body']
+        if kwargs.get('stream'):
+            kargs['stream'] = True
         args = utils.safe_encode_list(args)
         kargs = utils.safe_encode_dict(kargs)
 
@@ -131,55 +186,128 @@ class HTTPClient(NeutronClientMixin):
 
     def authenticate_and_fetch_endpoint_url(self):
         if not self.auth_token:
-            self.authenticate()
+            with self._auth_lock:
+                # Another thread may have authenticated meanwhile
+                if not self.auth_token and not self.load_auth_cache():
+                    self.authenticate()
+        elif self._token_expires_in(self.token_refresh_margin):
+            self._refresh_token()
         elif not self.endpoint_url:
-            self.endpoint_url = self._get_endpoint_url()
+            with self._auth_lock:
+                if not self.endpoint_url:
+                    self.endpoint_url = self._get_endpoint_url()
+
+    def _token_expires_in(self, seconds):
+        # Only the tokens the client got itself can be renewed
+        expires = self.auth_token_expires
+        return (expires is not None and self.password and
+                self.auth_strategy == 'keystone' and
+                self._timer() + seconds >= expires)
+
+    def _refresh_token(self):
+        if self.background_token_refresh and not self._token_expires_in(0):
+            with self._refresh_thread_lock:
+                if (self._refresh_thread is None or
+                        not self._refresh_thread.is_alive()):
+                    self._refresh_thread = threading.Thread(
+                        target=self._background_refresh)
+                    self._refresh_thread.daemon = True
+                    self._refresh_thread.start()
+            return
+        with self._auth_lock:
+            # Another caller may have renewed it while we were waiting
+            if self._token_expires_in(self.token_refresh_margin):
+                _logger.debug('Renewing the token before it expires')
+                self.authenticate()
+
+    def _background_refresh(self):
+        try:
+            with self._auth_lock:
+                if self._token_expires_in(self.token_refresh_margin):
+                    _logger.debug('Renewing the token before it expires')
+                    self.authenticate()
+        except Exception as e:
+            # The token is renewed synchronously once it has expired
+            _logger.warning(_('Failed to renew the token: %s'), e)
+
+    def load_auth_cache(self):
+        """Use the token of the auth cache if it has a valid one."""
+        if not self.auth_cache or self.auth_strategy != 'keystone':
+            return False
+        auth_ref = self.auth_cache.get_access()[0]
+        if auth_ref is None:
+            return False
+        self._set_auth_ref(auth_ref)
+        return True
 
     def request(self, url, method, **kwargs):
         kwargs.setdefault('headers', kwargs.get('headers', {}))
         kwargs['headers']['User-Agent'] = self.USER_AGENT
-        kwargs['headers']['Accept'] = 'application/json'
+        # Keep the format negotiated for this request by _cs_request
+        kwargs['headers'].setdefault('Accept', 'application/json')
+        if not self.keep_alive:
+            kwargs['headers']['Connection'] = 'close'
         if 'body' in kwargs:
-            kwargs['headers']['Content-Type'] = 'application/json'
+            kwargs['headers'].setdefault('Content-Type', 'application/json')
             kwargs['data'] = kwargs['body']
             del kwargs['body']
-        resp = requests.request(
+        resp = self.session.request(
             method,
             url,
             verify=self.verify_cert,
             timeout=self.timeout,
             **kwargs)
 
-        return resp, resp.text
+        return _response_body(resp, kwargs.get('stream'))
 
     def do_request(self, url, method, **kwargs):
+        if self.response_cache is None:
+            return self._send_request(url, method, **kwargs)
+        return self.response_cache.request(self._send_request, url, method,
+                                           **kwargs)
+
+    def _send_request(self, url, method, **kwargs):
         self.authenticate_and_fetch_endpoint_url()
         # Perform the request once. If we get a 401 back then it
         # might be because the auth token expired, so try to
         # re-authenticate and try again. If it still fails, bail.
+        token = self.auth_token or ""
         try:
             kwargs.setdefault('headers', {})
-            if self.auth_token is None:
-                self.auth_token = ""
-            kwargs['headers']['X-Auth-Token'] = self.auth_token
+            kwargs['headers']['X-Auth-Token'] = token
             resp, body = self._cs_request(self.endpoint_url + url, method,
                                           **kwargs)
             return resp, body
         except exceptions.Unauthorized:
-            self.authenticate()
+            with self._auth_lock:
+                # Only renew the token once when several requests sharing
+                # it are rejected at the same time
+                if (self.auth_token or "") == token:
+                    self.authenticate()
+                token = self.auth_token
             kwargs.setdefault('headers', {})
-            kwargs['headers']['X-Auth-Token'] = self.auth_token
+            kwargs['headers']['X-Auth-Token'] = token
             resp, body = self._cs_request(
                 self.endpoint_url + url, method, **kwargs)
             return resp, body
 
     def _extract_service_catalog(self, body):
         """Set the client's service catalog from the response data."""
-        self.auth_ref = access.AccessInfo.factory(body=body)
+        self._set_auth_ref(access.AccessInfo.factory(body=body))
+        if self.auth_cache:
+            self.auth_cache.set_access(self.auth_ref, self.endpoint_url)
+
+    def _set_auth_ref(self, auth_ref):
+        self.auth_ref = auth_ref
         self.service_catalog = self.auth_ref.service_catalog
         self.auth_token = self.auth_ref.auth_token
         self.auth_tenant_id = self.auth_ref.tenant_id
         self.auth_user_id = self.auth_ref.user_id
+        try:
+            self.auth_token_expires = calendar.timegm(
+                timeutils.normalize_time(auth_ref.expires).utctimetuple())
+        except (KeyError, TypeError, ValueError):
+            self.auth_token_expires = None
 
         if not self.endpoint_url:
             self.endpoint_url = self.service_catalog.url_for(
@@ -229,13 +357,14 @@ class HTTPClient(NeutronClientMixin):
             raise exceptions.Unauthorized(message=message)
 
     def authenticate(self):
-        if self.auth_strategy == 'keystone':
-            self._authenticate_keystone()
-        elif self.auth_strategy == 'noauth':
-            self._authenticate_noauth()
-        else:
-            err_msg = _('Unknown auth strategy: %s') % self.auth_strategy
-            raise exceptions.Unauthorized(message=err_msg)
+        with self._auth_lock:
+            if self.auth_strategy == 'keystone':
+                self._authenticate_keystone()
+            elif self.auth_strategy == 'noauth':
+                self._authenticate_noauth()
+            else:
+                err_msg = _('Unknown auth strategy: %s') % self.auth_strategy
+                raise exceptions.Unauthorized(message=err_msg)
 
     def _get_endpoint_url(self):
         if self.auth_url is None:
@@ -275,15 +404,21 @@ class SessionClient(NeutronClientMixin):
                  auth,
                  interface=None,
                  service_type=None,
-                 region_name=None):
+                 region_name=None,
+                 auth_cache=None,
+                 response_cache=None):
 
         self.session = session
         self.auth = auth
         self.interface = interface
         self.service_type = service_type
         self.region_name = region_name
+        self.auth_cache = auth_cache
+        self.response_cache = response_cache
         self.auth_token = None
         self.endpoint_url = None
+        self._cached_auth_ref = None
+        self._endpoint_key = None
 
     def request(self, url, method, **kwargs):
         kwargs.setdefault('user_agent', self.USER_AGENT)
@@ -295,18 +430,40 @@ class SessionClient(NeutronClientMixin):
         except KeyError:
             pass
 
-        endpoint_filter = kwargs.setdefault('endpoint_filter', {})
-        endpoint_filter.setdefault('interface', self.interface)
-        endpoint_filter.setdefault('service_type', self.service_type)
-        endpoint_filter.setdefault('region_name', self.region_name)
+        if ('endpoint_filter' not in kwargs and
+                'endpoint_override' not in kwargs and
+                not urlsplit(url).scheme and
+                self._endpoint_is_current()):
+            # Spare the session a service catalog lookup per request
+            url = '%s/%s' % (self.endpoint_url.rstrip('/'), url.lstrip('/'))
+        else:
+            endpoint_filter = kwargs.setdefault('endpoint_filter', {})
+            endpoint_filter.setdefault('interface', self.interface)
+            endpoint_filter.setdefault('service_type', self.service_type)
+            endpoint_filter.setdefault('region_name', self.region_name)
 
         kwargs = utils.safe_encode_dict(kwargs)
         resp = self.session.request(url, method, **kwargs)
-        return resp, resp.text
+        return _response_body(resp, kwargs.get('stream'))
 
     def do_request(self, url, method, **kwargs):
+        if self.response_cache is None:
+            return self._send_request(url, method, **kwargs)
+        return self.response_cache.request(self._send_request, url, method,
+                                           **kwargs)
+
+    def _send_request(self, url, method, **kwargs):
         kwargs.setdefault('authenticated', True)
-        return self.request(url, method, **kwargs)
+        content_type = kwargs.pop('content_type', None)
+        if content_type:
+            headers = kwargs.setdefault('headers', {})
+            headers['Content-Type'] = content_type
+            headers['Accept'] = content_type
+        try:
+            return self.request(url, method, **kwargs)
+        finally:
+            # The session authenticates again when the token is rejected
+            self.save_auth_cache()
 
     def authenticate(self):
         # This method is provided for backward compatibility only.
@@ -316,11 +473,53 @@ class SessionClient(NeutronClientMixin):
             service_type=self.service_type,
             region_name=self.region_name,
             interface=self.interface)
+        self._endpoint_key = self._get_endpoint_key()
+        self.save_auth_cache()
+
+    def _get_endpoint_key(self):
+        # The endpoint is looked up again when any of its parameters
+        # changes or when the auth plugin gets a new token.
+        return (self.auth, getattr(self.auth, 'auth_ref', None),
+                self.service_type, self.interface, self.region_name)
+
+    def _endpoint_is_current(self):
+        key = self._endpoint_key
+        if key is None or self.endpoint_url is None:
+            return False
+        current = self._get_endpoint_key()
+        return (key[0] is current[0] and key[1] is current[1] and
+                key[2:] == current[2:])
 
     def authenticate_and_fetch_endpoint_url(self):
         # This method is provided for backward compatibility only.
         # We only care about setting the service endpoint.
-        self.authenticate()
+        if self.endpoint_url is None and self.load_auth_cache():
+            self._endpoint_key = self._get_endpoint_key()
+            return
+        if not self._endpoint_is_current():
+            self.authenticate()
+
+    def load_auth_cache(self):
+        """Give the auth plugin the token of the auth cache, if valid."""
+        if (not self.auth_cache or
+                not isinstance(self.auth, BaseIdentityPlugin)):
+            return False
+        auth_ref, endpoint_url = self.auth_cache.get_access()
+        if auth_ref is None or not endpoint_url:
+            return False
+        self.auth.auth_ref = self._cached_auth_ref = auth_ref
+        self.endpoint_url = endpoint_url
+        return True
+
+    def save_auth_cache(self):
+        """Cache the token of the auth plugin if it got a new one."""
+        if (not self.auth_cache or not self.endpoint_url or
+                not isinstance(self.auth, BaseIdentityPlugin)):
+            return
+        auth_ref = self.auth.auth_ref
+        if auth_ref is not None and auth_ref is not self._cached_auth_ref:
+            self.auth_cache.set_access(auth_ref, self.endpoint_url)
+            self._cached_auth_ref = auth_ref
 
     def get_auth_info(self):
         # This method is provided for backward compatibility only.
@@ -358,14 +557,23 @@ def construct_http_client(username=None,
                           ca_cert=None,
                           service_type='network',
                           session=None,
-                          auth=None):
+                          auth=None,
+                          pool_connections=adapters.DEFAULT_POOLSIZE,
+                          pool_maxsize=adapters.DEFAULT_POOLSIZE,
+                          keep_alive=True,
+                          auth_cache=None,
+                          token_refresh_margin=60,
+                          background_token_refresh=False,
+                          response_cache=None):
 
     if session:
         return SessionClient(session=session,
                              auth=auth,
                              interface=endpoint_type,
                              service_type=service_type,
-                             region_name=region_name)
+                             region_name=region_name,
+                             auth_cache=auth_cache,
+                             response_cache=response_cache)
     else:
         # FIXME(bklei): username and password are now optional. Need
         # to test that they were provided in this mode.  Should also
@@ -385,4 +593,11 @@ def construct_http_client(username=None,
                           service_type=service_type,
                           ca_cert=ca_cert,
                           log_credentials=log_credentials,
-                          auth_strategy=auth_strategy)
+                          auth_strategy=auth_strategy,
+                          pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          keep_alive=keep_alive,
+                          auth_cache=auth_cache,
+                          token_refresh_margin=token_refresh_margin,
+                          background_token_refresh=background_token_refresh,
+                          response_cache=response_cache)
@@ -0,0 +1,219 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Encrypted on-disk cache of the Keystone authentication.
+
+The cache keeps, for one identity (auth URL, user, project, region, ...),
+the discovered identity API versions, the token with its service catalog
+and the network endpoint, so that successive CLI invocations do not need to
+go back to Keystone until the token is about to expire.
+
+Entries are encrypted with Fernet from the optional ``cryptography``
+package, with a key derived from the password of the user
+(PBKDF2-HMAC-SHA256), so a cached token can only be read by someone who
+could get a new one anyway. They are written in a directory only accessible
+to its owner. Nothing is cached without a password or without
+``cryptography``.
+"""
+
+import base64
+import errno
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+
+try:
+    from cryptography import fernet
+except ImportError:
+    fernet = None
+from keystoneclient import access
+
+from neutronclient.openstack.common import strutils
+
+_logger = logging.getLogger(__name__)
+
+# Entries written in another format, like the ones of the versions 1 and 2,
+# are ignored.
+FORMAT_VERSION = 3
+# Seconds before its expiry from which a cached token is not used anymore
+EXPIRY_MARGIN = 300
+PBKDF2_ITERATIONS = 20000
+_SALT_SIZE = 16
+_KEY_SIZE = 32
+
+_pbkdf2_hmac = getattr(hashlib, 'pbkdf2_hmac', None)
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _b64decode(text):
+    return base64.b64decode(text.encode('ascii'))
+
+
+def access_to_dict(auth_ref):
+    """Return a JSON serializable copy of a keystoneclient AccessInfo."""
+    return dict(auth_ref)
+
+
+def access_from_dict(data):
+    """Rebuild the keystoneclient AccessInfo saved by access_to_dict."""
+    if data.get('version') == 'v3':
+        return access.AccessInfoV3(data.get('auth_token'), **data)
+    return access.AccessInfo.factory(**data)
+
+
+class AuthCache(object):
+    """Encrypted on-disk cache of the authentication of one identity.
+
+    :param directory: Directory holding the cache files, created if needed.
+    :param password: Password of the user, used to derive the encryption
+                     key. The cache is disabled when it is empty.
+    :param expiry_margin: Seconds before its expiry from which a cached
+                          token is considered expired.
+    :param identity: Values identifying the user, project, region, ... the
+                     cached authentication belongs to.
+    """
+
+    def __init__(self, directory, password, expiry_margin=EXPIRY_MARGIN,
+                 **identity):
+        self.directory = os.path.expanduser(directory)
+        self.expiry_margin = expiry_margin
+        self.enabled = bool(password)
+        if fernet is None or _pbkdf2_hmac is None:
+            if self.enabled:
+                _logger.debug('The authentication cache requires the '
+                              'cryptography package')
+            self.enabled = False
+        self._password = strutils.safe_encode(password) if password else b''
+        key = json.dumps(sorted(identity.items()))
+        self.path = os.path.join(
+            self.directory,
+            hashlib.sha256(key.encode('utf-8')).hexdigest())
+        self._ciphers = {}
+        self._salt = None
+        self._entry = None
+
+    def _cipher(self, salt):
+        if salt not in self._ciphers:
+            key = _pbkdf2_hmac('sha256', self._password, salt,
+                               PBKDF2_ITERATIONS, _KEY_SIZE)
+            self._ciphers[salt] = fernet.Fernet(base64.urlsafe_b64encode(key))
+        return self._ciphers[salt]
+
+    def _decrypt(self, envelope):
+        salt = _b64decode(envelope['salt'])
+        data = self._cipher(salt).decrypt(envelope['data'].encode('ascii'))
+        self._salt = salt
+        return json.loads(data.decode('utf-8'))
+
+    def _encrypt(self, entry):
+        if self._salt is None:
+            self._salt = os.urandom(_SALT_SIZE)
+        data = self._cipher(self._salt).encrypt(
+            json.dumps(entry).encode('utf-8'))
+        return {'version': FORMAT_VERSION,
+                'salt': _b64encode(self._salt),
+                'data': data.decode('ascii')}
+
+    def _load(self):
+        if self._entry is None:
+            self._entry = {}
+            try:
+                with open(self.path) as f:
+                    envelope = json.load(f)
+                if envelope.get('version') == FORMAT_VERSION:
+                    self._entry = self._decrypt(envelope)
+            except (IOError, OSError) as e:
+                if e.errno != errno.ENOENT:
+                    _logger.debug('Cannot read %s: %s', self.path, e)
+            except (AttributeError, KeyError, TypeError, ValueError,
+                    fernet.InvalidToken) as e:
+                # Corrupted, tampered or written with another password
+                _logger.debug('Ignoring the cache entry %s: %s',
+                              self.path, e)
+        return self._entry
+
+    def _make_private_directory(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        elif stat.S_IMODE(os.stat(self.directory).st_mode) & 0o077:
+            # An existing directory accessible to others is restricted
+            # before anything is written in it.
+            os.chmod(self.directory, 0o700)
+
+    def _store(self, entry):
+        try:
+            self._make_private_directory()
+            # mkstemp creates the file only readable by its owner
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self._encrypt(entry), f)
+                os.rename(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except (IOError, OSError) as e:
+            _logger.debug('Cannot write %s: %s', self.path, e)
+
+    def get(self, name, default=None):
+        """Return a cached value, or default if it is not cached."""
+        if not self.enabled:
+            return default
+        return self._load().get(name, default)
+
+    def set(self, **values):
+        """Cache the given values along with the already cached ones."""
+        if not self.enabled:
+            return
+        entry = dict(self._load(), **values)
+        if entry != self._entry:
+            self._entry = entry
+            self._store(entry)
+
+    def clear(self):
+        """Forget everything cached for the identity."""
+        self._entry = {}
+        try:
+            os.unlink(self.path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                _logger.debug('Cannot remove %s: %s', self.path, e)
+
+    def get_access(self):
+        """Return the cached ``(auth_ref, endpoint_url)``.
+
+        Both are None when no token is cached or when it expires within
+        ``expiry_margin`` seconds.
+        """
+        data = self.get('access')
+        if data:
+            try:
+                auth_ref = access_from_dict(data)
+                if not auth_ref.will_expire_soon(self.expiry_margin):
+                    return auth_ref, self.get('endpoint_url')
+            except Exception as e:
+                _logger.debug('Ignoring the cached token: %s', e)
+        return None, None
+
+    def set_access(self, auth_ref, endpoint_url):
+        """Cache a token and the endpoint found in its service catalog."""
+        self.set(access=access_to_dict(auth_ref), endpoint_url=endpoint_url)
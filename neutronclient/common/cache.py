@@ -0,0 +1,310 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""In-memory caches used by the clients.
+"""
+
+import copy
+import sys
+import threading
+import time
+
+import six
+from six.moves.urllib.parse import urlsplit
+
+
+_PREV, _NEXT, _KEY, _VALUE, _EXPIRES, _SIZE = range(6)
+_FORMAT_EXTENSIONS = ('.json', '.xml')
+
+
+class LRUCache(object):
+    """Thread safe mapping with LRU eviction and expiring entries.
+
+    :param maxsize: Maximum number of entries, or total size of the entries
+                    when getsize is given. The least recently used entries
+                    are evicted first.
+    :param ttl: Seconds after which an entry expires, None to keep entries
+                until they are evicted.
+    :param getsize: Function returning the size of a value, an entry
+                    larger than maxsize is not kept.
+    """
+
+    def __init__(self, maxsize=1000, ttl=None, timer=time.time,
+                 getsize=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.currsize = 0
+        self._timer = timer
+        self._getsize = getsize
+        self._lock = threading.Lock()
+        self._links = {}
+        # Circular doubly linked list of the entries, most recently used
+        # last, as a dict cannot be ordered on Python 2.6
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None, None, 0]
+
+    def __len__(self):
+        return len(self._links)
+
+    def _unlink(self, link):
+        link[_PREV][_NEXT] = link[_NEXT]
+        link[_NEXT][_PREV] = link[_PREV]
+
+    def _remove(self, link):
+        self._unlink(link)
+        del self._links[link[_KEY]]
+        self.currsize -= link[_SIZE]
+
+    def _append(self, link):
+        last = self._root[_PREV]
+        link[_PREV] = last
+        link[_NEXT] = self._root
+        last[_NEXT] = self._root[_PREV] = link
+
+    def get(self, key, default=None):
+        with self._lock:
+            link = self._links.get(key)
+            if link is None:
+                return default
+            if link[_EXPIRES] is not None and link[_EXPIRES] <= self._timer():
+                self._remove(link)
+                return default
+            self._unlink(link)
+            self._append(link)
+            return link[_VALUE]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = None
+        if self.ttl is not None:
+            expires = self._timer() + self.ttl
+        size = self._getsize(value) if self._getsize else 1
+        with self._lock:
+            link = self._links.get(key)
+            if link is not None:
+                self._remove(link)
+            if size > self.maxsize:
+                return
+            while self.currsize + size > self.maxsize:
+                self._remove(self._root[_NEXT])
+            link = [None, None, key, value, expires, size]
+            self._append(link)
+            self._links[key] = link
+            self.currsize += size
+
+    def invalidate(self, match=None):
+        """Drop the entries whose key satisfies ``match``, or all of them."""
+        with self._lock:
+            for key, link in list(self._links.items()):
+                if match is None or match(key):
+                    self._remove(link)
+
+
+def _resource_path(url):
+    """Return the path of url without its query and format extension."""
+    path = urlsplit(url).path.rstrip('/')
+    for extension in _FORMAT_EXTENSIONS:
+        if path.endswith(extension):
+            return path[:-len(extension)]
+    return path
+
+
+def related_paths(path, other):
+    """Whether a write to one of the paths may change the other one.
+
+    They are a resource, its sub-resources and actions and its collection.
+    """
+    return (path == other or path.startswith(other + '/') or
+            other.startswith(path + '/'))
+
+
+class _CachedResponse(object):
+
+    def __init__(self, resp, body, expires):
+        self.resp = resp
+        self.body = body
+        self.etag = resp.headers.get('ETag')
+        self.last_modified = resp.headers.get('Last-Modified')
+        self.expires = expires
+
+    def size(self):
+        # The body and a rough allowance for the response object
+        return len(self.body) + 512
+
+
+class ResponseCache(object):
+    """Cache of the GET responses of an HTTP client.
+
+    A response with an ETag or Last-Modified validator is revalidated with
+    a conditional request each time it is needed and its body reused when
+    the server answers 304 Not Modified. A response without validators is
+    reused without asking the server for ``ttl`` seconds.
+
+    A PUT, POST or DELETE request sent through the cache drops the cached
+    responses of the same resource, of its sub-resources and of its
+    collection.
+
+    :param max_bytes: Approximate maximum size of the cached responses, the
+                      least recently used ones are evicted first.
+    :param ttl: Seconds a response without validators is reused for.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024, ttl=5, timer=time.time):
+        self.ttl = ttl
+        self._timer = timer
+        self._entries = LRUCache(maxsize=max_bytes,
+                                 getsize=lambda entry: entry.size())
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'revalidated': 0, 'misses': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """Return a copy of the hits, revalidated and misses counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def invalidate(self, url=None):
+        """Drop the responses related to url, or all of them."""
+        if url is None:
+            self._entries.invalidate()
+            return
+        path = _resource_path(url)
+        self._entries.invalidate(
+            lambda key: related_paths(_resource_path(key[0]), path))
+
+    def request(self, send, url, method, **kwargs):
+        """Send a request with ``send(url, method, **kwargs)``, or not.
+
+        :returns: the ``(response, body)`` returned by send, or the cached
+                  ones.
+        """
+        if method.upper() != 'GET':
+            try:
+                return send(url, method, **kwargs)
+            finally:
+                self.invalidate(url)
+        if kwargs.get('stream'):
+            return send(url, method, **kwargs)
+
+        key = (url, kwargs.get('content_type'))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not (entry.etag or entry.last_modified):
+                if entry.expires > self._timer():
+                    self._count('hits')
+                    return entry.resp, entry.body
+            else:
+                headers = dict(kwargs.get('headers') or {})
+                if entry.etag:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified:
+                    headers['If-Modified-Since'] = entry.last_modified
+                kwargs['headers'] = headers
+
+        resp, body = send(url, method, **kwargs)
+        if resp.status_code == 304 and entry is not None:
+            self._count('revalidated')
+            return entry.resp, entry.body
+        self._count('misses')
+        if (resp.status_code == 200 and body is not None and
+                'no-store' not in resp.headers.get('Cache-Control', '')):
+            self._entries.set(key, _CachedResponse(
+                resp, body, self._timer() + self.ttl))
+        else:
+            self._entries.invalidate(lambda k: k == key)
+        return resp, body
+
+
+class _Flight(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalesce the concurrent calls made with the same key.
+
+    While a call is running, the calls made by other threads with the same
+    key wait for it and get a copy of its result, or its exception, instead
+    of doing the same work again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._counters = {'calls': 0, 'coalesced': 0}
+
+    def stats(self):
+        """Return a copy of the calls and coalesced counters.
+
+        ``calls`` counts the calls actually made, ``coalesced`` the ones
+        which waited for a call made by another thread.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def forget(self, match):
+        """Make the calls whose key satisfies match not coalesced anymore.
+
+        The calls already waiting for them still get their result, the
+        calls made afterwards with the same keys are made again.
+        """
+        with self._lock:
+            for key in list(self._flights):
+                if match(key):
+                    del self._flights[key]
+
+    def do(self, key, function, *args, **kwargs):
+        """Return function(*args, **kwargs), or the result of the same call.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._counters['calls'] += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                self._counters['coalesced'] += 1
+                leader = False
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                six.reraise(*flight.error)
+            return copy.deepcopy(flight.result)
+
+        result = None
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            flight.error = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            if flight.waiters:
+                # The waiters copy it while the caller may change the result
+                flight.result = copy.deepcopy(result)
+            flight.done.set()
+        return result
@@ -67,8 +67,12 @@ class ClientManager(object):
                  timeout=None,
                  retries=0,
                  raise_errors=True,
+                 trust_uuids=False,
                  session=None,
                  auth=None,
+                 auth_cache=None,
+                 rate_limiter=None,
+                 coalesce_requests=False,
                  ):
         self._token = token
         self._url = url
@@ -90,8 +94,12 @@ class ClientManager(object):
         self._timeout = timeout
         self._retries = retries
         self._raise_errors = raise_errors
+        self._trust_uuids = trust_uuids
         self._session = session
         self._auth = auth
+        self._auth_cache = auth_cache
+        self._rate_limiter = rate_limiter
+        self._coalesce_requests = coalesce_requests
         return
 
     def initialize(self):
@@ -111,8 +119,10 @@ class ClientManager(object):
                 timeout=self._timeout,
                 session=self._session,
                 auth=self._auth,
-                log_credentials=self._log_credentials)
-            httpclient.authenticate()
+                log_credentials=self._log_credentials,
+                auth_cache=self._auth_cache)
+            if not httpclient.load_auth_cache():
+                httpclient.authenticate()
             # Populate other password flow attributes
             self._token = httpclient.auth_token
             self._url = httpclient.endpoint_url
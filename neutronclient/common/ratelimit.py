@@ -0,0 +1,155 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Client side limits on the requests sent to the Neutron server.
+"""
+
+import contextlib
+import threading
+import time
+
+READ = 'read'
+WRITE = 'write'
+# Methods of the requests counted as reads, all the others are writes
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class TokenBucket(object):
+    """Thread safe token bucket allowing ``rate`` acquisitions per second.
+
+    :param rate: Tokens added per second.
+    :param burst: Maximum number of tokens, how many acquisitions can be
+                  done at once after the bucket was left unused.
+                  (default: rate, at least 1)
+    """
+
+    def __init__(self, rate, burst=None, timer=time.time, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst or rate))
+        self._timer = timer
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._last = timer()
+
+    def reserve(self):
+        """Take a token and return the seconds to wait before using it."""
+        with self._lock:
+            now = self._timer()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Tokens may go negative: callers queue for the next ones and
+            # wait outside of the lock.
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Wait for a token, return the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class _Limit(object):
+    """Limits and counters of one class of requests."""
+
+    def __init__(self, max_rps, max_concurrency, timer, sleep):
+        self.bucket = None
+        if max_rps:
+            self.bucket = TokenBucket(max_rps, timer=timer, sleep=sleep)
+        self.semaphore = None
+        if max_concurrency:
+            self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0,
+                         'in_flight': 0,
+                         'max_in_flight': 0,
+                         'throttled': 0,
+                         'throttled_seconds': 0.0}
+
+
+class RateLimiter(object):
+    """Token bucket rate limit and in-flight requests cap of a client.
+
+    Reads (GET requests) and writes (the other methods) are limited
+    separately, the limits of the writes defaulting to the ones of the
+    reads. None means no limit.
+
+    :param max_rps: Maximum number of requests started per second.
+    :param max_concurrency: Maximum number of requests in flight.
+    :param max_write_rps: max_rps of the writes.
+    :param max_write_concurrency: max_concurrency of the writes.
+    """
+
+    def __init__(self, max_rps=None, max_concurrency=None,
+                 max_write_rps=None, max_write_concurrency=None,
+                 timer=time.time, sleep=time.sleep):
+        self._timer = timer
+        self._limits = {
+            READ: _Limit(max_rps, max_concurrency, timer, sleep),
+            WRITE: _Limit(max_write_rps or max_rps,
+                          max_write_concurrency or max_concurrency,
+                          timer, sleep),
+        }
+
+    @staticmethod
+    def method_class(method):
+        return READ if method.upper() in READ_METHODS else WRITE
+
+    @contextlib.contextmanager
+    def limit(self, method):
+        """Wait until a request can be sent and count it while it runs."""
+        limit = self._limits[self.method_class(method)]
+        throttled = False
+        waited = 0.0
+        if limit.bucket:
+            waited = limit.bucket.acquire()
+            throttled = waited > 0
+        if limit.semaphore and not limit.semaphore.acquire(False):
+            started = self._timer()
+            limit.semaphore.acquire()
+            waited += self._timer() - started
+            throttled = True
+        try:
+            with limit.lock:
+                counters = limit.counters
+                counters['requests'] += 1
+                if throttled:
+                    counters['throttled'] += 1
+                    counters['throttled_seconds'] += waited
+                counters['in_flight'] += 1
+                counters['max_in_flight'] = max(counters['max_in_flight'],
+                                                counters['in_flight'])
+            try:
+                yield
+            finally:
+                with limit.lock:
+                    limit.counters['in_flight'] -= 1
+        finally:
+            if limit.semaphore:
+                limit.semaphore.release()
+
+    def stats(self):
+        """Return a copy of the counters of the reads and of the writes."""
+        stats = {}
+        for name, limit in self._limits.items():
+            with limit.lock:
+                stats[name] = dict(limit.counters)
+        return stats
@@ -0,0 +1,125 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Retry policy of the requests sent to the Neutron server.
+"""
+
+import email.utils
+import random
+import time
+
+from neutronclient.common import exceptions
+
+# Statuses of the responses of an overloaded or restarting server
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# Methods which can be sent again without side effects
+RETRY_METHODS = ('GET', 'PUT', 'DELETE')
+
+
+def parse_retry_after(value, timer=time.time):
+    """Return the seconds to wait from a Retry-After header, or None.
+
+    The header gives either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    date = email.utils.parsedate_tz(value)
+    if date is None:
+        return None
+    if date[9] is None:
+        date = date[:9] + (0,)
+    return max(0.0, email.utils.mktime_tz(date) - timer())
+
+
+class RetryPolicy(object):
+    """When and after how long a failed request is sent again.
+
+    The n-th retry waits for a random time between 0 and
+    ``min(backoff_cap, backoff_base * 2 ** n)`` seconds ("full jitter"), so
+    that clients failing together do not retry together, or for the time
+    asked by the Retry-After header of the response if it has one.
+
+    :param backoff_base: Seconds of the first backoff.
+    :param backoff_cap: Maximum seconds of a backoff.
+    :param jitter: If False, wait for the whole backoff.
+    :param retry_status_codes: Statuses of the responses to retry.
+    :param retry_methods: Methods of the requests which are retried, POST
+                          requests are not by default.
+    :param respect_retry_after: If False, ignore the Retry-After headers.
+    :param max_retry_after: Maximum seconds waited for a Retry-After header,
+                            longer waits are shortened to it.
+                            (default: backoff_cap)
+    :param deadline: Seconds from the first attempt after which no retry is
+                     started, None for no limit.
+    """
+
+    def __init__(self, backoff_base=1.0, backoff_cap=30.0,
+                 jitter=True, retry_status_codes=RETRY_STATUS_CODES,
+                 retry_methods=RETRY_METHODS, respect_retry_after=True,
+                 max_retry_after=None, deadline=None, timer=time.time,
+                 sleep=time.sleep, rand=random.random):
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.retry_methods = frozenset(m.upper() for m in retry_methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.deadline = deadline
+        self.timer = timer
+        self.sleep = sleep
+        self._rand = rand
+
+    def is_retryable(self, method, error):
+        """Whether a request failing with error may be sent again."""
+        if method.upper() not in self.retry_methods:
+            return False
+        if isinstance(error, exceptions.ConnectionFailed):
+            return True
+        return (isinstance(error, exceptions.NeutronClientException) and
+                error.status_code in self.retry_status_codes)
+
+    def backoff(self, retry, error=None):
+        """Seconds to wait before the retry-th retry (counted from 0)."""
+        retry_after = getattr(error, 'retry_after', None)
+        if self.respect_retry_after and retry_after is not None:
+            # A misbehaving server or proxy must not hang the client
+            max_retry_after = self.max_retry_after
+            if max_retry_after is None:
+                max_retry_after = self.backoff_cap
+            return min(retry_after, max_retry_after)
+        backoff = min(self.backoff_cap, self.backoff_base * 2 ** retry)
+        if self.jitter:
+            backoff *= self._rand()
+        return backoff
+
+    def delay(self, method, error, retry, started):
+        """Seconds to wait before retrying, None not to retry.
+
+        :param retry: Number of retries already done.
+        :param started: Time of the first attempt.
+        """
+        if not self.is_retryable(method, error):
+            return None
+        delay = self.backoff(retry, error)
+        if (self.deadline is not None and
+                self.timer() + delay - started > self.deadline):
+            return None
+        return delay
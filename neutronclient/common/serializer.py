@@ -17,7 +17,13 @@
 ### Codes from neutron wsgi
 ###
 
+import codecs
+try:
+    import json
+except ImportError:
+    import simplejson as json
 import logging
+import re
 from xml.etree import ElementTree as etree
 from xml.parsers import expat
 
@@ -231,6 +237,106 @@ class JSONDeserializer(TextDeserializer):
         return {'body': self._from_json(datastring)}
 
 
+class JSONCollectionDeserializer(object):
+    """Incrementally decode a JSON document holding a resource collection.
+
+    The document is read from an iterable of byte chunks (for instance
+    ``requests.Response.iter_content()``) and the members of the top-level
+    ``collection`` array are yielded one at a time, so neither the raw body
+    nor the whole decoded collection has to be held in memory. The other
+    top-level keys (e.g. ``<collection>_links``) are stored into ``extra``
+    as they are decoded; keys which follow the array are only available
+    once it has been consumed.
+    """
+
+    _whitespace = re.compile(r'[ \t\n\r]*')
+    _ends = frozenset(u' \t\n\r,:]}')
+
+    def __init__(self, chunks, collection, extra=None, encoding='utf-8'):
+        self.collection = collection
+        self.extra = {} if extra is None else extra
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = json.JSONDecoder()
+        self._buf = u''
+        self._pos = 0
+        self._eof = False
+
+    def _fail(self):
+        msg = _("Cannot understand JSON")
+        raise exception.MalformedResponseBody(reason=msg)
+
+    def _fill(self):
+        """Append the next chunk to the buffer, return False at EOF."""
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buf += self._decoder.decode(b'', True)
+            return False
+        # Drop what has already been decoded before growing the buffer
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next significant character."""
+        while True:
+            self._pos = self._whitespace.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                self._fail()
+
+    def _expect(self, chars):
+        char = self._peek()
+        if char not in chars:
+            self._fail()
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decode the next complete JSON value of the document."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except ValueError:
+                end = None
+            # A number may have been cut by a chunk boundary ("6.5" of
+            # "6.5e3"), so a value is only trusted once the character that
+            # follows it has been read or the stream is exhausted.
+            if end is not None and (self._eof or (
+                    end < len(self._buf) and self._buf[end] in self._ends)):
+                self._pos = end
+                return value
+            if not self._fill() and end is None:
+                self._fail()
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == self.collection and self._peek() == '[':
+                self._pos += 1
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                self.extra[key] = self._value()
+            if self._expect(',}') == '}':
+                return
+
+
 class XMLDeserializer(TextDeserializer):
 
     def __init__(self, metadata=None):
@@ -245,18 +351,20 @@ class XMLDeserializer(TextDeserializer):
         if not xmlns:
             xmlns = constants.XML_NS_V20
         self.xmlns = xmlns
+        self._ext_prefixes = dict(
+            (_ns, prefix)
+            for prefix, _ns in self.metadata.get(constants.EXT_NS, {}).items())
 
     def _get_key(self, tag):
         tags = tag.split("}", 1)
         if len(tags) == 2:
             ns = tags[0][1:]
             bare_tag = tags[1]
-            ext_ns = self.metadata.get(constants.EXT_NS, {})
             if ns == self.xmlns:
                 return bare_tag
-            for prefix, _ns in ext_ns.items():
-                if ns == _ns:
-                    return prefix + ":" + bare_tag
+            prefix = self._ext_prefixes.get(ns)
+            if prefix is not None:
+                return prefix + ":" + bare_tag
         else:
             return tag
 
@@ -373,15 +481,19 @@ class Serializer(object):
         """
         self.metadata = metadata or {}
         self.default_xmlns = default_xmlns
-
-    def _get_serialize_handler(self, content_type):
-        handlers = {
+        # The handlers keep no per-request state, so they are built once
+        self._serialize_handlers = {
             'application/json': JSONDictSerializer(),
             'application/xml': XMLDictSerializer(self.metadata),
         }
+        self._deserialize_handlers = {
+            'application/json': JSONDeserializer(),
+            'application/xml': XMLDeserializer(self.metadata),
+        }
 
+    def _get_serialize_handler(self, content_type):
         try:
-            return handlers[content_type]
+            return self._serialize_handlers[content_type]
         except Exception:
             raise exception.InvalidContentType(content_type=content_type)
 
@@ -399,12 +511,7 @@ class Serializer(object):
             datastring)
 
     def get_deserialize_handler(self, content_type):
-        handlers = {
-            'application/json': JSONDeserializer(),
-            'application/xml': XMLDeserializer(self.metadata),
-        }
-
         try:
-            return handlers[content_type]
+            return self._deserialize_handlers[content_type]
         except Exception:
             raise exception.InvalidContentType(content_type=content_type)
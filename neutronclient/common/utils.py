@@ -21,6 +21,8 @@ import logging
 import os
 import sys
 
+import six
+
 from neutronclient.common import _
 from neutronclient.common import exceptions
 from neutronclient.openstack.common import strutils
@@ -148,13 +150,13 @@ def http_log_resp(_logger, resp, body):
 
 
 def _safe_encode_without_obj(data):
-    if isinstance(data, basestring):
+    if isinstance(data, six.string_types):
         return strutils.safe_encode(data)
     return data
 
 
 def safe_encode_list(data):
-    return map(_safe_encode_without_obj, data)
+    return list(map(_safe_encode_without_obj, data))
 
 
 def safe_encode_dict(data):
@@ -49,8 +49,13 @@ def make_client(instance):
                                 ca_cert=instance._ca_cert,
                                 retries=instance._retries,
                                 raise_errors=instance._raise_errors,
+                                trust_uuids=instance._trust_uuids,
                                 session=instance._session,
-                                auth=instance._auth)
+                                auth=instance._auth,
+                                auth_cache=instance._auth_cache,
+                                rate_limiter=instance._rate_limiter,
+                                coalesce_requests=(
+                                    instance._coalesce_requests))
         return client
     else:
         raise exceptions.UnsupportedVersion(_("API version %s is not "
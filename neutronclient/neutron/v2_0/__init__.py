@@ -18,7 +18,10 @@ from __future__ import print_function
 
 import abc
 import argparse
+import contextlib
+import itertools
 import logging
+import multiprocessing.pool
 import re
 
 from cliff.formatters import table
@@ -46,8 +49,56 @@ def _get_resource_plural(resource, client):
     return resource + 's'
 
 
+def is_trusted_id(client, resource_id):
+    """Whether the client is set to take UUIDs as existing resource ids."""
+    return bool(getattr(client, 'trust_uuids', False) and
+                re.match('^%s$' % UUID_PATTERN, resource_id))
+
+
+def _not_found_by_id(resource, resource_id):
+    not_found_message = (_("Unable to find %(resource)s with id "
+                           "'%(id)s'") %
+                         {'resource': resource, 'id': resource_id})
+    # 404 is used to simulate server side behavior
+    return exceptions.NeutronClientException(
+        message=not_found_message, status_code=404)
+
+
+def _not_found_by_name(resource, name):
+    not_found_message = (_("Unable to find %(resource)s with name "
+                           "'%(name)s'") %
+                         {'resource': resource, 'name': name})
+    # 404 is used to simulate server side behavior
+    return exceptions.NeutronClientException(
+        message=not_found_message, status_code=404)
+
+
+@contextlib.contextmanager
+def trusted_id_not_found(client, resource, resource_id, allow_names=True):
+    """Report a 404 on a trusted UUID like the lookup would have.
+
+    With trust_uuids, a UUID given on the command line is used without
+    checking that it exists, so the not found error comes from the
+    show/update/delete call itself. Only a 404 naming that UUID is
+    reported so, the one about another object referenced by the request
+    (a subnet or security group of an update for instance) is left as is.
+    """
+    try:
+        yield
+    except exceptions.NeutronClientException as e:
+        if (e.status_code != 404 or
+                not is_trusted_id(client, resource_id) or
+                resource_id not in six.text_type(e)):
+            raise
+        if allow_names:
+            raise _not_found_by_name(resource, resource_id)
+        raise _not_found_by_id(resource, resource_id)
+
+
 def find_resourceid_by_id(client, resource, resource_id, cmd_resource=None,
                           parent_id=None):
+    if is_trusted_id(client, resource_id):
+        return resource_id
     if not cmd_resource:
         cmd_resource = resource
     cmd_resource_plural = _get_resource_plural(cmd_resource, client)
@@ -63,12 +114,7 @@ def find_resourceid_by_id(client, resource, resource_id, cmd_resource=None,
             data = obj_lister(id=resource_id, fields='id')
         if data and data[collection]:
             return data[collection][0]['id']
-    not_found_message = (_("Unable to find %(resource)s with id "
-                           "'%(id)s'") %
-                         {'resource': resource, 'id': resource_id})
-    # 404 is used to simulate server side behavior
-    raise exceptions.NeutronClientException(
-        message=not_found_message, status_code=404)
+    raise _not_found_by_id(resource, resource_id)
 
 
 def _find_resourceid_by_name(client, resource, name, project_id=None,
@@ -91,12 +137,7 @@ def _find_resourceid_by_name(client, resource, name, project_id=None,
         raise exceptions.NeutronClientNoUniqueMatch(resource=resource,
                                                     name=name)
     elif len(info) == 0:
-        not_found_message = (_("Unable to find %(resource)s with name "
-                               "'%(name)s'") %
-                             {'resource': resource, 'name': name})
-        # 404 is used to simulate server side behavior
-        raise exceptions.NeutronClientException(
-            message=not_found_message, status_code=404)
+        raise _not_found_by_name(resource, name)
     else:
         return info[0]['id']
 
@@ -104,12 +145,114 @@ def _find_resourceid_by_name(client, resource, name, project_id=None,
 def find_resourceid_by_name_or_id(client, resource, name_or_id,
                                   project_id=None, cmd_resource=None,
                                   parent_id=None):
+    if is_trusted_id(client, name_or_id):
+        return name_or_id
+    cache = getattr(client, 'resolution_cache', None)
+    if cache is not None:
+        _id = cache.get(_resolution_cache_key(client, resource, name_or_id,
+                                              project_id, cmd_resource,
+                                              parent_id))
+        if _id is not None:
+            return _id
     try:
-        return find_resourceid_by_id(client, resource, name_or_id,
-                                     cmd_resource, parent_id)
+        _id = find_resourceid_by_id(client, resource, name_or_id,
+                                    cmd_resource, parent_id)
     except exceptions.NeutronClientException:
-        return _find_resourceid_by_name(client, resource, name_or_id,
-                                        project_id, cmd_resource, parent_id)
+        _id = _find_resourceid_by_name(client, resource, name_or_id,
+                                       project_id, cmd_resource, parent_id)
+    if cache is not None:
+        # The endpoint may only be known once the first request was sent
+        cache.set(_resolution_cache_key(client, resource, name_or_id,
+                                        project_id, cmd_resource, parent_id),
+                  _id)
+    return _id
+
+
+def find_resourceids_by_names_or_ids(client, resource, names_or_ids,
+                                     project_id=None, cmd_resource=None,
+                                     parent_id=None):
+    """Resolve several names or IDs of one resource type at once.
+
+    The UUIDs are checked with a single multi-valued ``id=`` query and the
+    rest with a single multi-valued ``name=`` query, which Client.list
+    splits if the URI would go over ``MAX_URI_LEN``. The error raised is the
+    one find_resourceid_by_name_or_id would raise for the first argument
+    which cannot be resolved.
+
+    :returns: the ids, in the order of ``names_or_ids``.
+    """
+    if not cmd_resource:
+        cmd_resource = resource
+    cmd_resource_plural = _get_resource_plural(cmd_resource, client)
+    collection = _get_resource_plural(resource, client)
+    obj_lister = getattr(client, "list_%s" % cmd_resource_plural)
+    cache = getattr(client, 'resolution_cache', None)
+
+    def _cache_key(name_or_id):
+        return _resolution_cache_key(client, resource, name_or_id,
+                                     project_id, cmd_resource, parent_id)
+
+    def _list(key, values, **params):
+        params.update({key: values, 'fields': ['id', key]})
+        if parent_id:
+            return obj_lister(parent_id, **params)[collection]
+        return obj_lister(**params)[collection]
+
+    resolved = {}
+    pending = []
+    for name_or_id in names_or_ids:
+        if name_or_id in resolved or name_or_id in pending:
+            continue
+        if is_trusted_id(client, name_or_id):
+            resolved[name_or_id] = name_or_id
+            continue
+        _id = cache is not None and cache.get(_cache_key(name_or_id))
+        if _id:
+            resolved[name_or_id] = _id
+        else:
+            pending.append(name_or_id)
+
+    ids = [value for value in pending if re.match(UUID_PATTERN, value)]
+    if ids:
+        for info in _list('id', ids):
+            resolved[info['id']] = info['id']
+    names = [value for value in pending if value not in resolved]
+    if names:
+        params = {}
+        if project_id:
+            params['tenant_id'] = project_id
+        matches = {}
+        for info in _list('name', names, **params):
+            matches.setdefault(info['name'], []).append(info['id'])
+        for name in names:
+            found = matches.get(name, [])
+            if len(found) > 1:
+                raise exceptions.NeutronClientNoUniqueMatch(
+                    resource=resource, name=name)
+            elif not found:
+                raise _not_found_by_name(resource, name)
+            resolved[name] = found[0]
+
+    if cache is not None:
+        for name_or_id in pending:
+            cache.set(_cache_key(name_or_id), resolved[name_or_id])
+    return [resolved[name_or_id] for name_or_id in names_or_ids]
+
+
+def _resolution_cache_key(client, resource, name_or_id, project_id=None,
+                          cmd_resource=None, parent_id=None):
+    """Key of a resolved name in Client.resolution_cache.
+
+    The third item is the listed collection, which is what
+    Client.invalidate_resolutions matches on.
+    """
+    httpclient = client.httpclient
+    tenant = (getattr(httpclient, 'auth_tenant_id', None) or
+              getattr(httpclient, 'tenant_id', None) or
+              getattr(httpclient, 'tenant_name', None))
+    collection = _get_resource_plural(cmd_resource or resource, client)
+    return (httpclient.endpoint_url, tenant, collection, resource,
+            parent_id, project_id, name_or_id)
 
 
 def add_show_list_common_argument(parser):
@@ -520,10 +663,12 @@ class UpdateCommand(NeutronCommand):
                 self.cmd_resource, self.parent_id)
         obj_updater = getattr(neutron_client,
                               "update_%s" % self.cmd_resource)
-        if self.parent_id:
-            obj_updater(_id, self.parent_id, body)
-        else:
-            obj_updater(_id, body)
+        with trusted_id_not_found(neutron_client, self.resource,
+                                  parsed_args.id, self.allow_names):
+            if self.parent_id:
+                obj_updater(_id, self.parent_id, body)
+            else:
+                obj_updater(_id, body)
         print((_('Updated %(resource)s: %(id)s') %
                {'id': parsed_args.id, 'resource': self.resource}),
               file=self.app.stdout)
@@ -538,6 +683,9 @@ class DeleteCommand(NeutronCommand):
     api = 'network'
     log = None
     allow_names = True
+    # Commands of top-level resources setting this accept several
+    # resources to delete, removed in parallel with Client.bulk_delete
+    bulk_delete_support = False
 
     def get_parser(self, prog_name):
         parser = super(DeleteCommand, self).get_parser(prog_name)
@@ -545,31 +693,109 @@ class DeleteCommand(NeutronCommand):
             help_str = _('ID or name of %s to delete.')
         else:
             help_str = _('ID of %s to delete.')
-        parser.add_argument(
-            'id', metavar=self.resource.upper(),
-            help=help_str % self.resource)
+        if self.bulk_delete_support:
+            parser.add_argument(
+                'id', metavar=self.resource.upper(), nargs='+',
+                help=help_str % self.resource)
+            parser.add_argument(
+                '--concurrency', type=int, default=1,
+                help=_('Number of deletions to run in parallel when '
+                       'several resources are given (default: 1).'))
+        else:
+            parser.add_argument(
+                'id', metavar=self.resource.upper(),
+                help=help_str % self.resource)
         return parser
 
+    def _find_id(self, neutron_client, name_or_id):
+        if not self.allow_names:
+            return name_or_id
+        params = {'cmd_resource': self.cmd_resource,
+                  'parent_id': self.parent_id}
+        return find_resourceid_by_name_or_id(neutron_client, self.resource,
+                                             name_or_id, **params)
+
+    def _find_ids(self, neutron_client, names_or_ids, concurrency=1):
+        """Resolve the names or IDs of a bulk deletion.
+
+        They are all resolved at once, unless some of them cannot be, in
+        which case they are resolved one at a time, up to ``concurrency``
+        at a time, to know which ones.
+        :returns: a list of ``(name_or_id, id, error)``.
+        """
+        if not self.allow_names:
+            return [(name, name, None) for name in names_or_ids]
+        try:
+            ids = find_resourceids_by_names_or_ids(
+                neutron_client, self.resource, names_or_ids,
+                cmd_resource=self.cmd_resource, parent_id=self.parent_id)
+            return [(name, _id, None)
+                    for name, _id in zip(names_or_ids, ids)]
+        except exceptions.NeutronClientException:
+            pass
+
+        def _find(name):
+            try:
+                return name, self._find_id(neutron_client, name), None
+            except exceptions.NeutronClientException as e:
+                return name, None, e
+
+        workers = multiprocessing.pool.ThreadPool(
+            max(1, min(concurrency, len(names_or_ids))))
+        try:
+            return workers.map(_find, names_or_ids, chunksize=1)
+        finally:
+            workers.close()
+            workers.join()
+
+    def _run_bulk(self, neutron_client, parsed_args):
+        names = []
+        ids = []
+        failures = []
+        for name, _id, error in self._find_ids(neutron_client, parsed_args.id,
+                                               parsed_args.concurrency):
+            if error is None:
+                ids.append(_id)
+                names.append(name)
+            else:
+                failures.append((name, error))
+        outcome = neutron_client.bulk_delete(
+            self.cmd_resource, ids, concurrency=parsed_args.concurrency)
+        for name, result in zip(names, outcome['results']):
+            if result['error'] is not None:
+                failures.append((name, result['error']))
+                continue
+            print((_('Deleted %(resource)s: %(id)s')
+                   % {'id': name, 'resource': self.resource}),
+                  file=self.app.stdout)
+        self.log.debug('Deleted %(succeeded)d %(resource)s(s) in '
+                       '%(elapsed).2f seconds, %(failed)d failed',
+                       dict(outcome, resource=self.resource))
+        if failures:
+            msg = '\n'.join(
+                _('Unable to delete %(resource)s %(id)s: %(reason)s') %
+                {'resource': self.resource, 'id': name, 'reason': e}
+                for name, e in failures)
+            raise exceptions.NeutronClientException(message=msg)
+
     def run(self, parsed_args):
         self.log.debug('run(%s)', parsed_args)
         neutron_client = self.get_client()
         neutron_client.format = parsed_args.request_format
+        if self.bulk_delete_support:
+            if len(parsed_args.id) > 1:
+                return self._run_bulk(neutron_client, parsed_args)
+            parsed_args.id = parsed_args.id[0]
         obj_deleter = getattr(neutron_client,
                               "delete_%s" % self.cmd_resource)
-        if self.allow_names:
-            params = {'cmd_resource': self.cmd_resource,
-                      'parent_id': self.parent_id}
-            _id = find_resourceid_by_name_or_id(neutron_client,
-                                                self.resource,
-                                                parsed_args.id,
-                                                **params)
-        else:
-            _id = parsed_args.id
+        _id = self._find_id(neutron_client, parsed_args.id)
 
-        if self.parent_id:
-            obj_deleter(_id, self.parent_id)
-        else:
-            obj_deleter(_id)
+        with trusted_id_not_found(neutron_client, self.resource,
+                                  parsed_args.id, self.allow_names):
+            if self.parent_id:
+                obj_deleter(_id, self.parent_id)
+            else:
+                obj_deleter(_id)
         print((_('Deleted %(resource)s: %(id)s')
                % {'id': parsed_args.id,
                   'resource': self.resource}),
@@ -577,6 +803,36 @@ class DeleteCommand(NeutronCommand):
         return
 
 
+def _related_or_id(_id, related):
+    return related or {'id': _id}
+
+
+class Join(object):
+    """A column of a list filled in from another collection.
+
+    :param collection: Collection of the related resources, e.g. 'subnets'.
+    :param fields: Fields of the related resources to retrieve besides
+                   their id.
+    :param key: Field of the listed resources holding the id, or the list
+                of ids, of the related resources. Defaults to the column.
+    :param convert: Called with each id and its related resource, None if
+                    it was not found, returns what to show instead of the
+                    id. Defaults to the resource itself, or ``{'id': id}``.
+    """
+
+    def __init__(self, collection, fields=(), key=None, convert=None):
+        self.collection = collection
+        self.fields = list(fields)
+        self.key = key
+        self.convert = convert or _related_or_id
+
+    @staticmethod
+    def ids(value):
+        if value is None:
+            return []
+        return value if isinstance(value, list) else [value]
+
+
 class ListCommand(NeutronCommand, lister.Lister):
     """List resources that belong to a given tenant
 
@@ -589,6 +845,15 @@ class ListCommand(NeutronCommand, lister.Lister):
     unknown_parts_flag = True
     pagination_support = False
     sorting_support = False
+    # Commands that do not post-process the whole list in extend_list()
+    # can render rows as they are received from the server.
+    streaming_support = False
+    # Columns filled in by extend_list() with related resources, mapped to
+    # their Join.
+    joins = {}
+    # Fields to retrieve for the columns which are not fields of the
+    # resources, such as the ones computed by extend_list()
+    column_fields = {}
 
     def get_parser(self, prog_name):
         parser = super(ListCommand, self).get_parser(prog_name)
@@ -601,13 +866,35 @@ class ListCommand(NeutronCommand, lister.Lister):
 
     def args2search_opts(self, parsed_args):
         search_opts = {}
-        fields = parsed_args.fields
-        if parsed_args.fields:
+        fields = parsed_args.fields or self.displayed_fields(parsed_args)
+        if fields:
             search_opts.update({'fields': fields})
         if parsed_args.show_details:
             search_opts.update({'verbose': 'True'})
         return search_opts
 
+    def displayed_fields(self, parsed_args):
+        """Fields needed to display the selected columns.
+
+        When the user does not give --fields, only these fields are
+        retrieved rather than the whole resources, most of which
+        setup_columns() would throw away. None if all the columns are
+        displayed.
+        """
+        columns = getattr(parsed_args, 'columns', None) or self.list_columns
+        if not columns:
+            return None
+        fields = ['id']
+        for column in columns:
+            if column in self.joins:
+                needed = [self.joins[column].key or column]
+            else:
+                needed = self.column_fields.get(column, [column])
+            for field in needed:
+                if field not in fields:
+                    fields.append(field)
+        return fields
+
     def call_server(self, neutron_client, search_opts, parsed_args):
         resource_plural = _get_resource_plural(self.cmd_resource,
                                                neutron_client)
@@ -618,10 +905,7 @@ class ListCommand(NeutronCommand, lister.Lister):
             data = obj_lister(**search_opts)
         return data
 
-    def retrieve_list(self, parsed_args):
-        """Retrieve a list of resources from Neutron server"""
-        neutron_client = self.get_client()
-        neutron_client.format = parsed_args.request_format
+    def _get_search_opts(self, parsed_args):
         _extra_values = parse_args_to_dict(self.values_specs)
         _merge_args(self, parsed_args, _extra_values,
                     self.values_specs)
@@ -643,21 +927,106 @@ class ListCommand(NeutronCommand, lister.Lister):
                 dirs = dirs[:len(keys)]
             if dirs:
                 search_opts.update({'sort_dir': dirs})
+        return search_opts
+
+    def retrieve_list(self, parsed_args):
+        """Retrieve a list of resources from Neutron server"""
+        neutron_client = self.get_client()
+        neutron_client.format = parsed_args.request_format
+        search_opts = self._get_search_opts(parsed_args)
         data = self.call_server(neutron_client, search_opts, parsed_args)
         collection = _get_resource_plural(self.resource, neutron_client)
         return data.get(collection, [])
 
+    def retrieve_iter(self, parsed_args):
+        """Iterate over resources from Neutron server as they arrive."""
+        neutron_client = self.get_client()
+        neutron_client.format = parsed_args.request_format
+        search_opts = self._get_search_opts(parsed_args)
+        resource_plural = _get_resource_plural(self.cmd_resource,
+                                               neutron_client)
+        obj_iter = getattr(neutron_client, "iter_%s" % resource_plural)
+        return obj_iter(**search_opts)
+
     def extend_list(self, data, parsed_args):
         """Update a retrieved list.
 
         This method provides a way to modify a original list returned from
         the neutron server. For example, you can add subnet cidr information
-        to a list network.
+        to a list network. The default implementation fills in the columns
+        of ``joins``.
         """
-        pass
+        self.join_related(data, parsed_args)
+
+    def join_related(self, data, parsed_args):
+        """Replace the ids of the join columns by the related resources.
+
+        The distinct ids found in all the rows are looked up with a single
+        listing per collection, filtered on id and restricted to the fields
+        of its joins. Client.list splits the listings whose URI would be
+        too long, and the listings of different collections run at the
+        same time.
+        """
+        if not self.joins or not data:
+            return
+        joins = sorted(self.joins.items())
+        wanted = {}
+        for column, join in joins:
+            request = wanted.setdefault(
+                join.collection, {'ids': [], 'seen': set(), 'fields': ['id']})
+            request['fields'].extend(field for field in join.fields
+                                     if field not in request['fields'])
+        for row in data:
+            for column, join in joins:
+                request = wanted[join.collection]
+                for _id in join.ids(row.get(join.key or column)):
+                    if _id not in request['seen']:
+                        request['seen'].add(_id)
+                        request['ids'].append(_id)
+
+        neutron_client = self.get_client()
+        search_opts = {}
+        if self.pagination_support and parsed_args.page_size:
+            search_opts['limit'] = parsed_args.page_size
+
+        def _fetch(collection):
+            request = wanted[collection]
+            obj_lister = getattr(neutron_client, "list_%s" % collection)
+            found = obj_lister(id=request['ids'], fields=request['fields'],
+                               **search_opts).get(collection, [])
+            return collection, dict((r['id'], r) for r in found)
+
+        collections = [c for c in sorted(wanted) if wanted[c]['ids']]
+        if len(collections) > 1:
+            workers = multiprocessing.pool.ThreadPool(len(collections))
+            try:
+                related = dict(workers.map(_fetch, collections))
+            finally:
+                workers.close()
+                workers.join()
+        else:
+            related = dict(_fetch(c) for c in collections)
+
+        for row in data:
+            for column, join in joins:
+                value = row.get(join.key or column)
+                if value is None:
+                    continue
+                found = related.get(join.collection, {})
+                if isinstance(value, list):
+                    row[column] = [join.convert(_id, found.get(_id))
+                                   for _id in value]
+                else:
+                    row[column] = join.convert(value, found.get(value))
 
     def setup_columns(self, info, parsed_args):
-        _columns = len(info) > 0 and sorted(info[0].keys()) or []
+        # info may be a list or an iterator of resources, so only the
+        # first resource is looked at to find out the available columns.
+        info = iter(info)
+        first = next(info, None)
+        _columns = first and sorted(first.keys()) or []
+        if first is not None:
+            info = itertools.chain([first], info)
         if not _columns:
             # clean the parsed_args.columns so that cliff will not break
             parsed_args.columns = []
@@ -674,8 +1043,11 @@ class ListCommand(NeutronCommand, lister.Lister):
 
     def get_data(self, parsed_args):
         self.log.debug('get_data(%s)', parsed_args)
-        data = self.retrieve_list(parsed_args)
-        self.extend_list(data, parsed_args)
+        if self.streaming_support and not self.parent_id and not self.joins:
+            data = self.retrieve_iter(parsed_args)
+        else:
+            data = self.retrieve_list(parsed_args)
+            self.extend_list(data, parsed_args)
         return self.setup_columns(data, parsed_args)
 
 
@@ -720,10 +1092,12 @@ class ShowCommand(NeutronCommand, show.ShowOne):
             _id = parsed_args.id
 
         obj_shower = getattr(neutron_client, "show_%s" % self.cmd_resource)
-        if self.parent_id:
-            data = obj_shower(_id, self.parent_id, **params)
-        else:
-            data = obj_shower(_id, **params)
+        with trusted_id_not_found(neutron_client, self.resource,
+                                  parsed_args.id, self.allow_names):
+            if self.parent_id:
+                data = obj_shower(_id, self.parent_id, **params)
+            else:
+                data = obj_shower(_id, **params)
         self.format_output_data(data)
         resource = data[self.resource]
         if self.resource in data:
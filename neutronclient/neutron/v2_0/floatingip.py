@@ -30,6 +30,7 @@ class ListFloatingIP(neutronV20.ListCommand):
                     'port_id']
     pagination_support = True
     sorting_support = True
+    streaming_support = True
 
 
 class ShowFloatingIP(neutronV20.ShowCommand):
@@ -82,11 +82,9 @@ class CreateFirewallPolicy(neutronv20.CreateCommand):
 
     def args2body(self, parsed_args):
         if parsed_args.firewall_rules:
-            _firewall_rules = []
-            for f in parsed_args.firewall_rules:
-                _firewall_rules.append(
-                    neutronv20.find_resourceid_by_name_or_id(
-                        self.get_client(), 'firewall_rule', f))
+            _firewall_rules = neutronv20.find_resourceids_by_names_or_ids(
+                self.get_client(), 'firewall_rule',
+                parsed_args.firewall_rules)
             body = {self.resource: {
                     'firewall_rules': _firewall_rules,
                     },
@@ -24,6 +24,9 @@ class ListPacketFilter(neutronV20.ListCommand):
 
     resource = 'packet_filter'
     list_columns = ['id', 'name', 'action', 'priority', 'summary']
+    column_fields = {'summary': ['protocol', 'eth_type', 'network_id',
+                                 'in_port', 'src_mac', 'src_cidr', 'src_port',
+                                 'dst_mac', 'dst_cidr', 'dst_port']}
     pagination_support = True
     sorting_support = True
 
@@ -38,6 +38,7 @@ class ListPort(neutronV20.ListCommand):
     list_columns = ['id', 'name', 'mac_address', 'fixed_ips']
     pagination_support = True
     sorting_support = True
+    streaming_support = True
 
 
 class ListRouterPort(neutronV20.ListCommand):
@@ -48,6 +49,7 @@ class ListRouterPort(neutronV20.ListCommand):
     list_columns = ['id', 'name', 'mac_address', 'fixed_ips']
     pagination_support = True
     sorting_support = True
+    streaming_support = True
 
     def get_parser(self, prog_name):
         parser = super(ListRouterPort, self).get_parser(prog_name)
@@ -88,10 +90,14 @@ class UpdatePortSecGroupMixin(object):
         return neutronV20.find_resourceid_by_name_or_id(
             self.get_client(), 'security_group', secgroup)
 
+    def _resolv_sgids(self, secgroups):
+        return neutronV20.find_resourceids_by_names_or_ids(
+            self.get_client(), 'security_group', secgroups)
+
     def args2body_secgroup(self, parsed_args, port):
         if parsed_args.security_groups:
-            port['security_groups'] = [self._resolv_sgid(sg) for sg
-                                       in parsed_args.security_groups]
+            port['security_groups'] = self._resolv_sgids(
+                parsed_args.security_groups)
         elif parsed_args.no_security_groups:
             port['security_groups'] = []
 
@@ -197,16 +203,15 @@ class CreatePort(neutronV20.CreateCommand, UpdatePortSecGroupMixin,
             body['port'].update({'tenant_id': parsed_args.tenant_id})
         if parsed_args.name:
             body['port'].update({'name': parsed_args.name})
-        ips = []
-        if parsed_args.fixed_ip:
-            for ip_spec in parsed_args.fixed_ip:
-                ip_dict = utils.str2dict(ip_spec)
-                if 'subnet_id' in ip_dict:
-                    subnet_name_id = ip_dict['subnet_id']
-                    _subnet_id = neutronV20.find_resourceid_by_name_or_id(
-                        self.get_client(), 'subnet', subnet_name_id)
-                    ip_dict['subnet_id'] = _subnet_id
-                ips.append(ip_dict)
+        ips = [utils.str2dict(ip_spec)
+               for ip_spec in parsed_args.fixed_ip or []]
+        with_subnet = [ip_dict for ip_dict in ips if 'subnet_id' in ip_dict]
+        if with_subnet:
+            _subnet_ids = neutronV20.find_resourceids_by_names_or_ids(
+                self.get_client(), 'subnet',
+                [ip_dict['subnet_id'] for ip_dict in with_subnet])
+            for ip_dict, _subnet_id in zip(with_subnet, _subnet_ids):
+                ip_dict['subnet_id'] = _subnet_id
         if ips:
             body['port'].update({'fixed_ips': ips})
 
@@ -220,6 +225,7 @@ class DeletePort(neutronV20.DeleteCommand):
     """Delete a given port."""
 
     resource = 'port'
+    bulk_delete_support = True
 
 
 class UpdatePort(neutronV20.UpdateCommand, UpdatePortSecGroupMixin,
@@ -39,6 +39,7 @@ class ListRouter(neutronV20.ListCommand):
     list_columns = ['id', 'name', 'external_gateway_info', 'distributed']
     pagination_support = True
     sorting_support = True
+    streaming_support = True
 
 
 class ShowRouter(neutronV20.ShowCommand):
@@ -16,7 +16,6 @@
 
 import argparse
 
-from neutronclient.common import exceptions
 from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.openstack.common.gettextutils import _
 
@@ -28,6 +27,7 @@ class ListSecurityGroup(neutronV20.ListCommand):
     list_columns = ['id', 'name', 'description']
     pagination_support = True
     sorting_support = True
+    streaming_support = True
 
 
 class ShowSecurityGroup(neutronV20.ShowCommand):
@@ -92,6 +92,10 @@ class UpdateSecurityGroup(neutronV20.UpdateCommand):
         return body
 
 
+def _security_group_name(_id, security_group):
+    return security_group and security_group['name'] or _id
+
+
 class ListSecurityGroupRule(neutronV20.ListCommand):
     """List security group rules that belong to a given tenant."""
 
@@ -100,6 +104,11 @@ class ListSecurityGroupRule(neutronV20.ListCommand):
                     'remote_ip_prefix', 'remote_group_id']
     replace_rules = {'security_group_id': 'security_group',
                      'remote_group_id': 'remote_group'}
+    joins = dict((key, neutronV20.Join('security_groups', fields=['name'],
+                                       convert=_security_group_name))
+                 for key in replace_rules)
+    column_fields = dict((column, [key])
+                         for key, column in replace_rules.items())
     pagination_support = True
     sorting_support = True
 
@@ -123,48 +132,8 @@ class ListSecurityGroupRule(neutronV20.ListCommand):
         return super(ListSecurityGroupRule, self).retrieve_list(parsed_args)
 
     def extend_list(self, data, parsed_args):
-        if parsed_args.no_nameconv:
-            return
-        neutron_client = self.get_client()
-        search_opts = {'fields': ['id', 'name']}
-        if self.pagination_support:
-            page_size = parsed_args.page_size
-            if page_size:
-                search_opts.update({'limit': page_size})
-        sec_group_ids = set()
-        for rule in data:
-            for key in self.replace_rules:
-                sec_group_ids.add(rule[key])
-        sec_group_ids = list(sec_group_ids)
-
-        def _get_sec_group_list(sec_group_ids):
-            search_opts['id'] = sec_group_ids
-            return neutron_client.list_security_groups(
-                **search_opts).get('security_groups', [])
-
-        try:
-            secgroups = _get_sec_group_list(sec_group_ids)
-        except exceptions.RequestURITooLong as uri_len_exc:
-            # Length of a query filter on security group rule id
-            # id=<uuid>& (with len(uuid)=36)
-            sec_group_id_filter_len = 40
-            # The URI is too long because of too many sec_group_id filters
-            # Use the excess attribute of the exception to know how many
-            # sec_group_id filters can be inserted into a single request
-            sec_group_count = len(sec_group_ids)
-            max_size = ((sec_group_id_filter_len * sec_group_count) -
-                        uri_len_exc.excess)
-            chunk_size = max_size / sec_group_id_filter_len
-            secgroups = []
-            for i in range(0, sec_group_count, chunk_size):
-                secgroups.extend(
-                    _get_sec_group_list(sec_group_ids[i: i + chunk_size]))
-
-        sg_dict = dict([(sg['id'], sg['name'])
-                        for sg in secgroups if sg['name']])
-        for rule in data:
-            for key in self.replace_rules:
-                rule[key] = sg_dict.get(rule[key], rule[key])
+        if not parsed_args.no_nameconv:
+            super(ListSecurityGroupRule, self).extend_list(data, parsed_args)
 
     def setup_columns(self, info, parsed_args):
         parsed_args.columns = self.replace_columns(parsed_args.columns,
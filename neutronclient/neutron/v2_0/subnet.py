@@ -142,6 +142,7 @@ class ListSubnet(neutronV20.ListCommand):
     list_columns = ['id', 'name', 'cidr', 'allocation_pools']
     pagination_support = True
     sorting_support = True
+    streaming_support = True
 
 
 class ShowSubnet(neutronV20.ShowCommand):
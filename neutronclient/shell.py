@@ -25,50 +25,16 @@ import logging
 import os
 import sys
 
-from keystoneclient.auth.identity import v2 as v2_auth
-from keystoneclient.auth.identity import v3 as v3_auth
-from keystoneclient import discover
-from keystoneclient.openstack.common.apiclient import exceptions as ks_exc
-from keystoneclient import session
+import six
 import six.moves.urllib.parse as urlparse
 
 from cliff import app
 from cliff import commandmanager
 
-from neutronclient.common import clientmanager
 from neutronclient.common import exceptions as exc
 from neutronclient.common import utils
-from neutronclient.neutron.v2_0 import agent
-from neutronclient.neutron.v2_0 import agentscheduler
-from neutronclient.neutron.v2_0 import credential
-from neutronclient.neutron.v2_0 import extension
-from neutronclient.neutron.v2_0 import floatingip
-from neutronclient.neutron.v2_0.fw import firewall
-from neutronclient.neutron.v2_0.fw import firewallpolicy
-from neutronclient.neutron.v2_0.fw import firewallrule
-from neutronclient.neutron.v2_0.lb import healthmonitor as lb_healthmonitor
-from neutronclient.neutron.v2_0.lb import member as lb_member
-from neutronclient.neutron.v2_0.lb import pool as lb_pool
-from neutronclient.neutron.v2_0.lb import vip as lb_vip
-from neutronclient.neutron.v2_0 import metering
-from neutronclient.neutron.v2_0.nec import packetfilter
-from neutronclient.neutron.v2_0 import netpartition
-from neutronclient.neutron.v2_0 import network
-from neutronclient.neutron.v2_0 import networkprofile
-from neutronclient.neutron.v2_0.nsx import networkgateway
-from neutronclient.neutron.v2_0.nsx import qos_queue
-from neutronclient.neutron.v2_0 import policyprofile
-from neutronclient.neutron.v2_0 import port
-from neutronclient.neutron.v2_0 import quota
-from neutronclient.neutron.v2_0 import router
-from neutronclient.neutron.v2_0 import securitygroup
-from neutronclient.neutron.v2_0 import servicetype
-from neutronclient.neutron.v2_0 import subnet
-from neutronclient.neutron.v2_0.vpn import ikepolicy
-from neutronclient.neutron.v2_0.vpn import ipsec_site_connection
-from neutronclient.neutron.v2_0.vpn import ipsecpolicy
-from neutronclient.neutron.v2_0.vpn import vpnservice
 from neutronclient.openstack.common.gettextutils import _
+from neutronclient.openstack.common import importutils
 from neutronclient.openstack.common import strutils
 from neutronclient.version import __version__
 
@@ -115,189 +81,287 @@ def check_non_negative_int(value):
     return value
 
 
-COMMAND_V2 = {
-    'net-list': network.ListNetwork,
-    'net-external-list': network.ListExternalNetwork,
-    'net-show': network.ShowNetwork,
-    'net-create': network.CreateNetwork,
-    'net-delete': network.DeleteNetwork,
-    'net-update': network.UpdateNetwork,
-    'subnet-list': subnet.ListSubnet,
-    'subnet-show': subnet.ShowSubnet,
-    'subnet-create': subnet.CreateSubnet,
-    'subnet-delete': subnet.DeleteSubnet,
-    'subnet-update': subnet.UpdateSubnet,
-    'port-list': port.ListPort,
-    'port-show': port.ShowPort,
-    'port-create': port.CreatePort,
-    'port-delete': port.DeletePort,
-    'port-update': port.UpdatePort,
-    'quota-list': quota.ListQuota,
-    'quota-show': quota.ShowQuota,
-    'quota-delete': quota.DeleteQuota,
-    'quota-update': quota.UpdateQuota,
-    'ext-list': extension.ListExt,
-    'ext-show': extension.ShowExt,
-    'router-list': router.ListRouter,
-    'router-port-list': port.ListRouterPort,
-    'router-show': router.ShowRouter,
-    'router-create': router.CreateRouter,
-    'router-delete': router.DeleteRouter,
-    'router-update': router.UpdateRouter,
-    'router-interface-add': router.AddInterfaceRouter,
-    'router-interface-delete': router.RemoveInterfaceRouter,
-    'router-gateway-set': router.SetGatewayRouter,
-    'router-gateway-clear': router.RemoveGatewayRouter,
-    'floatingip-list': floatingip.ListFloatingIP,
-    'floatingip-show': floatingip.ShowFloatingIP,
-    'floatingip-create': floatingip.CreateFloatingIP,
-    'floatingip-delete': floatingip.DeleteFloatingIP,
-    'floatingip-associate': floatingip.AssociateFloatingIP,
-    'floatingip-disassociate': floatingip.DisassociateFloatingIP,
-    'security-group-list': securitygroup.ListSecurityGroup,
-    'security-group-show': securitygroup.ShowSecurityGroup,
-    'security-group-create': securitygroup.CreateSecurityGroup,
-    'security-group-delete': securitygroup.DeleteSecurityGroup,
-    'security-group-update': securitygroup.UpdateSecurityGroup,
-    'security-group-rule-list': securitygroup.ListSecurityGroupRule,
-    'security-group-rule-show': securitygroup.ShowSecurityGroupRule,
-    'security-group-rule-create': securitygroup.CreateSecurityGroupRule,
-    'security-group-rule-delete': securitygroup.DeleteSecurityGroupRule,
-    'lb-vip-list': lb_vip.ListVip,
-    'lb-vip-show': lb_vip.ShowVip,
-    'lb-vip-create': lb_vip.CreateVip,
-    'lb-vip-update': lb_vip.UpdateVip,
-    'lb-vip-delete': lb_vip.DeleteVip,
-    'lb-pool-list': lb_pool.ListPool,
-    'lb-pool-show': lb_pool.ShowPool,
-    'lb-pool-create': lb_pool.CreatePool,
-    'lb-pool-update': lb_pool.UpdatePool,
-    'lb-pool-delete': lb_pool.DeletePool,
-    'lb-pool-stats': lb_pool.RetrievePoolStats,
-    'lb-member-list': lb_member.ListMember,
-    'lb-member-show': lb_member.ShowMember,
-    'lb-member-create': lb_member.CreateMember,
-    'lb-member-update': lb_member.UpdateMember,
-    'lb-member-delete': lb_member.DeleteMember,
-    'lb-healthmonitor-list': lb_healthmonitor.ListHealthMonitor,
-    'lb-healthmonitor-show': lb_healthmonitor.ShowHealthMonitor,
-    'lb-healthmonitor-create': lb_healthmonitor.CreateHealthMonitor,
-    'lb-healthmonitor-update': lb_healthmonitor.UpdateHealthMonitor,
-    'lb-healthmonitor-delete': lb_healthmonitor.DeleteHealthMonitor,
-    'lb-healthmonitor-associate': lb_healthmonitor.AssociateHealthMonitor,
+def check_non_negative_float(value):
+    try:
+        value = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(_("invalid float value: %r") %
+                                         value)
+    if value < 0:
+        raise argparse.ArgumentTypeError(_("input value %s is negative") %
+                                         value)
+    return value
+
+
+class CommandTable(dict):
+    """Command names mapped to their classes, imported when first read.
+
+    The classes can be given by their path relative to ``package``. Reading
+    the table returns the classes; the shell creates its commands from
+    raw_items() without importing any of them.
+    """
+
+    def __init__(self, package, *args, **kwargs):
+        super(CommandTable, self).__init__(*args, **kwargs)
+        self.package = package
+
+    def __getitem__(self, name):
+        command_class = super(CommandTable, self).__getitem__(name)
+        if isinstance(command_class, six.string_types):
+            command_class = importutils.import_class(
+                '%s.%s' % (self.package, command_class))
+            super(CommandTable, self).__setitem__(name, command_class)
+        return command_class
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def items(self):
+        return [(name, self[name]) for name in list(self.keys())]
+
+    def values(self):
+        return [self[name] for name in list(self.keys())]
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def itervalues(self):
+        return iter(self.values())
+
+    def raw_items(self):
+        """Return the (name, class or class path) pairs of the table."""
+        return list(super(CommandTable, self).items())
+
+
+# Command classes are given by their path relative to COMMAND_V2_PACKAGE and
+# only imported when the command is run, so that starting the shell does not
+# import every command module.
+COMMAND_V2_PACKAGE = 'neutronclient.neutron.v2_0'
+
+COMMAND_V2 = CommandTable(COMMAND_V2_PACKAGE, {
+    'net-list': 'network.ListNetwork',
+    'net-external-list': 'network.ListExternalNetwork',
+    'net-show': 'network.ShowNetwork',
+    'net-create': 'network.CreateNetwork',
+    'net-delete': 'network.DeleteNetwork',
+    'net-update': 'network.UpdateNetwork',
+    'subnet-list': 'subnet.ListSubnet',
+    'subnet-show': 'subnet.ShowSubnet',
+    'subnet-create': 'subnet.CreateSubnet',
+    'subnet-delete': 'subnet.DeleteSubnet',
+    'subnet-update': 'subnet.UpdateSubnet',
+    'port-list': 'port.ListPort',
+    'port-show': 'port.ShowPort',
+    'port-create': 'port.CreatePort',
+    'port-delete': 'port.DeletePort',
+    'port-update': 'port.UpdatePort',
+    'quota-list': 'quota.ListQuota',
+    'quota-show': 'quota.ShowQuota',
+    'quota-delete': 'quota.DeleteQuota',
+    'quota-update': 'quota.UpdateQuota',
+    'ext-list': 'extension.ListExt',
+    'ext-show': 'extension.ShowExt',
+    'router-list': 'router.ListRouter',
+    'router-port-list': 'port.ListRouterPort',
+    'router-show': 'router.ShowRouter',
+    'router-create': 'router.CreateRouter',
+    'router-delete': 'router.DeleteRouter',
+    'router-update': 'router.UpdateRouter',
+    'router-interface-add': 'router.AddInterfaceRouter',
+    'router-interface-delete': 'router.RemoveInterfaceRouter',
+    'router-gateway-set': 'router.SetGatewayRouter',
+    'router-gateway-clear': 'router.RemoveGatewayRouter',
+    'floatingip-list': 'floatingip.ListFloatingIP',
+    'floatingip-show': 'floatingip.ShowFloatingIP',
+    'floatingip-create': 'floatingip.CreateFloatingIP',
+    'floatingip-delete': 'floatingip.DeleteFloatingIP',
+    'floatingip-associate': 'floatingip.AssociateFloatingIP',
+    'floatingip-disassociate': 'floatingip.DisassociateFloatingIP',
+    'security-group-list': 'securitygroup.ListSecurityGroup',
+    'security-group-show': 'securitygroup.ShowSecurityGroup',
+    'security-group-create': 'securitygroup.CreateSecurityGroup',
+    'security-group-delete': 'securitygroup.DeleteSecurityGroup',
+    'security-group-update': 'securitygroup.UpdateSecurityGroup',
+    'security-group-rule-list': 'securitygroup.ListSecurityGroupRule',
+    'security-group-rule-show': 'securitygroup.ShowSecurityGroupRule',
+    'security-group-rule-create': 'securitygroup.CreateSecurityGroupRule',
+    'security-group-rule-delete': 'securitygroup.DeleteSecurityGroupRule',
+    'lb-vip-list': 'lb.vip.ListVip',
+    'lb-vip-show': 'lb.vip.ShowVip',
+    'lb-vip-create': 'lb.vip.CreateVip',
+    'lb-vip-update': 'lb.vip.UpdateVip',
+    'lb-vip-delete': 'lb.vip.DeleteVip',
+    'lb-pool-list': 'lb.pool.ListPool',
+    'lb-pool-show': 'lb.pool.ShowPool',
+    'lb-pool-create': 'lb.pool.CreatePool',
+    'lb-pool-update': 'lb.pool.UpdatePool',
+    'lb-pool-delete': 'lb.pool.DeletePool',
+    'lb-pool-stats': 'lb.pool.RetrievePoolStats',
+    'lb-member-list': 'lb.member.ListMember',
+    'lb-member-show': 'lb.member.ShowMember',
+    'lb-member-create': 'lb.member.CreateMember',
+    'lb-member-update': 'lb.member.UpdateMember',
+    'lb-member-delete': 'lb.member.DeleteMember',
+    'lb-healthmonitor-list': 'lb.healthmonitor.ListHealthMonitor',
+    'lb-healthmonitor-show': 'lb.healthmonitor.ShowHealthMonitor',
+    'lb-healthmonitor-create': 'lb.healthmonitor.CreateHealthMonitor',
+    'lb-healthmonitor-update': 'lb.healthmonitor.UpdateHealthMonitor',
+    'lb-healthmonitor-delete': 'lb.healthmonitor.DeleteHealthMonitor',
+    'lb-healthmonitor-associate': 'lb.healthmonitor.AssociateHealthMonitor',
     'lb-healthmonitor-disassociate': (
-        lb_healthmonitor.DisassociateHealthMonitor
+        'lb.healthmonitor.DisassociateHealthMonitor'
+    ),
+    'queue-create': 'nsx.qos_queue.CreateQoSQueue',
+    'queue-delete': 'nsx.qos_queue.DeleteQoSQueue',
+    'queue-show': 'nsx.qos_queue.ShowQoSQueue',
+    'queue-list': 'nsx.qos_queue.ListQoSQueue',
+    'agent-list': 'agent.ListAgent',
+    'agent-show': 'agent.ShowAgent',
+    'agent-delete': 'agent.DeleteAgent',
+    'agent-update': 'agent.UpdateAgent',
+    'net-gateway-create': 'nsx.networkgateway.CreateNetworkGateway',
+    'net-gateway-update': 'nsx.networkgateway.UpdateNetworkGateway',
+    'net-gateway-delete': 'nsx.networkgateway.DeleteNetworkGateway',
+    'net-gateway-show': 'nsx.networkgateway.ShowNetworkGateway',
+    'net-gateway-list': 'nsx.networkgateway.ListNetworkGateway',
+    'net-gateway-connect': 'nsx.networkgateway.ConnectNetworkGateway',
+    'net-gateway-disconnect': 'nsx.networkgateway.DisconnectNetworkGateway',
+    'gateway-device-create': 'nsx.networkgateway.CreateGatewayDevice',
+    'gateway-device-update': 'nsx.networkgateway.UpdateGatewayDevice',
+    'gateway-device-delete': 'nsx.networkgateway.DeleteGatewayDevice',
+    'gateway-device-show': 'nsx.networkgateway.ShowGatewayDevice',
+    'gateway-device-list': 'nsx.networkgateway.ListGatewayDevice',
+    'dhcp-agent-network-add': 'agentscheduler.AddNetworkToDhcpAgent',
+    'dhcp-agent-network-remove': 'agentscheduler.RemoveNetworkFromDhcpAgent',
+    'net-list-on-dhcp-agent': 'agentscheduler.ListNetworksOnDhcpAgent',
+    'dhcp-agent-list-hosting-net': (
+        'agentscheduler.ListDhcpAgentsHostingNetwork'
     ),
-    'queue-create': qos_queue.CreateQoSQueue,
-    'queue-delete': qos_queue.DeleteQoSQueue,
-    'queue-show': qos_queue.ShowQoSQueue,
-    'queue-list': qos_queue.ListQoSQueue,
-    'agent-list': agent.ListAgent,
-    'agent-show': agent.ShowAgent,
-    'agent-delete': agent.DeleteAgent,
-    'agent-update': agent.UpdateAgent,
-    'net-gateway-create': networkgateway.CreateNetworkGateway,
-    'net-gateway-update': networkgateway.UpdateNetworkGateway,
-    'net-gateway-delete': networkgateway.DeleteNetworkGateway,
-    'net-gateway-show': networkgateway.ShowNetworkGateway,
-    'net-gateway-list': networkgateway.ListNetworkGateway,
-    'net-gateway-connect': networkgateway.ConnectNetworkGateway,
-    'net-gateway-disconnect': networkgateway.DisconnectNetworkGateway,
-    'gateway-device-create': networkgateway.CreateGatewayDevice,
-    'gateway-device-update': networkgateway.UpdateGatewayDevice,
-    'gateway-device-delete': networkgateway.DeleteGatewayDevice,
-    'gateway-device-show': networkgateway.ShowGatewayDevice,
-    'gateway-device-list': networkgateway.ListGatewayDevice,
-    'dhcp-agent-network-add': agentscheduler.AddNetworkToDhcpAgent,
-    'dhcp-agent-network-remove': agentscheduler.RemoveNetworkFromDhcpAgent,
-    'net-list-on-dhcp-agent': agentscheduler.ListNetworksOnDhcpAgent,
-    'dhcp-agent-list-hosting-net': agentscheduler.ListDhcpAgentsHostingNetwork,
-    'l3-agent-router-add': agentscheduler.AddRouterToL3Agent,
-    'l3-agent-router-remove': agentscheduler.RemoveRouterFromL3Agent,
-    'router-list-on-l3-agent': agentscheduler.ListRoutersOnL3Agent,
-    'l3-agent-list-hosting-router': agentscheduler.ListL3AgentsHostingRouter,
-    'lb-pool-list-on-agent': agentscheduler.ListPoolsOnLbaasAgent,
-    'lb-agent-hosting-pool': agentscheduler.GetLbaasAgentHostingPool,
-    'service-provider-list': servicetype.ListServiceProvider,
-    'firewall-rule-list': firewallrule.ListFirewallRule,
-    'firewall-rule-show': firewallrule.ShowFirewallRule,
-    'firewall-rule-create': firewallrule.CreateFirewallRule,
-    'firewall-rule-update': firewallrule.UpdateFirewallRule,
-    'firewall-rule-delete': firewallrule.DeleteFirewallRule,
-    'firewall-policy-list': firewallpolicy.ListFirewallPolicy,
-    'firewall-policy-show': firewallpolicy.ShowFirewallPolicy,
-    'firewall-policy-create': firewallpolicy.CreateFirewallPolicy,
-    'firewall-policy-update': firewallpolicy.UpdateFirewallPolicy,
-    'firewall-policy-delete': firewallpolicy.DeleteFirewallPolicy,
-    'firewall-policy-insert-rule': firewallpolicy.FirewallPolicyInsertRule,
-    'firewall-policy-remove-rule': firewallpolicy.FirewallPolicyRemoveRule,
-    'firewall-list': firewall.ListFirewall,
-    'firewall-show': firewall.ShowFirewall,
-    'firewall-create': firewall.CreateFirewall,
-    'firewall-update': firewall.UpdateFirewall,
-    'firewall-delete': firewall.DeleteFirewall,
-    'cisco-credential-list': credential.ListCredential,
-    'cisco-credential-show': credential.ShowCredential,
-    'cisco-credential-create': credential.CreateCredential,
-    'cisco-credential-delete': credential.DeleteCredential,
-    'cisco-network-profile-list': networkprofile.ListNetworkProfile,
-    'cisco-network-profile-show': networkprofile.ShowNetworkProfile,
-    'cisco-network-profile-create': networkprofile.CreateNetworkProfile,
-    'cisco-network-profile-delete': networkprofile.DeleteNetworkProfile,
-    'cisco-network-profile-update': networkprofile.UpdateNetworkProfile,
-    'cisco-policy-profile-list': policyprofile.ListPolicyProfile,
-    'cisco-policy-profile-show': policyprofile.ShowPolicyProfile,
-    'cisco-policy-profile-update': policyprofile.UpdatePolicyProfile,
+    'l3-agent-router-add': 'agentscheduler.AddRouterToL3Agent',
+    'l3-agent-router-remove': 'agentscheduler.RemoveRouterFromL3Agent',
+    'router-list-on-l3-agent': 'agentscheduler.ListRoutersOnL3Agent',
+    'l3-agent-list-hosting-router': 'agentscheduler.ListL3AgentsHostingRouter',
+    'lb-pool-list-on-agent': 'agentscheduler.ListPoolsOnLbaasAgent',
+    'lb-agent-hosting-pool': 'agentscheduler.GetLbaasAgentHostingPool',
+    'service-provider-list': 'servicetype.ListServiceProvider',
+    'firewall-rule-list': 'fw.firewallrule.ListFirewallRule',
+    'firewall-rule-show': 'fw.firewallrule.ShowFirewallRule',
+    'firewall-rule-create': 'fw.firewallrule.CreateFirewallRule',
+    'firewall-rule-update': 'fw.firewallrule.UpdateFirewallRule',
+    'firewall-rule-delete': 'fw.firewallrule.DeleteFirewallRule',
+    'firewall-policy-list': 'fw.firewallpolicy.ListFirewallPolicy',
+    'firewall-policy-show': 'fw.firewallpolicy.ShowFirewallPolicy',
+    'firewall-policy-create': 'fw.firewallpolicy.CreateFirewallPolicy',
+    'firewall-policy-update': 'fw.firewallpolicy.UpdateFirewallPolicy',
+    'firewall-policy-delete': 'fw.firewallpolicy.DeleteFirewallPolicy',
+    'firewall-policy-insert-rule': (
+        'fw.firewallpolicy.FirewallPolicyInsertRule'
+    ),
+    'firewall-policy-remove-rule': (
+        'fw.firewallpolicy.FirewallPolicyRemoveRule'
+    ),
+    'firewall-list': 'fw.firewall.ListFirewall',
+    'firewall-show': 'fw.firewall.ShowFirewall',
+    'firewall-create': 'fw.firewall.CreateFirewall',
+    'firewall-update': 'fw.firewall.UpdateFirewall',
+    'firewall-delete': 'fw.firewall.DeleteFirewall',
+    'cisco-credential-list': 'credential.ListCredential',
+    'cisco-credential-show': 'credential.ShowCredential',
+    'cisco-credential-create': 'credential.CreateCredential',
+    'cisco-credential-delete': 'credential.DeleteCredential',
+    'cisco-network-profile-list': 'networkprofile.ListNetworkProfile',
+    'cisco-network-profile-show': 'networkprofile.ShowNetworkProfile',
+    'cisco-network-profile-create': 'networkprofile.CreateNetworkProfile',
+    'cisco-network-profile-delete': 'networkprofile.DeleteNetworkProfile',
+    'cisco-network-profile-update': 'networkprofile.UpdateNetworkProfile',
+    'cisco-policy-profile-list': 'policyprofile.ListPolicyProfile',
+    'cisco-policy-profile-show': 'policyprofile.ShowPolicyProfile',
+    'cisco-policy-profile-update': 'policyprofile.UpdatePolicyProfile',
     'ipsec-site-connection-list': (
-        ipsec_site_connection.ListIPsecSiteConnection
+        'vpn.ipsec_site_connection.ListIPsecSiteConnection'
     ),
     'ipsec-site-connection-show': (
-        ipsec_site_connection.ShowIPsecSiteConnection
+        'vpn.ipsec_site_connection.ShowIPsecSiteConnection'
     ),
     'ipsec-site-connection-create': (
-        ipsec_site_connection.CreateIPsecSiteConnection
+        'vpn.ipsec_site_connection.CreateIPsecSiteConnection'
     ),
     'ipsec-site-connection-update': (
-        ipsec_site_connection.UpdateIPsecSiteConnection
+        'vpn.ipsec_site_connection.UpdateIPsecSiteConnection'
     ),
     'ipsec-site-connection-delete': (
-        ipsec_site_connection.DeleteIPsecSiteConnection
+        'vpn.ipsec_site_connection.DeleteIPsecSiteConnection'
     ),
-    'vpn-service-list': vpnservice.ListVPNService,
-    'vpn-service-show': vpnservice.ShowVPNService,
-    'vpn-service-create': vpnservice.CreateVPNService,
-    'vpn-service-update': vpnservice.UpdateVPNService,
-    'vpn-service-delete': vpnservice.DeleteVPNService,
-    'vpn-ipsecpolicy-list': ipsecpolicy.ListIPsecPolicy,
-    'vpn-ipsecpolicy-show': ipsecpolicy.ShowIPsecPolicy,
-    'vpn-ipsecpolicy-create': ipsecpolicy.CreateIPsecPolicy,
-    'vpn-ipsecpolicy-update': ipsecpolicy.UpdateIPsecPolicy,
-    'vpn-ipsecpolicy-delete': ipsecpolicy.DeleteIPsecPolicy,
-    'vpn-ikepolicy-list': ikepolicy.ListIKEPolicy,
-    'vpn-ikepolicy-show': ikepolicy.ShowIKEPolicy,
-    'vpn-ikepolicy-create': ikepolicy.CreateIKEPolicy,
-    'vpn-ikepolicy-update': ikepolicy.UpdateIKEPolicy,
-    'vpn-ikepolicy-delete': ikepolicy.DeleteIKEPolicy,
-    'meter-label-create': metering.CreateMeteringLabel,
-    'meter-label-list': metering.ListMeteringLabel,
-    'meter-label-show': metering.ShowMeteringLabel,
-    'meter-label-delete': metering.DeleteMeteringLabel,
-    'meter-label-rule-create': metering.CreateMeteringLabelRule,
-    'meter-label-rule-list': metering.ListMeteringLabelRule,
-    'meter-label-rule-show': metering.ShowMeteringLabelRule,
-    'meter-label-rule-delete': metering.DeleteMeteringLabelRule,
-    'nuage-netpartition-list': netpartition.ListNetPartition,
-    'nuage-netpartition-show': netpartition.ShowNetPartition,
-    'nuage-netpartition-create': netpartition.CreateNetPartition,
-    'nuage-netpartition-delete': netpartition.DeleteNetPartition,
-    'nec-packet-filter-list': packetfilter.ListPacketFilter,
-    'nec-packet-filter-show': packetfilter.ShowPacketFilter,
-    'nec-packet-filter-create': packetfilter.CreatePacketFilter,
-    'nec-packet-filter-update': packetfilter.UpdatePacketFilter,
-    'nec-packet-filter-delete': packetfilter.DeletePacketFilter,
-}
+    'vpn-service-list': 'vpn.vpnservice.ListVPNService',
+    'vpn-service-show': 'vpn.vpnservice.ShowVPNService',
+    'vpn-service-create': 'vpn.vpnservice.CreateVPNService',
+    'vpn-service-update': 'vpn.vpnservice.UpdateVPNService',
+    'vpn-service-delete': 'vpn.vpnservice.DeleteVPNService',
+    'vpn-ipsecpolicy-list': 'vpn.ipsecpolicy.ListIPsecPolicy',
+    'vpn-ipsecpolicy-show': 'vpn.ipsecpolicy.ShowIPsecPolicy',
+    'vpn-ipsecpolicy-create': 'vpn.ipsecpolicy.CreateIPsecPolicy',
+    'vpn-ipsecpolicy-update': 'vpn.ipsecpolicy.UpdateIPsecPolicy',
+    'vpn-ipsecpolicy-delete': 'vpn.ipsecpolicy.DeleteIPsecPolicy',
+    'vpn-ikepolicy-list': 'vpn.ikepolicy.ListIKEPolicy',
+    'vpn-ikepolicy-show': 'vpn.ikepolicy.ShowIKEPolicy',
+    'vpn-ikepolicy-create': 'vpn.ikepolicy.CreateIKEPolicy',
+    'vpn-ikepolicy-update': 'vpn.ikepolicy.UpdateIKEPolicy',
+    'vpn-ikepolicy-delete': 'vpn.ikepolicy.DeleteIKEPolicy',
+    'meter-label-create': 'metering.CreateMeteringLabel',
+    'meter-label-list': 'metering.ListMeteringLabel',
+    'meter-label-show': 'metering.ShowMeteringLabel',
+    'meter-label-delete': 'metering.DeleteMeteringLabel',
+    'meter-label-rule-create': 'metering.CreateMeteringLabelRule',
+    'meter-label-rule-list': 'metering.ListMeteringLabelRule',
+    'meter-label-rule-show': 'metering.ShowMeteringLabelRule',
+    'meter-label-rule-delete': 'metering.DeleteMeteringLabelRule',
+    'nuage-netpartition-list': 'netpartition.ListNetPartition',
+    'nuage-netpartition-show': 'netpartition.ShowNetPartition',
+    'nuage-netpartition-create': 'netpartition.CreateNetPartition',
+    'nuage-netpartition-delete': 'netpartition.DeleteNetPartition',
+    'nec-packet-filter-list': 'nec.packetfilter.ListPacketFilter',
+    'nec-packet-filter-show': 'nec.packetfilter.ShowPacketFilter',
+    'nec-packet-filter-create': 'nec.packetfilter.CreatePacketFilter',
+    'nec-packet-filter-update': 'nec.packetfilter.UpdatePacketFilter',
+    'nec-packet-filter-delete': 'nec.packetfilter.DeletePacketFilter',
+})
 
 COMMANDS = {'2.0': COMMAND_V2}
+COMMAND_PACKAGES = {'2.0': COMMAND_V2_PACKAGE}
+
+
+class LazyCommand(object):
+    """Command plugin importing its class the first time it is loaded."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.command_class = None
+
+    def load(self):
+        if self.command_class is None:
+            self.command_class = importutils.import_class(self.path)
+        return self.command_class
+
+
+class CommandManager(commandmanager.CommandManager):
+    """CommandManager accepting dotted class paths as commands.
+
+    :param package: Package the relative command paths are resolved from.
+    """
+
+    def __init__(self, namespace, package=None, **kwargs):
+        self.package = package
+        super(CommandManager, self).__init__(namespace, **kwargs)
+
+    def add_command(self, name, command_class):
+        if not isinstance(command_class, six.string_types):
+            return super(CommandManager, self).add_command(name,
+                                                           command_class)
+        path = command_class
+        if self.package:
+            path = '%s.%s' % (self.package, path)
+        self.commands[name] = LazyCommand(name, path)
 
 
 class HelpAction(argparse.Action):
@@ -339,14 +403,17 @@ class NeutronShell(app.App):
         super(NeutronShell, self).__init__(
             description=__doc__.strip(),
             version=VERSION,
-            command_manager=commandmanager.CommandManager('neutron.cli'), )
+            command_manager=CommandManager(
+                'neutron.cli', package=COMMAND_PACKAGES.get(apiversion)), )
         self.commands = COMMANDS
-        for k, v in self.commands[apiversion].items():
+        commands = self.commands[apiversion]
+        for k, v in getattr(commands, 'raw_items', commands.items)():
             self.command_manager.add_command(k, v)
 
         # This is instantiated in initialize_app() only when using
         # password flow auth
         self.auth_client = None
+        self.auth_cache = None
         self.api_version = apiversion
 
     def build_option_parser(self, description, version):
@@ -393,6 +460,40 @@ class NeutronShell(app.App):
             default=0,
             help=_("How many times the request to the Neutron server should "
                    "be retried if it fails."))
+        parser.add_argument(
+            '--max-rps',
+            metavar="RATE",
+            type=check_non_negative_float,
+            default=0,
+            help=_("Maximum number of requests sent to the Neutron server "
+                   "per second, 0 for no limit."))
+        parser.add_argument(
+            '--max-concurrency',
+            metavar="NUM",
+            type=check_non_negative_int,
+            default=0,
+            help=_("Maximum number of requests in flight to the Neutron "
+                   "server, 0 for no limit."))
+        parser.add_argument(
+            '--max-write-rps',
+            metavar="RATE",
+            type=check_non_negative_float,
+            default=0,
+            help=_("Maximum number of create, update and delete requests "
+                   "per second. Defaults to --max-rps."))
+        parser.add_argument(
+            '--max-write-concurrency',
+            metavar="NUM",
+            type=check_non_negative_int,
+            default=0,
+            help=_("Maximum number of create, update and delete requests "
+                   "in flight. Defaults to --max-concurrency."))
+        parser.add_argument(
+            '--trust-uuids',
+            action='store_true',
+            default=False,
+            help=_("Use a UUID given for a resource as its ID without "
+                   "checking first that the resource exists."))
         # FIXME(bklei): this method should come from python-keystoneclient
         self._append_global_identity_args(parser)
 
@@ -616,6 +717,22 @@ class NeutronShell(app.App):
                    "not be verified against any certificate authorities. "
                    "This option should be used with caution."))
 
+        parser.add_argument(
+            '--os-cache',
+            action='store_true',
+            default=strutils.bool_from_string(env('OS_CACHE')),
+            help=_("Cache the discovered identity API versions, the token "
+                   "and the network endpoint on disk, encrypted with the "
+                   "password, and reuse them until the token is about to "
+                   "expire. Requires the cryptography package. Defaults "
+                   "to env[OS_CACHE]."))
+
+        parser.add_argument(
+            '--os-cache-dir', metavar='<directory>',
+            default=env('OS_CACHE_DIR', default='~/.cache/neutronclient'),
+            help=_("Directory of the authentication cache, defaults to "
+                   "env[OS_CACHE_DIR] or ~/.cache/neutronclient."))
+
     def _bash_completion(self):
         """Prints all of the commands and options for bash-completion."""
         commands = set()
@@ -780,6 +897,11 @@ class NeutronShell(app.App):
                     _("You must provide a service URL via"
                       " either --os-url or env[OS_URL]"))
 
+        # Imported here as it pulls in the HTTP and keystone clients, which
+        # are not needed for the help and bash-completion commands.
+        from neutronclient.common import clientmanager
+
+        self.auth_cache = self._get_auth_cache()
         auth_session = self._get_keystone_session()
 
         self.client_manager = clientmanager.ClientManager(
@@ -804,8 +926,14 @@ class NeutronShell(app.App):
             timeout=self.options.http_timeout,
             retries=self.options.retries,
             raise_errors=False,
+            trust_uuids=self.options.trust_uuids,
             session=auth_session,
             auth=auth_session.auth,
+            auth_cache=self.auth_cache,
+            rate_limiter=self._get_rate_limiter(),
+            # Identical lookups made by the parallel requests of a command
+            # are sent once
+            coalesce_requests=True,
             log_credentials=True)
         return
 
@@ -858,6 +986,8 @@ class NeutronShell(app.App):
         return
 
     def get_v2_auth(self, v2_auth_url):
+        from keystoneclient.auth.identity import v2 as v2_auth
+
         return v2_auth.Password(
             v2_auth_url,
             username=self.options.os_username,
@@ -866,6 +996,8 @@ class NeutronShell(app.App):
             tenant_name=self.options.os_tenant_name)
 
     def get_v3_auth(self, v3_auth_url):
+        from keystoneclient.auth.identity import v3 as v3_auth
+
         project_id = self.options.os_project_id or self.options.os_tenant_id
         project_name = (self.options.os_project_name or
                         self.options.os_tenant_name)
@@ -884,6 +1016,10 @@ class NeutronShell(app.App):
         )
 
     def _discover_auth_versions(self, session, auth_url):
+        from keystoneclient import discover
+        from keystoneclient.openstack.common.apiclient import (
+            exceptions as ks_exc)
+
         # discover the API versions the server is supporting base on the
         # given URL
         try:
@@ -908,7 +1044,47 @@ class NeutronShell(app.App):
                         'auth_url instead.')
                 raise exc.CommandError(msg)
 
+    def _get_rate_limiter(self):
+        options = self.options
+        if not (options.max_rps or options.max_concurrency or
+                options.max_write_rps or options.max_write_concurrency):
+            return None
+        from neutronclient.common import ratelimit
+
+        return ratelimit.RateLimiter(
+            max_rps=options.max_rps,
+            max_concurrency=options.max_concurrency,
+            max_write_rps=options.max_write_rps,
+            max_write_concurrency=options.max_write_concurrency)
+
+    def _get_auth_cache(self):
+        if not self.options.os_cache or self.options.os_token:
+            return None
+        from neutronclient.common import auth_cache
+
+        return auth_cache.AuthCache(
+            self.options.os_cache_dir,
+            self.options.os_password,
+            auth_url=self.options.os_auth_url,
+            username=self.options.os_username,
+            user_id=self.options.os_user_id,
+            user_domain_id=self.options.os_user_domain_id,
+            user_domain_name=self.options.os_user_domain_name,
+            tenant_id=self.options.os_tenant_id,
+            tenant_name=self.options.os_tenant_name,
+            project_id=self.options.os_project_id,
+            project_name=self.options.os_project_name,
+            project_domain_id=self.options.os_project_domain_id,
+            project_domain_name=self.options.os_project_domain_name,
+            region_name=self.options.os_region_name,
+            service_type=(self.options.os_service_type or
+                          self.options.service_type),
+            endpoint_type=(self.options.os_endpoint_type or
+                           self.endpoint_type))
+
     def _get_keystone_session(self):
+        from keystoneclient import session
+
         # first create a Keystone session
         cacert = self.options.os_cacert or None
         cert = self.options.os_cert or None
@@ -919,9 +1095,15 @@ class NeutronShell(app.App):
                                                     key=key,
                                                     insecure=insecure))
         # discover the supported keystone versions using the given url
-        (v2_auth_url, v3_auth_url) = self._discover_auth_versions(
-            session=ks_session,
-            auth_url=self.options.os_auth_url)
+        versions = self.auth_cache and self.auth_cache.get('auth_versions')
+        if versions:
+            (v2_auth_url, v3_auth_url) = versions
+        else:
+            (v2_auth_url, v3_auth_url) = self._discover_auth_versions(
+                session=ks_session,
+                auth_url=self.options.os_auth_url)
+            if self.auth_cache:
+                self.auth_cache.set(auth_versions=[v2_auth_url, v3_auth_url])
 
         # Determine which authentication plugin to use. First inspect the
         # auth_url to see the supported version. If both v3 and v2 are
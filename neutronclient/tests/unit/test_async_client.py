@@ -0,0 +1,247 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import json
+
+import six.moves.urllib.parse as urlparse
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import ratelimit
+from neutronclient.common import retry
+from neutronclient.tests.unit import test_cli20
+from neutronclient.tests.unit import test_retry
+from neutronclient.v2_0 import async_client
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+class FakeTransport(object):
+    """In-process transport answering from a list of canned replies."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def do_request(self, action, method, body=None, content_type=None,
+                   loop=None):
+        self.requests.append((method, action, body))
+        reply = self.replies.pop(0)
+        future = asyncio.Future(loop=loop)
+        if isinstance(reply, Exception):
+            future.set_exception(reply)
+        else:
+            status_code, data = reply[:2]
+            headers = reply[2] if len(reply) > 2 else None
+            future.set_result((test_cli20.MyResp(status_code,
+                                                 headers=headers),
+                               data and json.dumps(data)))
+        return future
+
+
+@testtools.skipIf(asyncio is None, 'asyncio is not available')
+class AsyncClientTest(testtools.TestCase):
+
+    def setUp(self):
+        super(AsyncClientTest, self).setUp()
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def _client(self, *replies, **kwargs):
+        self.transport = FakeTransport(replies)
+        kwargs.setdefault('retry_policy', retry.RetryPolicy(
+            backoff_base=0.01, jitter=False))
+        return async_client.AsyncClient(transport=self.transport,
+                                        loop=self.loop,
+                                        endpoint_url=test_cli20.ENDURL,
+                                        token=test_cli20.TOKEN, **kwargs)
+
+    def _run(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+    def _drain(self, iterator):
+        items = []
+        aiter = iterator.__aiter__()
+        while True:
+            try:
+                items.append(self._run(aiter.__anext__()))
+            except async_client._StopAsyncIteration:
+                return items
+
+    def test_show(self):
+        neutron = self._client((200, {'port': {'id': 'p1'}}))
+        res = self._run(neutron.show_port('p1', fields='id'))
+        self.assertEqual({'port': {'id': 'p1'}}, res)
+        self.assertEqual([('GET', '/v2.0/ports/p1.json?fields=id', None)],
+                         self.transport.requests)
+
+    def test_create_update_delete(self):
+        neutron = self._client((201, {'network': {'id': 'n1'}}),
+                               (200, {'network': {'id': 'n1'}}),
+                               (204, None))
+        body = {'network': {'name': 'net'}}
+        self.assertEqual({'network': {'id': 'n1'}},
+                         self._run(neutron.create_network(body)))
+        self._run(neutron.update_network('n1', body))
+        self.assertIsNone(self._run(neutron.delete_network('n1')))
+        self.assertEqual(
+            [('POST', '/v2.0/networks.json', json.dumps(body)),
+             ('PUT', '/v2.0/networks/n1.json', json.dumps(body)),
+             ('DELETE', '/v2.0/networks/n1.json', None)],
+            self.transport.requests)
+
+    def test_error_response(self):
+        neutron = self._client(
+            (404, {'NeutronError': {'type': 'PortNotFound',
+                                    'message': 'Port p1 not found',
+                                    'detail': ''}}))
+        e = self.assertRaises(exceptions.NeutronClientException,
+                              self._run, neutron.show_port('p1'))
+        self.assertEqual(404, e.status_code)
+
+    def test_retry_connection_failed(self):
+        neutron = self._client(exceptions.ConnectionFailed(reason='down'),
+                               (200, {'ports': []}), retries=1)
+        self.assertEqual({'ports': []},
+                         self._run(neutron.list_ports()))
+        self.assertEqual(2, len(self.transport.requests))
+
+    def test_retry_unavailable_server(self):
+        neutron = self._client((503, None, {'Retry-After': '0'}),
+                               (429, None),
+                               (200, {'ports': []}), retries=2)
+        self.assertEqual({'ports': []},
+                         self._run(neutron.list_ports()))
+        self.assertEqual(3, len(self.transport.requests))
+
+    def test_post_not_retried(self):
+        neutron = self._client(exceptions.ConnectionFailed(reason='down'),
+                               (201, {'port': {'id': 'p1'}}), retries=2)
+        self.assertRaises(exceptions.ConnectionFailed, self._run,
+                          neutron.create_port({'port': {}}))
+        self.assertEqual(['POST'], [r[0] for r in self.transport.requests])
+
+    def test_post_retried_when_allowed(self):
+        neutron = self._client(
+            exceptions.ConnectionFailed(reason='down'),
+            (201, {'port': {'id': 'p1'}}), retries=2,
+            retry_policy=retry.RetryPolicy(backoff_base=0.01,
+                                           retry_methods=['POST']))
+        self._run(neutron.create_port({'port': {}}))
+        self.assertEqual(['POST', 'POST'],
+                         [r[0] for r in self.transport.requests])
+
+    def test_connection_failed_without_raise_errors(self):
+        neutron = self._client(exceptions.ConnectionFailed(reason='down'),
+                               raise_errors=False)
+        self.assertRaises(exceptions.ConnectionFailed,
+                          self._run, neutron.show_port('p1'))
+
+    def _pages(self):
+        next_link = test_cli20.end_url('/ports', 'marker=p2&limit=2')
+        return ((200, {'ports': [{'id': 'p1'}, {'id': 'p2'}],
+                       'ports_links': [{'href': next_link, 'rel': 'next'}]}),
+                (200, {'ports': [{'id': 'p3'}]}))
+
+    def test_list_retrieve_all(self):
+        neutron = self._client(*self._pages())
+        res = self._run(neutron.list_ports())
+        self.assertEqual(['p1', 'p2', 'p3'], [p['id'] for p in res['ports']])
+        query = urlparse.urlparse(self.transport.requests[1][1]).query
+        self.assertEqual({'marker': ['p2'], 'limit': ['2']},
+                         urlparse.parse_qs(query))
+
+    def test_list_pages(self):
+        neutron = self._client(*self._pages())
+        pages = self._drain(neutron.list_ports(retrieve_all=False))
+        self.assertEqual([2, 1], [len(page['ports']) for page in pages])
+
+    def test_iterate(self):
+        neutron = self._client(*self._pages())
+        ports = self._drain(neutron.iter_ports())
+        self.assertEqual(['p1', 'p2', 'p3'], [p['id'] for p in ports])
+
+    def _partitions(self):
+        return [{'network_id': 'n1'}, {'network_id': 'n2'}]
+
+    def test_list_partitions(self):
+        neutron = self._client((200, {'ports': [{'id': 'p2'}]}),
+                               (200, {'ports': [{'id': 'p1'}]}))
+        res = self._run(neutron.list_ports(partitions=self._partitions()))
+        self.assertEqual(['p2', 'p1'], [p['id'] for p in res['ports']])
+        self.assertEqual(['/v2.0/ports.json?network_id=n1',
+                          '/v2.0/ports.json?network_id=n2'],
+                         [r[1] for r in self.transport.requests])
+
+    def test_iterate_partitions_sorted(self):
+        neutron = self._client((200, {'ports': [{'id': 'p2'}]}),
+                               (200, {'ports': [{'id': 'p1'},
+                                                {'id': 'p3'}]}))
+        ports = self._drain(neutron.iter_ports(
+            partitions=self._partitions(), concurrency=1, sort_key='id'))
+        self.assertEqual(['p1', 'p2', 'p3'], [p['id'] for p in ports])
+        for request in self.transport.requests:
+            self.assertNotIn('partitions', request[1])
+            self.assertNotIn('concurrency', request[1])
+
+    def test_list_partitions_error(self):
+        neutron = self._client((200, {'ports': []}), (404, None))
+        self.assertRaises(exceptions.NeutronClientException, self._run,
+                          neutron.list_ports(partitions=self._partitions()))
+
+    def test_rate_limiter(self):
+        clock = test_retry.FakeClock()
+        limiter = ratelimit.RateLimiter(max_rps=1, max_concurrency=1,
+                                        timer=clock, sleep=clock.sleep)
+        neutron = self._client(*[(200, {'port': {'id': 'p%d' % i}})
+                                 for i in range(3)], rate_limiter=limiter)
+        self._run(asyncio.gather(*[neutron.show_port('p%d' % i)
+                                   for i in range(3)]))
+        self.assertEqual([1.0, 1.0], clock.sleeps)
+        stats = limiter.stats()['read']
+        self.assertEqual(3, stats['requests'])
+        self.assertEqual(1, stats['max_in_flight'])
+        self.assertEqual(0, stats['in_flight'])
+
+    def test_create_bulk(self):
+        created = {'subnets': [{'id': 's1'}, {'id': 's2'}]}
+        neutron = self._client((201, created), (400, None))
+        subnets = [{'cidr': '10.0.%d.0/24' % i} for i in range(3)]
+        res = self._run(neutron.create_subnets_bulk(subnets, batch_size=2))
+        self.assertEqual(['s1', 's2'], [s['id'] for s in res[:2]])
+        self.assertEqual(400, res[2].status_code)
+        self.assertEqual(['POST', 'POST'],
+                         [r[0] for r in self.transport.requests])
+
+    def test_bulk_delete(self):
+        neutron = self._client((204, None), (404, None), (204, None))
+        res = self._run(neutron.bulk_delete('port', ['p1', 'p2', 'p3'],
+                                            concurrency=2))
+        self.assertEqual(['p1', 'p2', 'p3'],
+                         [r['id'] for r in res['results']])
+        self.assertEqual(2, res['succeeded'])
+        self.assertEqual(404, res['results'][1]['error'].status_code)
+        self.assertEqual(['DELETE'] * 3,
+                         [r[0] for r in self.transport.requests])
+
+    def test_xml_not_supported(self):
+        neutron = self._client()
+        self.assertRaises(exceptions.NeutronClientException,
+                          self._run, neutron.show_port('p1', format='xml'))
+        self.assertEqual([], self.transport.requests)
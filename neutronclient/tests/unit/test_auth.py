@@ -14,7 +14,9 @@
 #    under the License.
 #
 
+import datetime
 import json
+import threading
 import uuid
 
 import httpretty
@@ -502,6 +504,100 @@ class CLITestAuthKeystoneWithIdandName(CLITestAuthKeystone):
                                         region_name=REGION)
 
 
+class FakeTimer(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CLITestAuthTokenRefresh(testtools.TestCase):
+
+    LIFETIME = 3600
+
+    def setUp(self):
+        super(CLITestAuthTokenRefresh, self).setUp()
+        self.now = datetime.datetime(2014, 10, 1, 12, 0, 0)
+        self.timer = FakeTimer(1412164800)  # self.now as a timestamp
+        self.tokens_issued = 0
+        self.requests = []
+        self.keystone_gate = None
+        self.keystone_called = threading.Event()
+        self.client = client.HTTPClient(username=USERNAME,
+                                        tenant_name=TENANT_NAME,
+                                        password=PASSWORD,
+                                        auth_url=AUTH_URL,
+                                        region_name=REGION,
+                                        timer=self.timer)
+        self.client.request = self._request
+
+    def _request(self, url, method, body=None, headers=None, **kwargs):
+        if url == AUTH_URL + '/tokens':
+            self.keystone_called.set()
+            if self.keystone_gate is not None:
+                self.keystone_gate.wait()
+            self.tokens_issued += 1
+            token = ks_v2_fixture.Token(
+                token_id='token%d' % self.tokens_issued,
+                expires=self.now + datetime.timedelta(
+                    seconds=self.LIFETIME * self.tokens_issued))
+            token.add_service('network').add_endpoint(ENDPOINT_URL,
+                                                      region=REGION)
+            return get_response(200), json.dumps(token)
+        self.requests.append(headers['X-Auth-Token'])
+        return get_response(200), ''
+
+    def test_expiry_tracked(self):
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(self.timer.now + self.LIFETIME,
+                         self.client.auth_token_expires)
+
+    def test_token_renewed_before_expiry(self):
+        self.client.do_request('/resource', 'GET')
+        self.timer.now += self.LIFETIME - 61
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(1, self.tokens_issued)
+        self.timer.now += 2
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(2, self.tokens_issued)
+        self.assertEqual(['token1', 'token1', 'token2'], self.requests)
+
+    def test_given_token_not_renewed(self):
+        self.client.password = None
+        self.client.auth_token = TOKEN
+        self.client.endpoint_url = ENDPOINT_URL
+        self.client.auth_token_expires = self.timer.now
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(0, self.tokens_issued)
+        self.assertEqual([TOKEN], self.requests)
+
+    def test_background_renewal_does_not_block(self):
+        self.client.background_token_refresh = True
+        self.client.do_request('/resource', 'GET')
+        self.keystone_gate = threading.Event()
+        self.keystone_called.clear()
+        self.timer.now += self.LIFETIME - 30
+        self.client.do_request('/resource', 'GET')
+        # The renewal is now waiting for Keystone
+        self.keystone_called.wait()
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(['token1', 'token1', 'token1'], self.requests)
+        self.keystone_gate.set()
+        self.client._refresh_thread.join()
+        self.client.do_request('/resource', 'GET')
+        self.assertEqual(2, self.tokens_issued)
+        self.assertEqual('token2', self.requests[-1])
+
+    def test_background_renewal_of_expired_token_is_synchronous(self):
+        self.client.background_token_refresh = True
+        self.client.do_request('/resource', 'GET')
+        self.timer.now += self.LIFETIME
+        self.client.do_request('/resource', 'GET')
+        self.assertIsNone(self.client._refresh_thread)
+        self.assertEqual(['token1', 'token2'], self.requests)
+
+
 class TestKeystoneClientVersions(testtools.TestCase):
 
     def setUp(self):
@@ -558,3 +654,78 @@ class TestKeystoneClientVersions(testtools.TestCase):
 
         self.mox.ReplayAll()
         self.client.do_request('/resource', 'GET')
+
+
+class SessionClientEndpointTest(testtools.TestCase):
+
+    def setUp(self):
+        super(SessionClientEndpointTest, self).setUp()
+        httpretty.enable()
+        self.addCleanup(httpretty.disable)
+        self.addCleanup(httpretty.reset)
+        auth_session, self.auth_plugin = setup_keystone_v2()
+        self.lookups = 0
+        get_endpoint = self.auth_plugin.get_endpoint
+
+        def _get_endpoint(*args, **kwargs):
+            self.lookups += 1
+            return get_endpoint(*args, **kwargs)
+        self.auth_plugin.get_endpoint = _get_endpoint
+
+        # The Neutron requests sent by the session are answered here, the
+        # Keystone ones by httpretty.
+        self.urls = []
+        send = auth_session.session.request
+
+        def _send(method, url, **kwargs):
+            if not url.startswith(PUBLIC_ENDPOINT_URL):
+                return send(method, url, **kwargs)
+            self.urls.append(url)
+            resp = requests.Response()
+            resp.status_code = 200
+            resp._content = b'{}'
+            resp.url = url
+            return resp
+        auth_session.session.request = _send
+
+        self.client = client.construct_http_client(
+            session=auth_session, auth=self.auth_plugin,
+            endpoint_type='publicURL', service_type='network',
+            region_name=REGION)
+
+    def _requests(self, count, fetch_endpoint=True):
+        for i in range(count):
+            if fetch_endpoint:
+                self.client.authenticate_and_fetch_endpoint_url()
+            self.client.do_request('/resource', 'GET')
+
+    def test_endpoint_looked_up_once(self):
+        self._requests(100)
+        self.assertEqual(1, self.lookups)
+        self.assertEqual(PUBLIC_ENDPOINT_URL, self.client.endpoint_url)
+        self.assertEqual(['%s/resource' % PUBLIC_ENDPOINT_URL] * 100,
+                         self.urls)
+
+    def test_session_requests_without_endpoint_lookup(self):
+        self.client.authenticate_and_fetch_endpoint_url()
+        self._requests(100, fetch_endpoint=False)
+        self.assertEqual(1, self.lookups)
+        self.assertEqual(100, len(self.urls))
+
+    def test_endpoint_filter_without_endpoint(self):
+        self._requests(2, fetch_endpoint=False)
+        self.assertEqual(2, self.lookups)
+        self.assertEqual(['%s/resource' % PUBLIC_ENDPOINT_URL] * 2,
+                         self.urls)
+
+    def test_endpoint_looked_up_after_authentication(self):
+        self._requests(10)
+        self.auth_plugin.invalidate()
+        self._requests(10)
+        self.assertEqual(2, self.lookups)
+
+    def test_endpoint_looked_up_when_parameters_change(self):
+        self._requests(10)
+        self.client.interface = 'adminURL'
+        self._requests(10)
+        self.assertEqual(2, self.lookups)
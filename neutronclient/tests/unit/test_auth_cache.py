@@ -0,0 +1,268 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import datetime
+import json
+import os
+import stat
+
+import fixtures
+import httpretty
+from keystoneclient.auth.identity import v2 as ks_v2_auth
+from keystoneclient.fixture import v2 as ks_v2_fixture
+from keystoneclient.fixture import v3 as ks_v3_fixture
+from keystoneclient import session
+import six
+import testtools
+
+from neutronclient import client
+from neutronclient.common import auth_cache
+from neutronclient.common import clientmanager
+from neutronclient.neutron import client as neutron_client
+from neutronclient import shell
+from neutronclient.tests.unit import test_auth as auth
+
+NEUTRON_URL = 'http://neutron.example.com:9696'
+NETWORKS_URL = NEUTRON_URL + '/v2.0/networks.json'
+
+
+def _v2_token(expires=None):
+    token = ks_v2_fixture.Token(token_id=auth.TOKENID, expires=expires)
+    token.set_scope()
+    service = token.add_service('network')
+    service.add_endpoint(NEUTRON_URL, region=auth.REGION)
+    return token
+
+
+def _keystone_requests():
+    return [r for r in httpretty.HTTPretty.latest_requests
+            if r.headers.get('host', '').startswith('keystone.')]
+
+
+@testtools.skipIf(auth_cache.fernet is None,
+                  'the authentication cache requires cryptography')
+class AuthCacheTest(testtools.TestCase):
+
+    def setUp(self):
+        super(AuthCacheTest, self).setUp()
+        self.directory = self.useFixture(fixtures.TempDir()).path
+
+    def _cache(self, password=auth.PASSWORD, **identity):
+        identity.setdefault('auth_url', auth.V2_URL)
+        identity.setdefault('username', auth.USERNAME)
+        return auth_cache.AuthCache(self.directory, password, **identity)
+
+    def test_values_persist_across_instances(self):
+        self._cache().set(auth_versions=[auth.V2_URL, None])
+        self.assertEqual([auth.V2_URL, None],
+                         self._cache().get('auth_versions'))
+
+    def test_entry_is_encrypted_and_private(self):
+        self.directory = os.path.join(self.directory, 'cache')
+        cache = self._cache()
+        cache.set(secret='tokentokentoken')
+        with open(cache.path) as f:
+            self.assertNotIn('tokentokentoken', f.read())
+        self.assertEqual(stat.S_IRWXU,
+                         stat.S_IMODE(os.stat(self.directory).st_mode))
+        self.assertEqual(stat.S_IRUSR | stat.S_IWUSR,
+                         stat.S_IMODE(os.stat(cache.path).st_mode))
+
+    def test_loose_directory_is_restricted(self):
+        os.chmod(self.directory, 0o755)
+        self._cache().set(value=1)
+        self.assertEqual(stat.S_IRWXU,
+                         stat.S_IMODE(os.stat(self.directory).st_mode))
+
+    def test_entries_are_per_identity(self):
+        self._cache().set(value=1)
+        self.assertIsNone(self._cache(username='other').get('value'))
+        self.assertIsNone(self._cache(region_name='R2').get('value'))
+
+    def test_wrong_password_misses(self):
+        self._cache().set(value=1)
+        self.assertIsNone(self._cache(password='wrong').get('value'))
+
+    def test_tampered_entry_misses(self):
+        cache = self._cache()
+        cache.set(value=1)
+        with open(cache.path) as f:
+            envelope = json.load(f)
+        envelope['data'] = envelope['data'][:-8] + 'AAAAAAAA'
+        with open(cache.path, 'w') as f:
+            json.dump(envelope, f)
+        self.assertIsNone(self._cache().get('value'))
+
+    def test_other_format_misses(self):
+        cache = self._cache()
+        cache.set(value=1)
+        with open(cache.path, 'w') as f:
+            json.dump({'version': 2, 'entry': {'value': 1}}, f)
+        self.assertIsNone(self._cache().get('value'))
+
+    def test_disabled_without_password(self):
+        cache = self._cache(password=None)
+        cache.set(value=1)
+        self.assertFalse(cache.enabled)
+        self.assertFalse(os.path.exists(cache.path))
+        self.assertIsNone(cache.get('value'))
+
+    def test_disabled_without_cryptography(self):
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.common.auth_cache.fernet', None))
+        cache = self._cache()
+        cache.set(value=1)
+        self.assertFalse(cache.enabled)
+        self.assertFalse(os.path.exists(cache.path))
+
+    def test_clear(self):
+        cache = self._cache()
+        cache.set(value=1)
+        cache.clear()
+        self.assertFalse(os.path.exists(cache.path))
+        self.assertIsNone(self._cache().get('value'))
+
+    def _access(self, token):
+        return client.access.AccessInfo.factory(
+            body=json.loads(json.dumps(token)))
+
+    def test_access_round_trip(self):
+        self._cache().set_access(self._access(_v2_token()), NEUTRON_URL)
+        auth_ref, endpoint_url = self._cache().get_access()
+        self.assertEqual(auth.TOKENID, auth_ref.auth_token)
+        self.assertEqual(NEUTRON_URL, endpoint_url)
+        self.assertEqual(NEUTRON_URL, auth_ref.service_catalog.url_for(
+            service_type='network', endpoint_type='publicURL'))
+
+    def test_v3_access_round_trip(self):
+        token = ks_v3_fixture.Token()
+        token.set_project_scope()
+        token.add_service('network').add_standard_endpoints(
+            public=NEUTRON_URL, region=auth.REGION)
+        auth_ref = client.access.AccessInfoV3(auth.TOKENID,
+                                              **token['token'])
+        self._cache().set_access(auth_ref, NEUTRON_URL)
+        auth_ref = self._cache().get_access()[0]
+        self.assertEqual('v3', auth_ref.version)
+        self.assertEqual(auth.TOKENID, auth_ref.auth_token)
+
+    def test_token_expiring_soon_is_not_used(self):
+        expires = (datetime.datetime.utcnow() +
+                   datetime.timedelta(seconds=auth_cache.EXPIRY_MARGIN - 10))
+        self._cache().set_access(self._access(_v2_token(expires)),
+                                 NEUTRON_URL)
+        self.assertEqual((None, None), self._cache().get_access())
+
+
+@testtools.skipIf(auth_cache.fernet is None,
+                  'the authentication cache requires cryptography')
+class AuthCacheKeystoneTest(testtools.TestCase):
+    """The clients and the shell only ask Keystone on a cache miss."""
+
+    def setUp(self):
+        super(AuthCacheKeystoneTest, self).setUp()
+        self.directory = self.useFixture(fixtures.TempDir()).path
+        httpretty.enable()
+        self.addCleanup(httpretty.disable)
+        self.addCleanup(httpretty.reset)
+        httpretty.register_uri(httpretty.GET, auth.BASE_URL,
+                               body=auth.V3_VERSION_LIST)
+        self._register_token(_v2_token())
+        httpretty.register_uri(httpretty.GET, NETWORKS_URL,
+                               body=json.dumps({'networks': []}))
+        httpretty.register_uri(httpretty.GET,
+                               NEUTRON_URL + '/v2.0/subnets.json',
+                               body=json.dumps({'subnets': []}))
+
+    def _register_token(self, token):
+        httpretty.register_uri(httpretty.POST, '%s/tokens' % auth.V2_URL,
+                               body=json.dumps(token))
+
+    def _cache(self):
+        return auth_cache.AuthCache(self.directory, auth.PASSWORD,
+                                    auth_url=auth.V2_URL,
+                                    username=auth.USERNAME)
+
+    def _http_client(self):
+        return client.HTTPClient(username=auth.USERNAME,
+                                 tenant_name=auth.TENANT_NAME,
+                                 password=auth.PASSWORD,
+                                 auth_url=auth.V2_URL,
+                                 region_name=auth.REGION,
+                                 auth_cache=self._cache())
+
+    def test_http_client_reuses_cached_token(self):
+        self._http_client().do_request('/v2.0/networks.json', 'GET')
+        self.assertEqual(1, len(_keystone_requests()))
+        httpclient = self._http_client()
+        httpclient.do_request('/v2.0/networks.json', 'GET')
+        self.assertEqual(1, len(_keystone_requests()))
+        self.assertEqual(auth.TOKENID, httpclient.auth_token)
+        self.assertEqual(NEUTRON_URL, httpclient.endpoint_url)
+
+    def test_http_client_renews_expiring_token(self):
+        self._register_token(_v2_token(datetime.datetime.utcnow() +
+                                       datetime.timedelta(seconds=60)))
+        self._http_client().do_request('/v2.0/networks.json', 'GET')
+        self._http_client().do_request('/v2.0/networks.json', 'GET')
+        self.assertEqual(2, len(_keystone_requests()))
+
+    def _client_manager(self):
+        auth_session = session.Session()
+        return clientmanager.ClientManager(
+            auth_url=auth.V2_URL, username=auth.USERNAME,
+            password=auth.PASSWORD, region_name=auth.REGION,
+            api_version={'network': '2.0'}, service_type='network',
+            endpoint_type='publicURL', session=auth_session,
+            auth=ks_v2_auth.Password(auth.V2_URL, auth.USERNAME,
+                                     auth.PASSWORD),
+            auth_cache=self._cache())
+
+    def _reset_client_cache(self):
+        # The neutron client handle is cached on the ClientManager class
+        cls = clientmanager.ClientManager
+        self.addCleanup(setattr, cls, 'neutron', cls.__dict__['neutron'])
+        cls.neutron = clientmanager.ClientCache(neutron_client.make_client)
+
+    def test_client_manager_reuses_cached_token(self):
+        self._reset_client_cache()
+        self._client_manager().neutron.list_networks()
+        self.assertEqual(1, len(_keystone_requests()))
+        self._reset_client_cache()
+        manager = self._client_manager()
+        manager.neutron.list_networks()
+        self.assertEqual(1, len(_keystone_requests()))
+        self.assertEqual(NEUTRON_URL, manager._url)
+        self.assertEqual('/v2.0/networks.json',
+                         httpretty.last_request().path)
+
+    def _run_shell(self, *args):
+        argv = ['--os-cache', '--os-cache-dir', self.directory,
+                '--os-username', auth.USERNAME,
+                '--os-password', auth.PASSWORD,
+                '--os-tenant-name', auth.TENANT_NAME,
+                '--os-region-name', auth.REGION,
+                '--os-auth-url', auth.BASE_URL] + list(args)
+        self._reset_client_cache()
+        self.useFixture(fixtures.MonkeyPatch('sys.stdout', six.StringIO()))
+        return shell.NeutronShell(shell.NEUTRON_API_VERSION).run(argv)
+
+    def test_shell_skips_discovery_and_authentication(self):
+        self.assertEqual(0, self._run_shell('net-list'))
+        # Version discovery and token
+        self.assertEqual(2, len(_keystone_requests()))
+        self.assertEqual(0, self._run_shell('net-list'))
+        self.assertEqual(2, len(_keystone_requests()))
@@ -0,0 +1,397 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import json
+import threading
+import time
+
+import testtools
+
+from neutronclient.common import cache
+from neutronclient.openstack.common import strutils
+from neutronclient.tests.unit import test_cli20
+from neutronclient.v2_0 import client
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTest(testtools.TestCase):
+
+    def test_get_set(self):
+        lru = cache.LRUCache()
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual('default', lru.get('a', 'default'))
+        lru.set('a', 1)
+        lru.set('a', 2)
+        self.assertEqual(2, lru.get('a'))
+        self.assertEqual(1, len(lru))
+
+    def test_evicts_least_recently_used(self):
+        lru = cache.LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(1, lru.get('a'))
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(3, lru.get('c'))
+        self.assertEqual(2, len(lru))
+
+    def test_expires(self):
+        timer = FakeTimer()
+        lru = cache.LRUCache(ttl=10, timer=timer)
+        lru.set('a', 1)
+        timer.now += 9
+        self.assertEqual(1, lru.get('a'))
+        timer.now += 1
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(0, len(lru))
+
+    def test_disabled(self):
+        lru = cache.LRUCache(maxsize=0)
+        lru.set('a', 1)
+        self.assertIsNone(lru.get('a'))
+
+    def test_bounded_by_size(self):
+        lru = cache.LRUCache(maxsize=10, getsize=len)
+        lru.set('a', 'xxxx')
+        lru.set('b', 'xxxx')
+        lru.set('c', 'xxxx')
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(8, lru.currsize)
+        lru.set('b', 'x')
+        self.assertEqual(5, lru.currsize)
+        lru.set('d', 'x' * 11)
+        self.assertIsNone(lru.get('d'))
+        self.assertEqual(2, len(lru))
+
+    def test_invalidate(self):
+        lru = cache.LRUCache()
+        lru.set(('ports', 'a'), 1)
+        lru.set(('networks', 'a'), 2)
+        lru.invalidate(lambda key: key[0] == 'ports')
+        self.assertIsNone(lru.get(('ports', 'a')))
+        self.assertEqual(2, lru.get(('networks', 'a')))
+        lru.invalidate()
+        self.assertEqual(0, len(lru))
+
+
+class FakeServer(object):
+    """send function of a ResponseCache, replying with canned responses."""
+
+    def __init__(self):
+        self.requests = []
+        self.replies = []
+
+    def reply(self, status_code, body='', **headers):
+        self.replies.append((test_cli20.MyResp(status_code, headers=headers),
+                             body))
+
+    def __call__(self, url, method, **kwargs):
+        self.requests.append((method, url, kwargs.get('headers', {})))
+        return self.replies.pop(0)
+
+
+class ResponseCacheTest(testtools.TestCase):
+
+    URL = '/v2.0/networks/a.json'
+
+    def setUp(self):
+        super(ResponseCacheTest, self).setUp()
+        self.timer = FakeTimer()
+        self.cache = cache.ResponseCache(ttl=5, timer=self.timer)
+        self.server = FakeServer()
+
+    def _get(self, url=URL, **kwargs):
+        return self.cache.request(self.server, url, 'GET', **kwargs)[1]
+
+    def test_revalidates_etag(self):
+        self.server.reply(200, 'body', ETag='"1"')
+        self.server.reply(304)
+        self.server.reply(200, 'new body', ETag='"2"')
+        self.assertEqual('body', self._get())
+        self.assertEqual('body', self._get())
+        self.assertEqual('new body', self._get())
+        self.assertEqual('"1"', self.server.requests[1][2]['If-None-Match'])
+        self.assertEqual('"1"', self.server.requests[2][2]['If-None-Match'])
+        self.assertEqual({'hits': 0, 'revalidated': 1, 'misses': 2},
+                         self.cache.stats())
+
+    def test_revalidates_last_modified(self):
+        date = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        self.server.reply(200, 'body', **{'Last-Modified': date})
+        self.server.reply(304)
+        self._get()
+        self.assertEqual('body', self._get())
+        self.assertEqual(date,
+                         self.server.requests[1][2]['If-Modified-Since'])
+
+    def test_ttl_without_validators(self):
+        self.server.reply(200, 'body')
+        self.server.reply(200, 'new body')
+        self._get()
+        self.timer.now += 4
+        self.assertEqual('body', self._get())
+        self.assertEqual(1, len(self.server.requests))
+        self.timer.now += 1
+        self.assertEqual('new body', self._get())
+        self.assertNotIn('If-None-Match', self.server.requests[1][2])
+
+    def test_not_cached(self):
+        self.server.reply(404, 'not found')
+        self.server.reply(200, 'body', **{'Cache-Control': 'no-store'})
+        self.server.reply(200, 'body')
+        self.server.reply(200, 'body')
+        self._get()
+        self._get()
+        self._get()
+        self._get(stream=True)
+        self.assertEqual(4, len(self.server.requests))
+
+    def test_formats_cached_separately(self):
+        self.server.reply(200, 'json')
+        self.server.reply(200, 'xml')
+        self.assertEqual('json', self._get(content_type='application/json'))
+        self.assertEqual('xml', self._get(content_type='application/xml'))
+        self.assertEqual('json', self._get(content_type='application/json'))
+
+    def test_writes_invalidate_related_responses(self):
+        for url in ('/v2.0/networks/a.json', '/v2.0/networks/b.json',
+                    '/v2.0/networks.json?name=net', '/v2.0/ports.json'):
+            self.server.reply(200, url)
+            self._get(url)
+        self.server.reply(204)
+        self.cache.request(self.server, '/v2.0/networks/a.xml', 'DELETE')
+        for url in ('/v2.0/networks/a.json', '/v2.0/networks/b.json',
+                    '/v2.0/networks.json?name=net', '/v2.0/ports.json'):
+            self.server.reply(200, url)
+            self._get(url)
+        refreshed = [url for method, url, headers in self.server.requests[5:]]
+        self.assertEqual(['/v2.0/networks/a.json',
+                          '/v2.0/networks.json?name=net'], refreshed)
+
+    def test_bounded_by_memory(self):
+        self.cache = cache.ResponseCache(max_bytes=3000, timer=self.timer)
+        for url in ('/a.json', '/b.json', '/c.json'):
+            self.server.reply(200, 'x' * 1000)
+            self._get(url)
+        self.server.reply(200, 'x' * 1000)
+        self._get('/c.json')
+        self._get('/a.json')
+        self.assertEqual(4, len(self.server.requests))
+
+
+class ClientResponseCacheTest(testtools.TestCase):
+
+    def test_show_revalidated(self):
+        neutron = client.Client(token=test_cli20.TOKEN,
+                                endpoint_url=test_cli20.ENDURL,
+                                response_cache=cache.ResponseCache())
+        requests = []
+        reply = json.dumps({'network': {'id': 'a', 'name': 'net'}})
+
+        def _request(url, method, body=None, headers=None):
+            headers = dict((strutils.safe_decode(k), strutils.safe_decode(v))
+                           for k, v in headers.items())
+            requests.append((strutils.safe_decode(method), headers))
+            if headers.get('If-None-Match') == '"1"':
+                return test_cli20.MyResp(304), ''
+            return test_cli20.MyResp(200, headers={'ETag': '"1"'}), reply
+        neutron.httpclient.request = _request
+
+        for i in range(3):
+            network = neutron.show_network('a')
+        self.assertEqual({'network': {'id': 'a', 'name': 'net'}}, network)
+        self.assertEqual(3, len(requests))
+        self.assertEqual(2, neutron.httpclient.response_cache.stats()[
+            'revalidated'])
+        neutron.update_network('a', {'network': {'name': 'net'}})
+        neutron.show_network('a')
+        self.assertNotIn('If-None-Match', requests[-1][1])
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+
+
+class SingleFlightTest(testtools.TestCase):
+
+    def setUp(self):
+        super(SingleFlightTest, self).setUp()
+        self.flight = cache.SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _call(self, value):
+        self.calls.append(value)
+        self.release.wait()
+        if isinstance(value, Exception):
+            raise value
+        return {'value': [value]}
+
+    def _run(self, keys_values):
+        results = [None] * len(keys_values)
+
+        def _target(i, key, value):
+            try:
+                results[i] = self.flight.do(key, self._call, value)
+            except Exception as e:
+                results[i] = e
+        threads = [threading.Thread(target=_target, args=(i, key, value))
+                   for i, (key, value) in enumerate(keys_values)]
+        for thread in threads:
+            thread.start()
+        calls = len(set(key for key, value in keys_values))
+        _wait_for(lambda: sum(self.flight.stats().values()) ==
+                  len(keys_values))
+        _wait_for(lambda: len(self.calls) == calls)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_coalesced(self):
+        results = self._run([('a', 1)] * 8 + [('b', 2)] * 4)
+        self.assertEqual([{'value': [1]}] * 8 + [{'value': [2]}] * 4,
+                         results)
+        self.assertEqual(2, len(self.calls))
+        self.assertEqual({'calls': 2, 'coalesced': 10}, self.flight.stats())
+        # Every caller can change its own result
+        results[0]['value'].append(0)
+        self.assertEqual([{'value': [1]}] * 7, results[1:8])
+
+    def test_error_shared(self):
+        error = ValueError('failed')
+        results = self._run([('a', error)] * 4)
+        self.assertEqual([error] * 4, results)
+        self.assertEqual(1, len(self.calls))
+
+    def test_forgotten_calls_not_coalesced(self):
+        results = []
+        first = threading.Thread(
+            target=lambda: results.append(self.flight.do('a', self._call, 1)))
+        first.start()
+        _wait_for(lambda: len(self.calls) == 1)
+        self.flight.forget(lambda key: key == 'a')
+        second = threading.Thread(
+            target=lambda: results.append(self.flight.do('a', self._call, 2)))
+        second.start()
+        _wait_for(lambda: len(self.calls) == 2)
+        self.release.set()
+        first.join()
+        second.join()
+        self.assertEqual([{'value': [1]}, {'value': [2]}],
+                         sorted(results, key=lambda r: r['value']))
+        self.assertEqual({'calls': 2, 'coalesced': 0}, self.flight.stats())
+
+    def test_sequential_calls_not_coalesced(self):
+        self.release.set()
+        self.flight.do('a', self._call, 1)
+        self.flight.do('a', self._call, 1)
+        self.assertEqual({'calls': 2, 'coalesced': 0}, self.flight.stats())
+
+
+class ClientSingleFlightTest(testtools.TestCase):
+
+    THREADS = 16
+
+    def _client(self, **kwargs):
+        neutron = client.Client(token=test_cli20.TOKEN,
+                                endpoint_url=test_cli20.ENDURL, **kwargs)
+        self.requests = []
+        self.release = threading.Event()
+        lock = threading.Lock()
+
+        def _request(url, method, body=None, headers=None):
+            method = strutils.safe_decode(method)
+            with lock:
+                self.requests.append(strutils.safe_decode(url))
+            if method != 'GET':
+                return test_cli20.MyResp(204), ''
+            self.release.wait()
+            return test_cli20.MyResp(200), json.dumps(
+                {'networks': [{'id': 'a', 'router:external': True}]})
+        neutron.httpclient.request = _request
+        return neutron
+
+    def _list_concurrently(self, neutron, expected_requests):
+        results = []
+
+        def _list():
+            results.append(neutron.list_networks(
+                **{'router:external': True}))
+        threads = [threading.Thread(target=_list)
+                   for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        if neutron.single_flight:
+            _wait_for(lambda: neutron.single_flight.stats()['coalesced'] ==
+                      self.THREADS - 1)
+        _wait_for(lambda: len(self.requests) == expected_requests)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_lists_sent_once(self):
+        neutron = self._client(coalesce_requests=True)
+        results = self._list_concurrently(neutron, 1)
+        self.assertEqual(1, len(self.requests))
+        self.assertEqual([{'networks': [{'id': 'a',
+                                         'router:external': True}]}] *
+                         self.THREADS, results)
+        self.assertEqual({'calls': 1, 'coalesced': self.THREADS - 1},
+                         neutron.single_flight.stats())
+
+    def test_coalescing_disabled_by_default(self):
+        neutron = self._client()
+        self.assertIsNone(neutron.single_flight)
+        self._list_concurrently(neutron, self.THREADS)
+        self.assertEqual(self.THREADS, len(self.requests))
+
+    def test_read_after_write_not_coalesced(self):
+        neutron = self._client(coalesce_requests=True)
+        before = threading.Thread(target=neutron.list_networks)
+        before.start()
+        _wait_for(lambda: len(self.requests) == 1)
+        neutron.delete_network('a')
+        # A GET following the write is sent again, whereas the one sent
+        # before may have been answered before the network was deleted.
+        after = threading.Thread(target=neutron.list_networks)
+        after.start()
+        _wait_for(lambda: len(self.requests) == 3)
+        self.release.set()
+        before.join()
+        after.join()
+        self.assertEqual(3, len(self.requests))
+        self.assertEqual({'calls': 2, 'coalesced': 0},
+                         neutron.single_flight.stats())
+
+    def test_different_requests_not_coalesced(self):
+        neutron = self._client(coalesce_requests=True)
+        self.release.set()
+        neutron.show_network('a')
+        neutron.show_network('a', fields='id')
+        neutron.show_network('b')
+        self.assertEqual(3, len(self.requests))
@@ -17,6 +17,8 @@
 import contextlib
 import itertools
 import sys
+import threading
+import time
 import urllib
 
 import fixtures
@@ -26,9 +28,12 @@ import requests
 import six
 import six.moves.urllib.parse as urlparse
 
+from neutronclient.common import cache
 from neutronclient.common import constants
 from neutronclient.common import exceptions
+from neutronclient.common import serializer
 from neutronclient.neutron import v2_0 as neutronV2_0
+from neutronclient.openstack.common import strutils
 from neutronclient import shell
 from neutronclient.v2_0 import client
 
@@ -64,6 +69,14 @@ class FakeStdout:
         return result
 
 
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
 class MyResp(object):
     def __init__(self, status_code, headers=None, reason=None):
         self.status_code = status_code
@@ -71,6 +84,25 @@ class MyResp(object):
         self.reason = reason
 
 
+class MyStreamResp(MyResp):
+    def __init__(self, status_code, body, chunk_size=7, fail_at=None):
+        super(MyStreamResp, self).__init__(status_code)
+        self.body = body.encode('utf-8')
+        self.chunk_size = chunk_size
+        self.fail_at = fail_at
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), self.chunk_size):
+            if self.fail_at is not None and i >= self.fail_at:
+                raise requests.exceptions.ChunkedEncodingError(
+                    'Connection broken: IncompleteRead')
+            yield self.body[i:i + self.chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
 class MyApp(object):
     def __init__(self, _stdout):
         self.stdout = _stdout
@@ -81,6 +113,15 @@ def end_url(path, query=None, format=FORMAT):
     return query and _url_str + "?" + query or _url_str
 
 
+def default_list_fields(cmd, cmd_resources, args=()):
+    """Fields a list command retrieves when --fields is not given."""
+    args = list(args)
+    if '--' in args:
+        args = args[:args.index('--')]
+    parser = cmd.get_parser("list_" + cmd_resources)
+    return cmd.displayed_fields(parser.parse_known_args(args)[0]) or []
+
+
 class MyUrlComparator(mox.Comparator):
     def __init__(self, lhs, client):
         self.lhs = lhs
@@ -174,6 +215,10 @@ class CLITestV20Base(base.BaseTestCase):
                          cmd_resource=None, parent_id=None):
         return name_or_id
 
+    def _find_resourceids(self, client, resource, names_or_ids,
+                          cmd_resource=None, parent_id=None):
+        return list(names_or_ids)
+
     def _get_attr_metadata(self):
         return self.metadata
         client.Client.EXTED_PLURALS.update(constants.PLURALS)
@@ -202,6 +247,9 @@ class CLITestV20Base(base.BaseTestCase):
         self.useFixture(fixtures.MonkeyPatch(
             'neutronclient.neutron.v2_0.find_resourceid_by_id',
             self._find_resourceid))
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.neutron.v2_0.find_resourceids_by_names_or_ids',
+            self._find_resourceids))
         self.useFixture(fixtures.MonkeyPatch(
             'neutronclient.v2_0.client.Client.get_attr_metadata',
             self._get_attr_metadata))
@@ -287,8 +335,11 @@ class CLITestV20Base(base.BaseTestCase):
         path = getattr(self.client, cmd_resources + "_path")
         if parent_id:
             path = path % parent_id
+        query = '&'.join('fields=%s' % field for field in
+                         default_list_fields(cmd, cmd_resources, args))
         self.client.httpclient.request(
-            end_url(path, format=self.format), 'GET',
+            MyUrlComparator(end_url(path, query, format=self.format),
+                            self.client), 'GET',
             body=None,
             headers=mox.ContainsKeyValue(
                 'X-Auth-Token', TOKEN)).AndReturn((MyResp(200), resstr))
@@ -347,6 +398,8 @@ class CLITestV20Base(base.BaseTestCase):
                 args.append(field)
         if detail:
             query = query and query + '&verbose=True' or 'verbose=True'
+        if not (fields_1 or fields_2):
+            fields_1 = default_list_fields(cmd, cmd_resources, args)
         for field in itertools.chain(fields_1, fields_2):
             if query:
                 query += "&fields=" + field
@@ -412,6 +465,8 @@ class CLITestV20Base(base.BaseTestCase):
         if parent_id:
             path = path % parent_id
         fake_query = "marker=myid2&limit=2"
+        query = '&'.join('fields=%s' % field for field in
+                         default_list_fields(cmd, cmd_resources))
         reses1 = {resources: [{'id': 'myid1', },
                               {'id': 'myid2', }],
                   '%s_links' % resources: [{'href': end_url(path, fake_query),
@@ -422,7 +477,8 @@ class CLITestV20Base(base.BaseTestCase):
         resstr1 = self.client.serialize(reses1)
         resstr2 = self.client.serialize(reses2)
         self.client.httpclient.request(
-            end_url(path, "", format=self.format), 'GET',
+            MyUrlComparator(end_url(path, query, format=self.format),
+                            self.client), 'GET',
             body=None,
             headers=mox.ContainsKeyValue(
                 'X-Auth-Token', TOKEN)).AndReturn((MyResp(200), resstr1))
@@ -617,11 +673,479 @@ class ClientV2TestJson(CLITestV20Base):
         self.mox.VerifyAll()
         self.mox.UnsetStubs()
 
+    def _mock_paginated_ports(self, pages, fail_at=None):
+        self.client.format = self.format
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        path = self.client.ports_path
+        query = ""
+        for i, page in enumerate(pages):
+            reses = {'ports': page}
+            next_query = "marker=%s&limit=2" % page[-1]['id']
+            if i < len(pages) - 1:
+                reses['ports_links'] = [{'href': end_url(path, next_query),
+                                         'rel': 'next'}]
+            expected = self.client.httpclient.request(
+                MyUrlComparator(end_url(path, query, format=self.format),
+                                self.client), 'GET',
+                body=None,
+                headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN))
+            if i == fail_at:
+                expected.AndReturn((MyResp(500), ''))
+            else:
+                expected.AndReturn((MyResp(200),
+                                    self.client.serialize(reses)))
+            query = next_query
+        self.mox.ReplayAll()
+
+    def test_list_pagination_prefetch(self):
+        pages = [[{'id': 'myid%d' % (i * 2 + j)} for j in range(2)]
+                 for i in range(3)]
+        self._mock_paginated_ports(pages)
+        res = self.client.list_ports(prefetch=2)
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        self.assertEqual([p['id'] for page in pages for p in page],
+                         [p['id'] for p in res['ports']])
+
+    def test_list_pagination_prefetch_format(self):
+        # The pages fetched by the worker thread are in the format of the
+        # call, not in the default one of the client.
+        self.client.format = self.format
+        _format = 'xml' if self.format == 'json' else 'json'
+        path = self.client.ports_path
+        urls = []
+
+        def _request(url, method, body=None, headers=None):
+            url = strutils.safe_decode(url)
+            urls.append(url)
+            query = urlparse.parse_qs(urlparse.urlparse(url).query)
+            marker = int(query.get('marker', ['-1'])[0])
+            res = {'ports': [{'id': '%d' % (marker + 1)}]}
+            if marker < 2:
+                res['ports_links'] = [{
+                    'rel': 'next',
+                    'href': end_url(path, 'marker=%d' % (marker + 1))}]
+            data = serializer.Serializer(
+                self.client.get_attr_metadata()).serialize(
+                    res, self.client.content_type(_format))
+            return MyResp(200), data
+
+        self.client.httpclient.request = _request
+        res = self.client.list_ports(prefetch=2, format=_format)
+        self.assertEqual(['0', '1', '2', '3'],
+                         [port['id'] for port in res['ports']])
+        for url in urls:
+            self.assertIn('%s.%s?' % (path, _format), url)
+
+    def test_list_pagination_prefetch_error(self):
+        pages = [[{'id': 'myid1'}, {'id': 'myid2'}],
+                 [{'id': 'myid3'}, {'id': 'myid4'}]]
+        self._mock_paginated_ports(pages, fail_at=1)
+        gen = self.client.list_ports(retrieve_all=False, prefetch=1)
+        self.assertEqual(pages[0], next(gen)['ports'])
+        self.assertRaises(exceptions.NeutronClientException, next, gen)
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+
+    def test_iter_pagination(self):
+        pages = [[{'id': 'myid1'}, {'id': 'myid2'}],
+                 [{'id': 'myid3'}, {'id': 'myid4'}]]
+        self._mock_paginated_ports(pages)
+        res = self.client.iter_ports()
+        self.assertEqual(['myid1', 'myid2', 'myid3', 'myid4'],
+                         [p['id'] for p in res])
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+
+    def _fake_ports(self, ports):
+        """Answer port listings filtered on id, recording the URLs."""
+        self.client.format = self.format
+        urls = []
+
+        def _request(url, method, body=None, headers=None):
+            url = strutils.safe_decode(url)
+            urls.append(url)
+            query = urlparse.parse_qs(urlparse.urlparse(url).query)
+            found = [port for port in ports if port['id'] in query['id']]
+            return MyResp(200), self.client.serialize({'ports': found})
+
+        self.client.httpclient.request = _request
+        return urls
+
+    def test_list_splits_long_filter(self):
+        ports = [{'id': 'port%03d' % i} for i in range(100)]
+        urls = self._fake_ports(ports)
+        self.client.MAX_URI_LEN = 256
+        res = self.client.list_ports(id=[port['id'] for port in ports],
+                                     fields=['id'])
+        self.assertEqual(ports, res['ports'])
+        # No request was rejected for its length, each one fills the URI
+        self.assertEqual(5, len(urls))
+        for url in urls:
+            self.assertIn('.%s?' % self.format, url)
+            self.assertTrue(len(url) <= 256)
+            self.assertTrue(len(url) > 256 - len('&id=port000'))
+
+    def test_list_short_filter_not_split(self):
+        ports = [{'id': 'port%03d' % i} for i in range(100)]
+        urls = self._fake_ports(ports)
+        res = self.client.list_ports(id=[port['id'] for port in ports])
+        self.assertEqual(ports, res['ports'])
+        self.assertEqual(1, len(urls))
+
+    def test_list_fields_not_split(self):
+        self._fake_ports([])
+        self.client.MAX_URI_LEN = 256
+        self.assertRaises(exceptions.RequestURITooLong,
+                          self.client.list_ports, id=['port1', 'port2'],
+                          fields=['field%03d' % i for i in range(100)])
+
+    def _fake_partitioned_ports(self, ports, wait_for=0):
+        """Answer sorted and paginated port listings filtered on network.
+
+        The first requests wait for ``wait_for`` of them to be in flight.
+        """
+        self.client.format = self.format
+        urls = []
+        arrived = threading.Condition()
+
+        def _request(url, method, body=None, headers=None):
+            url = strutils.safe_decode(url)
+            query = urlparse.parse_qs(urlparse.urlparse(url).query)
+            with arrived:
+                urls.append(url)
+                arrived.notify_all()
+                deadline = time.time() + 10
+                while len(urls) < wait_for and time.time() < deadline:
+                    arrived.wait(0.1)
+            found = [port for port in ports
+                     if port['network_id'] in query['network_id']]
+            keys = query.get('sort_key', [])
+            dirs = query.get('sort_dir', []) + ['asc'] * len(keys)
+            for key, direction in reversed(list(zip(keys, dirs))):
+                found.sort(key=lambda port: port[key],
+                           reverse=direction == 'desc')
+            if 'marker' in query:
+                marker = [port['id'] for port in found].index(
+                    query['marker'][0])
+                found = found[marker + 1:]
+            res = {'ports': found}
+            if 'limit' in query:
+                limit = int(query['limit'][0])
+                res['ports'] = found[:limit]
+                if len(found) > limit:
+                    query['marker'] = [res['ports'][-1]['id']]
+                    href = '%s?%s' % (self.client.ports_path,
+                                      urlparse.urlencode(query, True))
+                    res['ports_links'] = [{'rel': 'next', 'href': href}]
+            return MyResp(200), self.client.serialize(res)
+
+        self.client.httpclient.request = _request
+        return urls
+
+    def _partitioned_ports(self):
+        return [{'id': 'port%02d' % i, 'network_id': 'net%d' % (i % 3),
+                 'name': 'name%d' % (i % 4)} for i in range(12)]
+
+    def test_list_partitions_in_parallel(self):
+        ports = self._partitioned_ports()
+        urls = self._fake_partitioned_ports(ports, wait_for=3)
+        started = time.time()
+        res = self.client.list_ports(
+            partitions=[{'network_id': 'net%d' % i} for i in range(3)],
+            limit=2)
+        # The listings of the partitions did not wait for each other
+        self.assertTrue(time.time() - started < 10)
+        self.assertEqual(3 * 2, len(urls))
+        self.assertEqual(sorted(ports, key=lambda port: port['network_id']),
+                         res['ports'])
+
+    def test_list_partitions_concurrency(self):
+        ports = self._partitioned_ports()
+        urls = self._fake_partitioned_ports(ports)
+        res = self.client.list_ports(
+            partitions=[{'network_id': 'net%d' % i} for i in range(3)],
+            concurrency=1)
+        # One listing at a time: the partitions are listed in order
+        self.assertEqual(['net0', 'net1', 'net2'],
+                         [urlparse.parse_qs(urlparse.urlparse(url).query)
+                          ['network_id'][0] for url in urls])
+        self.assertEqual(12, len(res['ports']))
+
+    def test_list_partitions_sorted_merge(self):
+        ports = self._partitioned_ports()
+        self._fake_partitioned_ports(ports)
+        res = self.client.list_ports(
+            partitions=[{'network_id': 'net%d' % i} for i in range(3)],
+            sort_key=['name', 'id'], sort_dir=['asc', 'desc'], limit=3)
+        expected = sorted(ports, key=lambda port: port['id'], reverse=True)
+        expected.sort(key=lambda port: port['name'])
+        self.assertEqual(expected, res['ports'])
+
+    def test_iterate_partitions(self):
+        ports = self._partitioned_ports()
+        self._fake_partitioned_ports(ports)
+        res = self.client.iter_ports(
+            partitions=[{'network_id': 'net2'}, {'network_id': 'net0'}],
+            sort_key='id')
+        self.assertEqual(['port00', 'port02', 'port03', 'port05', 'port06',
+                          'port08', 'port09', 'port11'],
+                         [port['id'] for port in res])
+
+    def test_list_no_partitions(self):
+        urls = self._fake_partitioned_ports(self._partitioned_ports())
+        self.assertEqual({'ports': []},
+                         self.client.list_ports(partitions=[]))
+        self.assertEqual([], urls)
+
+    def _mock_streamed_ports(self):
+        if self.format != 'json':
+            self.skipTest('incremental decoding only applies to JSON')
+        pages = [[{'id': 'myid1'}, {'id': 'myid2'}],
+                 [{'id': 'myid3'}, {'id': 'myid4'}],
+                 [{'id': 'myid5'}]]
+        self.client.incremental_decode = True
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        path = self.client.ports_path
+        query = ""
+        resps = []
+        for i, page in enumerate(pages):
+            reses = {'ports': page}
+            next_query = "marker=%s&limit=2" % page[-1]['id']
+            if i < len(pages) - 1:
+                reses['ports_links'] = [{'href': end_url(path, next_query),
+                                         'rel': 'next'}]
+            resp = MyStreamResp(200, self.client.serialize(reses))
+            resps.append(resp)
+            self.client.httpclient.request(
+                MyUrlComparator(end_url(path, query), self.client), 'GET',
+                body=None, stream=True,
+                headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN)
+            ).AndReturn((resp, None))
+            query = next_query
+        self.mox.ReplayAll()
+        return resps
+
+    def test_list_pagination_incremental_decode(self):
+        resps = self._mock_streamed_ports()
+        res = self.client.list_ports()
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        self.assertEqual(['myid%d' % i for i in range(1, 6)],
+                         [p['id'] for p in res['ports']])
+        self.assertTrue(all(resp.closed for resp in resps))
+
+    def test_list_pages_incremental_decode_not_drained(self):
+        resps = self._mock_streamed_ports()
+        pages = self.client.list_ports(retrieve_all=False)
+        first = next(pages)
+        self.assertEqual('myid1', next(first['ports'])['id'])
+        # The pages are collected before their resources are read
+        pages = [first] + list(pages)
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        self.assertEqual(3, len(pages))
+        self.assertEqual(['myid2'], [p['id'] for p in pages[0]['ports']])
+        self.assertEqual(['myid%d' % i for i in range(3, 6)],
+                         [p['id'] for page in pages[1:]
+                          for p in page['ports']])
+        self.assertTrue(all(resp.closed for resp in resps))
+
+    def test_list_incremental_decode_connection_broken(self):
+        if self.format != 'json':
+            self.skipTest('incremental decoding only applies to JSON')
+        self.client.incremental_decode = True
+        body = self.client.serialize({'ports': [{'id': 'myid1'},
+                                                {'id': 'myid2'}]})
+        resp = MyStreamResp(200, body, fail_at=body.index('myid2'))
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self.client.httpclient.request(
+            MyUrlComparator(end_url(self.client.ports_path), self.client),
+            'GET', body=None, stream=True,
+            headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN)
+        ).AndReturn((resp, None))
+        self.mox.ReplayAll()
+        page = next(self.client.list_ports(retrieve_all=False))
+        self.assertEqual('myid1', next(page['ports'])['id'])
+        self.assertRaises(exceptions.ConnectionFailed, list, page['ports'])
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        self.assertTrue(resp.closed)
+
+    def test_create_ports_bulk(self):
+        self.client.format = self.format
+        ports = [{'network_id': 'net', 'name': 'port%d' % i}
+                 for i in range(5)]
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        for i, batch in enumerate((ports[:2], ports[2:4], ports[4:])):
+            body = {'ports': batch}
+            expected = self.client.httpclient.request(
+                end_url(self.client.ports_path, format=self.format), 'POST',
+                body=MyComparator(body, self.client),
+                headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN))
+            if i == 1:
+                expected.AndReturn((MyResp(409), ''))
+            else:
+                created = [dict(port, id=port['name']) for port in batch]
+                expected.AndReturn((MyResp(201), self.client.serialize(
+                    {'ports': created})))
+        self.mox.ReplayAll()
+        res = self.client.create_ports_bulk(ports, batch_size=2)
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        self.assertEqual(5, len(res))
+        self.assertEqual(['port0', 'port1'], [p['id'] for p in res[:2]])
+        self.assertEqual(409, res[2].status_code)
+        self.assertIs(res[2], res[3])
+        self.assertEqual('port4', res[4]['id'])
+
+    def test_bulk_update(self):
+        self.client.format = self.format
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        updates = [('myid1', {'name': 'a'}), ('myid2', {'name': 'b'})]
+        for i, (myid, attributes) in enumerate(updates):
+            expected = self.client.httpclient.request(
+                end_url(self.client.network_path % myid, format=self.format),
+                'PUT', body=MyComparator({'network': attributes}, self.client),
+                headers=mox.ContainsKeyValue('X-Auth-Token', TOKEN))
+            if i:
+                expected.AndReturn((MyResp(500), ''))
+            else:
+                expected.AndReturn((MyResp(200), self.client.serialize(
+                    {'network': dict(attributes, id=myid)})))
+        self.mox.ReplayAll()
+        res = self.client.bulk_update('network', updates)
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        self.assertEqual(1, res['succeeded'])
+        self.assertEqual(1, res['failed'])
+        self.assertEqual(['myid1', 'myid2'],
+                         [r['id'] for r in res['results']])
+        self.assertEqual('a', res['results'][0]['result']['network']['name'])
+        self.assertIsNone(res['results'][0]['error'])
+        self.assertEqual(500, res['results'][1]['error'].status_code)
+        self.assertTrue(res['elapsed'] >= 0)
+
 
 class ClientV2UnicodeTestXML(ClientV2TestJson):
     format = 'xml'
 
 
+class ClientV2ExtensionMetadataTest(base.BaseTestCase):
+
+    def setUp(self):
+        super(ClientV2ExtensionMetadataTest, self).setUp()
+        self.client = client.Client(token=TOKEN, endpoint_url=ENDURL)
+        self.client.format = 'xml'
+        self.extension_hits = 0
+        metadata = {'plurals': dict(constants.PLURALS),
+                    'xmlns': constants.XML_NS_V20,
+                    constants.EXT_NS: {}}
+        port_body = serializer.Serializer(metadata).serialize(
+            {'port': {'id': 'myid'}}, 'application/xml')
+        extensions_body = serializer.Serializer().serialize(
+            {'extensions': [{'alias': 'ext', 'namespace': 'http://ext'}]},
+            'application/json')
+
+        def _request(url, method, body=None, headers=None):
+            if url.endswith('/extensions.json'):
+                self.extension_hits += 1
+                return MyResp(200), extensions_body
+            return MyResp(200), port_body
+
+        self.client.httpclient.request = _request
+
+    def test_extensions_listed_once(self):
+        plurals = dict(client.Client.EXTED_PLURALS)
+        for i in range(1000):
+            port = self.client.show_port('myid')
+            self.client.serialize(port)
+        self.assertEqual({'port': {'id': 'myid'}}, port)
+        self.assertEqual(1, self.extension_hits)
+        self.assertEqual(plurals, client.Client.EXTED_PLURALS)
+
+    def test_extensions_expire_and_refresh(self):
+        timer = FakeTimer()
+        self.client.extension_cache = cache.LRUCache(ttl=10, timer=timer)
+        self.client.show_port('myid')
+        timer.now += 5
+        self.client.show_port('myid')
+        self.assertEqual(1, self.extension_hits)
+        timer.now += 5
+        self.client.show_port('myid')
+        self.assertEqual(2, self.extension_hits)
+        metadata = self.client.refresh_extension_metadata()
+        self.assertEqual(3, self.extension_hits)
+        self.assertEqual({'ext': 'http://ext'}, metadata[constants.EXT_NS])
+
+    def test_serializer_rebuilt_only_on_metadata_change(self):
+        self.client.show_port('myid')
+        xml_serializer = self.client._get_serializer()
+        self.client.show_port('myid')
+        self.assertIs(xml_serializer, self.client._get_serializer())
+        self.client.refresh_extension_metadata()
+        self.assertIs(xml_serializer, self.client._get_serializer())
+        self.client.extension_cache.set(
+            ENDURL, {'plurals': {}, constants.EXT_NS: {'other': 'http://o'}})
+        self.assertIsNot(xml_serializer, self.client._get_serializer())
+        self.client.format = 'json'
+        json_serializer = self.client._get_serializer()
+        self.assertIs(json_serializer, self.client._get_serializer())
+
+
+class ListJoinsTest(base.BaseTestCase):
+
+    class ListThings(neutronV2_0.ListCommand):
+        resource = 'thing'
+        joins = {
+            'network_id': neutronV2_0.Join(
+                'networks', fields=['name'],
+                convert=lambda _id, net: net and net['name'] or _id),
+            'subnets': neutronV2_0.Join('subnets', fields=['cidr']),
+            'first_subnet': neutronV2_0.Join('subnets', fields=['name'],
+                                             key='subnet_id'),
+        }
+
+    def test_join_related(self):
+        related = {'networks': [{'id': 'n1', 'name': 'net1'}],
+                   'subnets': [{'id': 's1', 'cidr': '10.0.0.0/24',
+                                'name': 'sub1'}]}
+        calls = []
+
+        def _lister(collection):
+            def _list(**params):
+                calls.append((collection, params))
+                return {collection: related[collection]}
+            return _list
+
+        class FakeClient(object):
+            list_networks = staticmethod(_lister('networks'))
+            list_subnets = staticmethod(_lister('subnets'))
+
+        cmd = self.ListThings(MyApp(sys.stdout), None)
+        cmd.get_client = FakeClient
+        data = [{'network_id': 'n1', 'subnets': ['s1', 's2'],
+                 'subnet_id': 's1'},
+                {'network_id': 'n2', 'subnets': [], 'subnet_id': None},
+                {'network_id': 'n1'}]
+        parsed_args = cmd.get_parser('list_things').parse_args([])
+        cmd.extend_list(data, parsed_args)
+
+        self.assertEqual(
+            [{'network_id': 'net1', 'subnet_id': 's1',
+              'subnets': [related['subnets'][0], {'id': 's2'}],
+              'first_subnet': related['subnets'][0]},
+             {'network_id': 'n2', 'subnets': [], 'subnet_id': None},
+             {'network_id': 'net1'}], data)
+        # One listing per collection, of the distinct ids and of the
+        # fields of all its joins
+        self.assertEqual(
+            [('networks', {'id': ['n1', 'n2'], 'fields': ['id', 'name']}),
+             ('subnets', {'id': ['s1', 's2'],
+                          'fields': ['id', 'name', 'cidr']})],
+            sorted(calls))
+
+
 class CLITestV20ExceptionHandler(CLITestV20Base):
 
     def _test_exception_handler_v20(
@@ -115,7 +115,7 @@ class CLITestV20NetworkJSON(test_cli20.CLITestV20Base):
         reses = {resources: []}
         resstr = self.client.serialize(reses)
         # url method body
-        query = "id=myfakeid"
+        query = "fields=id&id=myfakeid"
         args = ['-c', 'id', '--', '--id', 'myfakeid']
         path = getattr(self.client, resources + "_path")
         self.client.httpclient.request(
@@ -216,7 +216,8 @@ class CLITestV20NetworkJSON(test_cli20.CLITestV20Base):
         self.mox.StubOutWithMock(cmd, 'get_client')
         self.mox.StubOutWithMock(self.client.httpclient, 'request')
         cmd.get_client().AndReturn(self.client)
-        setup_list_stub('networks', data, '')
+        setup_list_stub('networks', data,
+                        'fields=id&fields=name&fields=subnets')
         cmd.get_client().AndReturn(self.client)
         filters = ''
         for n in data:
@@ -313,7 +314,7 @@ class CLITestV20NetworkJSON(test_cli20.CLITestV20Base):
         reses = {resources: []}
         resstr = self.client.serialize(reses)
         # url method body
-        query = "router%3Aexternal=True&id=myfakeid"
+        query = "fields=id&router%3Aexternal=True&id=myfakeid"
         args = ['-c', 'id', '--', '--id', 'myfakeid']
         path = getattr(self.client, resources + "_path")
         self.client.httpclient.request(
@@ -364,6 +365,8 @@ class CLITestV20NetworkJSON(test_cli20.CLITestV20Base):
             args.append("--fields")
             for field in fields_2:
                 args.append(field)
+        if not (fields_1 or fields_2):
+            fields_1 = test_cli20.default_list_fields(cmd, resources, args)
         for field in itertools.chain(fields_1, fields_2):
             if query:
                 query += "&fields=" + field
@@ -519,13 +522,12 @@ class CLITestV20NetworkJSON(test_cli20.CLITestV20Base):
             filters, response = self._build_test_data(data)
 
             # 1 char of extra URI len will cause a split in 2 requests
-            self.mox.StubOutWithMock(self.client, "_check_uri_length")
-            self.client._check_uri_length(mox.IgnoreArg()).AndRaise(
-                exceptions.RequestURITooLong(excess=1))
+            uri = test_cli20.end_url(path, 'fields=id&fields=cidr' + filters)
+            self.client.MAX_URI_LEN = len(uri) - 1
+            self.client.LIST_CONCURRENCY = 1
 
             for data in sub_data_lists:
                 filters, response = self._build_test_data(data)
-                self.client._check_uri_length(mox.IgnoreArg()).AndReturn(None)
                 self.client.httpclient.request(
                     test_cli20.MyUrlComparator(
                         test_cli20.end_url(
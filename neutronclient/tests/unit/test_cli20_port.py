@@ -16,10 +16,15 @@
 
 import itertools
 import sys
+import threading
 
+import fixtures
 from mox3 import mox
+import six.moves.urllib.parse as urlparse
 
+from neutronclient.common import exceptions
 from neutronclient.neutron.v2_0 import port
+from neutronclient.openstack.common import strutils
 from neutronclient import shell
 from neutronclient.tests.unit import test_cli20
 
@@ -192,6 +197,89 @@ class CLITestV20PortJSON(test_cli20.CLITestV20Base):
         cmd = port.ListPort(test_cli20.MyApp(sys.stdout), None)
         self._test_list_resources_with_pagination(resources, cmd)
 
+    def test_list_ports_streaming(self):
+        cmd = port.ListPort(test_cli20.MyApp(sys.stdout), None)
+        self.mox.StubOutWithMock(cmd, "get_client")
+        self.mox.StubOutWithMock(self.client, "iter_ports")
+        cmd.get_client().MultipleTimes().AndReturn(self.client)
+        ports = iter([{'id': 'myid1', 'name': 'name1'},
+                      {'id': 'myid2', 'name': 'name2'}])
+        self.client.iter_ports(
+            fields=['id', 'name', 'mac_address', 'fixed_ips']).AndReturn(ports)
+        self.mox.ReplayAll()
+        cmd_parser = cmd.get_parser('list_ports')
+        parsed_args = cmd_parser.parse_args(['--request-format', self.format])
+        columns, rows = cmd.get_data(parsed_args)
+        self.assertEqual(['id', 'name'], columns)
+        self.assertFalse(isinstance(rows, list))
+        self.assertEqual([('myid1', 'name1'), ('myid2', 'name2')],
+                         list(rows))
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+
+    def _list_ports_bytes(self, cmd, args=()):
+        """List ports from a fake server, return the output and bytes."""
+        if self.format != 'json':
+            self.skipTest('the binding attributes have no XML namespace')
+        ports = [{'id': 'port%04d' % i,
+                  'name': 'port-%d' % i,
+                  'mac_address': 'fa:16:3e:00:%02x:%02x' % (i // 256,
+                                                            i % 256),
+                  'fixed_ips': [{'subnet_id': 'subnet1',
+                                 'ip_address': '10.0.%d.%d' % (i // 256,
+                                                               i % 256)}],
+                  'network_id': 'net1', 'tenant_id': 'tenant1',
+                  'device_id': 'device%d' % i,
+                  'device_owner': 'compute:nova', 'status': 'ACTIVE',
+                  'admin_state_up': True, 'security_groups': ['sg1'],
+                  'binding:host_id': 'compute%d' % (i % 16),
+                  'binding:vif_type': 'ovs',
+                  'binding:vif_details': {'port_filter': True,
+                                          'ovs_hybrid_plug': True},
+                  'binding:profile': {'pci_slot': '0000:0a:00.%d' % (i % 8),
+                                      'physical_network': 'physnet1'},
+                  'allowed_address_pairs': [],
+                  'extra_dhcp_opts': []}
+                 for i in range(500)]
+        sent = []
+
+        def _request(url, method, body=None, headers=None):
+            url = strutils.safe_decode(url)
+            query = urlparse.parse_qs(urlparse.urlparse(url).query)
+            fields = query.get('fields')
+            found = [dict((k, v) for k, v in port.items()
+                          if not fields or k in fields)
+                     for port in ports]
+            reply = self.client.serialize({'ports': found})
+            sent.append(len(reply))
+            return test_cli20.MyResp(200), reply
+
+        self.client.format = self.format
+        self.client.httpclient.request = _request
+        cmd.get_client = lambda: self.client
+        cmd_parser = cmd.get_parser('list_ports')
+        parsed_args = cmd_parser.parse_args(
+            ['--request-format', self.format] + list(args))
+        columns, rows = cmd.get_data(parsed_args)
+        return (columns, list(rows)), sum(sent)
+
+    def test_list_ports_fields_pushdown(self):
+        cmd = port.ListPort(test_cli20.MyApp(sys.stdout), None)
+        output, pushed_bytes = self._list_ports_bytes(cmd)
+        cmd.displayed_fields = lambda parsed_args: None
+        full_output, full_bytes = self._list_ports_bytes(cmd)
+        self.assertEqual(full_output, output)
+        # Bindings, security groups and the like are no longer sent
+        self.assertTrue(pushed_bytes * 3 < full_bytes,
+                        '%d bytes instead of %d' % (pushed_bytes, full_bytes))
+
+    def test_list_ports_fields_pushdown_columns(self):
+        cmd = port.ListPort(test_cli20.MyApp(sys.stdout), None)
+        output, pushed_bytes = self._list_ports_bytes(
+            cmd, ['-c', 'id', '-c', 'binding:host_id'])
+        self.assertEqual(['id', 'binding:host_id'], output[0])
+        self.assertEqual(('port0001', 'compute1'), output[1][1])
+
     def test_list_ports_sort(self):
         """list ports: --sort-key name --sort-key id --sort-key asc
         --sort-key desc
@@ -258,6 +346,8 @@ class CLITestV20PortJSON(test_cli20.CLITestV20Base):
             args.append("--fields")
             for field in fields_2:
                 args.append(field)
+        if not (fields_1 or fields_2):
+            fields_1 = test_cli20.default_list_fields(cmd, resources, args)
         for field in itertools.chain(fields_1, fields_2):
             if query:
                 query += "&fields=" + field
@@ -414,6 +504,107 @@ class CLITestV20PortJSON(test_cli20.CLITestV20Base):
         args = [myid]
         self._test_delete_resource(resource, cmd, myid, args)
 
+    def _test_delete_ports_bulk(self, args, failing=(), ids=None):
+        cmd = port.DeletePort(test_cli20.MyApp(sys.stdout), None)
+        self.mox.StubOutWithMock(cmd, "get_client")
+        cmd.get_client().MultipleTimes().AndReturn(self.client)
+        self.mox.ReplayAll()
+        # mox is not thread safe, the requests are recorded under a lock
+        lock = threading.Lock()
+        requests = []
+
+        def _request(url, method, body=None, headers=None):
+            with lock:
+                requests.append((url, method))
+            myid = url.split('/')[-1].split('.')[0]
+            return test_cli20.MyResp(404 if myid in failing else 204), None
+
+        self.client.httpclient.request = _request
+        cmd_parser = cmd.get_parser('delete_port')
+        if ids is None:
+            ids = args
+        args = args + ['--concurrency', '3',
+                       '--request-format', self.format]
+        if failing:
+            e = self.assertRaises(exceptions.NeutronClientException,
+                                  shell.run_command, cmd, cmd_parser, args)
+            for myid in failing:
+                self.assertIn(myid, e.message)
+        else:
+            shell.run_command(cmd, cmd_parser, args)
+        self.mox.VerifyAll()
+        self.mox.UnsetStubs()
+        self.assertEqual(
+            sorted((test_cli20.end_url(self.client.port_path % myid,
+                                       format=self.format), 'DELETE')
+                   for myid in ids),
+            sorted(requests))
+        return self.fake_stdout.make_string()
+
+    def test_delete_ports_bulk(self):
+        """Delete port: myid1 myid2 myid3 myid4 --concurrency 3."""
+        ids = ['myid1', 'myid2', 'myid3', 'myid4']
+        output = self._test_delete_ports_bulk(ids)
+        for myid in ids:
+            self.assertIn('Deleted port: %s' % myid, output)
+
+    def test_delete_ports_bulk_failure(self):
+        """Delete port: myid1 myid2 myid3 with a failure on myid2."""
+        ids = ['myid1', 'myid2', 'myid3']
+        output = self._test_delete_ports_bulk(ids, ['myid2'])
+        self.assertIn('Deleted port: myid1', output)
+        self.assertIn('Deleted port: myid3', output)
+        self.assertNotIn('myid2', output)
+
+    def test_delete_ports_bulk_resolved_at_once(self):
+        """Delete port: name1 name2 name3, resolved in a single lookup."""
+        lookups = []
+
+        def _find_resourceids(client, resource, names_or_ids,
+                              cmd_resource=None, parent_id=None):
+            lookups.append(list(names_or_ids))
+            return [name.replace('name', 'myid') for name in names_or_ids]
+
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.neutron.v2_0.find_resourceid_by_name_or_id',
+            None))
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.neutron.v2_0.find_resourceids_by_names_or_ids',
+            _find_resourceids))
+        names = ['name1', 'name2', 'name3']
+        output = self._test_delete_ports_bulk(
+            names, ids=['myid1', 'myid2', 'myid3'])
+        self.assertEqual([names], lookups)
+        for name in names:
+            self.assertIn('Deleted port: %s' % name, output)
+
+    def test_delete_ports_bulk_not_found(self):
+        """Delete port: myid1 myid2 myid3 with myid2 not found."""
+        def _find_resourceid(client, resource, name_or_id,
+                             cmd_resource=None, parent_id=None):
+            if name_or_id == 'myid2':
+                raise exceptions.NeutronClientException(
+                    message='myid2 not found', status_code=404)
+            return name_or_id
+
+        def _find_resourceids(client, resource, names_or_ids,
+                              cmd_resource=None, parent_id=None):
+            return [_find_resourceid(client, resource, name_or_id)
+                    for name_or_id in names_or_ids]
+
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.neutron.v2_0.find_resourceid_by_name_or_id',
+            _find_resourceid))
+        self.useFixture(fixtures.MonkeyPatch(
+            'neutronclient.neutron.v2_0.find_resourceids_by_names_or_ids',
+            _find_resourceids))
+        output = self._test_delete_ports_bulk(
+            ['myid1', 'myid2', 'myid3'], failing=['myid2'],
+            ids=['myid1', 'myid3'])
+        self.assertIn('Deleted port: myid1', output)
+        self.assertIn('Deleted port: myid3', output)
+        self.assertNotIn('myid2', output)
+
 
 class CLITestV20PortXML(CLITestV20PortJSON):
     format = 'xml'
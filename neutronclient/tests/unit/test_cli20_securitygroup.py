@@ -19,7 +19,6 @@ import sys
 from mox3 import mox
 import six
 
-from neutronclient.common import exceptions
 from neutronclient.common import utils
 from neutronclient.neutron.v2_0 import securitygroup
 from neutronclient.tests.unit import test_cli20
@@ -223,12 +222,13 @@ class CLITestV20SecurityGroupsJSON(test_cli20.CLITestV20Base):
                          'remote_group_id': 'remote_group'}
 
         search_opts = {'fields': ['id', 'name']}
-        sec_group_ids = set()
+        # The ids are looked up in the order they are first seen in
+        sec_group_ids = []
         for rule in data:
-            for key in replace_rules:
-                sec_group_ids.add(rule[key])
+            for key in sorted(replace_rules):
+                if rule[key] not in sec_group_ids:
+                    sec_group_ids.append(rule[key])
                 response.append({'id': rule[key], 'name': 'default'})
-        sec_group_ids = list(sec_group_ids)
 
         result = []
 
@@ -265,14 +265,13 @@ class CLITestV20SecurityGroupsJSON(test_cli20.CLITestV20Base):
     def test_extend_list_exceed_max_uri_len(self):
         def mox_calls(path, data):
             # 1 char of extra URI len will cause a split in 2 requests
-            self.mox.StubOutWithMock(self.client, '_check_uri_length')
-            self.client._check_uri_length(mox.IgnoreArg()).AndRaise(
-                exceptions.RequestURITooLong(excess=1))
+            uri = test_cli20.end_url(path,
+                                     self._build_test_data(data)[0]['filter'])
+            self.client.MAX_URI_LEN = len(uri) - 1
+            self.client.LIST_CONCURRENCY = 1
             responses = self._build_test_data(data, excess=1)
 
             for item in responses:
-                self.client._check_uri_length(
-                    mox.IgnoreArg()).AndReturn(None)
                 self.client.httpclient.request(
                     test_cli20.end_url(path, item['filter']),
                     'GET',
@@ -362,16 +361,21 @@ class CLITestV20SecurityGroupsJSON(test_cli20.CLITestV20Base):
         self.mox.StubOutWithMock(cmd, 'get_client')
         self.mox.StubOutWithMock(self.client.httpclient, 'request')
         cmd.get_client().AndReturn(self.client)
-        query = ''
         if query_field:
-            query = '&'.join(['fields=' + f for f in data['cols']])
+            fields = data['cols']
+        else:
+            fields = test_cli20.default_list_fields(
+                cmd, 'security_group_rules', args)
+        query = '&'.join(['fields=' + f for f in fields])
         setup_list_stub('security_group_rules', list_data, query)
         if conv:
             cmd.get_client().AndReturn(self.client)
-            sec_ids = set()
+            sec_ids = []
             for n in data['data']:
-                sec_ids.add(n[1])
-                sec_ids.add(n[2])
+                # remote_group_id, then security_group_id
+                for id in (n[2], n[1]):
+                    if id not in sec_ids:
+                        sec_ids.append(id)
             filters = ''
             for id in sec_ids:
                 filters = filters + "&id=%s" % id
@@ -0,0 +1,180 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import json
+import re
+import threading
+
+from keystoneclient.fixture import v2 as ks_v2_fixture
+import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+import testtools
+
+from neutronclient.common import constants
+from neutronclient.common import serializer
+from neutronclient.v2_0 import client
+
+THREADS = 64
+CALLS = 20
+USERNAME = 'testuser'
+PASSWORD = 'password'
+TENANT_NAME = 'testtenant'
+REGION = 'RegionOne'
+
+_NETWORK_PATH = re.compile(r'^/v2\.0/networks/([^/.]+)\.(json|xml)$')
+
+
+def _network(network_id):
+    return {'network': {'id': network_id, 'name': 'net-%s' % network_id}}
+
+
+class FakeNeutronServer(socketserver.ThreadingMixIn,
+                        BaseHTTPServer.HTTPServer):
+    """Keystone and Neutron on a local port, answering in both formats.
+
+    Once ``revoke_after`` networks have been shown, the current token is
+    rejected until the client authenticates again.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, revoke_after):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           FakeNeutronHandler)
+        self.url = 'http://127.0.0.1:%d' % self.server_address[1]
+        self.revoke_after = revoke_after
+        self.lock = threading.Lock()
+        self.token = None
+        self.tokens_issued = 0
+        self.shown = 0
+        self.errors = []
+        metadata = {'plurals': dict(constants.PLURALS),
+                    'xmlns': constants.XML_NS_V20,
+                    constants.EXT_NS: {}}
+        self.serializer = serializer.Serializer(metadata)
+
+    def issue_token(self):
+        with self.lock:
+            self.tokens_issued += 1
+            self.token = 'token-%d' % self.tokens_issued
+            token = ks_v2_fixture.Token(token_id=self.token,
+                                        tenant_name=TENANT_NAME)
+        token.add_service('network').add_endpoint(self.url, region=REGION)
+        return token
+
+    def check_token(self, token):
+        with self.lock:
+            if token != self.token:
+                return False
+            self.shown += 1
+            if self.shown == self.revoke_after:
+                self.token = None
+            return True
+
+
+class FakeNeutronHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b'', content_type='application/json'):
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_POST(self):
+        self._read_body()
+        if self.path != '/v2.0/tokens':
+            return self._reply(404)
+        self._reply(200, json.dumps(self.server.issue_token()))
+
+    def do_GET(self):
+        if self.path == '/v2.0/extensions.json':
+            return self._reply(200, b'{"extensions": []}')
+        match = _NETWORK_PATH.match(self.path.split('?', 1)[0])
+        if not match:
+            return self._reply(404)
+        network_id, _format = match.groups()
+        content_type = 'application/%s' % _format
+        if self.headers.get('Content-Type') != content_type:
+            self.server.errors.append(
+                '%s sent as %s' % (self.path,
+                                   self.headers.get('Content-Type')))
+            return self._reply(400)
+        if not self.server.check_token(self.headers.get('X-Auth-Token')):
+            return self._reply(401)
+        body = self.server.serializer.serialize(_network(network_id),
+                                                content_type)
+        self._reply(200, body, content_type)
+
+
+class ClientThreadsTest(testtools.TestCase):
+    """A single client shared by many threads."""
+
+    def setUp(self):
+        super(ClientThreadsTest, self).setUp()
+        self.server = FakeNeutronServer(revoke_after=THREADS * CALLS // 2)
+        server_thread = threading.Thread(target=self.server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = client.Client(username=USERNAME,
+                                    password=PASSWORD,
+                                    tenant_name=TENANT_NAME,
+                                    auth_url=self.server.url + '/v2.0',
+                                    region_name=REGION,
+                                    pool_maxsize=THREADS)
+
+    def _show_networks(self, index, failures):
+        try:
+            for call in range(CALLS):
+                network_id = '%d-%d' % (index, call)
+                if (index + call) % 2:
+                    network = self.client.show_network(network_id,
+                                                       format='xml')
+                else:
+                    network = self.client.show_network(network_id)
+                if network != _network(network_id):
+                    failures.append('%s: %r' % (network_id, network))
+        except Exception as e:
+            failures.append(repr(e))
+
+    def test_shared_client(self):
+        failures = []
+        threads = [threading.Thread(target=self._show_networks,
+                                    args=(i, failures))
+                   for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], failures)
+        self.assertEqual([], self.server.errors)
+        self.assertEqual(THREADS * CALLS, self.server.shown)
+        # Authenticated once, and once more when the token got revoked
+        self.assertEqual(2, self.server.tokens_issued)
+        self.assertEqual('json', self.client.format)
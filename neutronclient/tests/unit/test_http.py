@@ -13,9 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 from mox3 import mox
+from six.moves import BaseHTTPServer
 import testtools
 
+from neutronclient.client import construct_http_client
 from neutronclient.client import HTTPClient
 from neutronclient.common import exceptions
 from neutronclient.tests.unit.test_cli20 import MyResp
@@ -82,3 +86,58 @@ class TestHTTPClient(testtools.TestCase):
 
         self.assertEqual(rv_should_be, self.http._cs_request(URL, METHOD))
         self.mox.VerifyAll()
+
+
+class _KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.client_ports.append(self.client_address[1])
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPClientConnectionPool(testtools.TestCase):
+    def setUp(self):
+        super(TestHTTPClientConnectionPool, self).setUp()
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+                                                _KeepAliveHandler)
+        self.server.client_ports = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = 'http://127.0.0.1:%d/v2.0/test' % self.server.server_port
+
+    def _do_requests(self, http, count=3):
+        for i in range(count):
+            resp, body = http.request(self.url, METHOD)
+            self.assertEqual(200, resp.status_code)
+
+    def test_connections_are_reused(self):
+        http = HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL)
+        self._do_requests(http)
+        self.assertEqual(3, len(self.server.client_ports))
+        self.assertEqual(1, len(set(self.server.client_ports)))
+
+    def test_connections_not_reused_without_keep_alive(self):
+        http = HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL,
+                          keep_alive=False)
+        self._do_requests(http)
+        self.assertEqual(3, len(set(self.server.client_ports)))
+
+    def test_pool_settings(self):
+        http = construct_http_client(token=AUTH_TOKEN,
+                                     endpoint_url=END_URL,
+                                     pool_connections=2, pool_maxsize=5)
+        adapter = http.session.get_adapter(self.url)
+        self.assertEqual(2, adapter._pool_connections)
+        self.assertEqual(5, adapter._pool_maxsize)
@@ -14,13 +14,17 @@
 #    under the License.
 #
 
+import sys
 import uuid
 
 from mox3 import mox
+import six.moves.urllib.parse as urlparse
 import testtools
 
 from neutronclient.common import exceptions
 from neutronclient.neutron import v2_0 as neutronV20
+from neutronclient.neutron.v2_0 import port
+from neutronclient import shell
 from neutronclient.tests.unit import test_cli20
 from neutronclient.v2_0 import client
 
@@ -196,3 +200,206 @@ class CLITestNameorID(testtools.TestCase):
         except exceptions.NeutronClientException as ex:
             self.assertIn('Unable to find', ex.message)
             self.assertEqual(404, ex.status_code)
+
+    def _expect_network_id_lookup(self, _id):
+        resstr = self.client.serialize({'networks': [{'id': _id}]})
+        path = getattr(self.client, "networks_path")
+        self.client.httpclient.request(
+            test_cli20.MyUrlComparator(
+                test_cli20.end_url(path, "fields=id&id=" + _id),
+                self.client),
+            'GET',
+            body=None,
+            headers=mox.ContainsKeyValue('X-Auth-Token', test_cli20.TOKEN)
+        ).AndReturn((test_cli20.MyResp(200), resstr))
+
+    def test_get_id_cached(self):
+        _id = str(uuid.uuid4())
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self._expect_network_id_lookup(_id)
+        self.mox.ReplayAll()
+        for i in range(3):
+            returned_id = neutronV20.find_resourceid_by_name_or_id(
+                self.client, 'network', _id)
+            self.assertEqual(_id, returned_id)
+
+    def test_get_id_cache_invalidated_by_delete(self):
+        _id = str(uuid.uuid4())
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self._expect_network_id_lookup(_id)
+        self.client.httpclient.request(
+            test_cli20.end_url(self.client.network_path % _id), 'DELETE',
+            body=None,
+            headers=mox.ContainsKeyValue('X-Auth-Token', test_cli20.TOKEN)
+        ).AndReturn((test_cli20.MyResp(204), None))
+        self._expect_network_id_lookup(_id)
+        self.mox.ReplayAll()
+        neutronV20.find_resourceid_by_name_or_id(self.client, 'network', _id)
+        self.client.delete_network(_id)
+        neutronV20.find_resourceid_by_name_or_id(self.client, 'network', _id)
+
+    def test_get_id_cache_not_invalidated_by_other_collection(self):
+        _id = str(uuid.uuid4())
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self._expect_network_id_lookup(_id)
+        self.client.httpclient.request(
+            test_cli20.end_url(self.client.port_path % _id), 'DELETE',
+            body=None,
+            headers=mox.ContainsKeyValue('X-Auth-Token', test_cli20.TOKEN)
+        ).AndReturn((test_cli20.MyResp(204), None))
+        self.mox.ReplayAll()
+        neutronV20.find_resourceid_by_name_or_id(self.client, 'network', _id)
+        self.client.delete_port(_id)
+        neutronV20.find_resourceid_by_name_or_id(self.client, 'network', _id)
+
+    def test_get_id_trusted_uuid(self):
+        _id = str(uuid.uuid4())
+        self.client.trust_uuids = True
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self.mox.ReplayAll()
+        self.assertEqual(_id, neutronV20.find_resourceid_by_name_or_id(
+            self.client, 'network', _id))
+        self.assertEqual(_id, neutronV20.find_resourceid_by_id(
+            self.client, 'network', _id))
+
+    def test_get_id_trusted_uuids_name(self):
+        name = 'myname'
+        _id = str(uuid.uuid4())
+        self.client.trust_uuids = True
+        resstr = self.client.serialize({'networks': [{'id': _id}]})
+        self.mox.StubOutWithMock(self.client.httpclient, "request")
+        self.client.httpclient.request(
+            test_cli20.MyUrlComparator(
+                test_cli20.end_url(self.client.networks_path,
+                                   "fields=id&name=" + name),
+                self.client),
+            'GET',
+            body=None,
+            headers=mox.ContainsKeyValue('X-Auth-Token', test_cli20.TOKEN)
+        ).AndReturn((test_cli20.MyResp(200), resstr))
+        self.mox.ReplayAll()
+        self.assertEqual(_id, neutronV20.find_resourceid_by_name_or_id(
+            self.client, 'network', name))
+
+    def _run_port_command(self, cmd_class, args, status_code,
+                          resp_body=None):
+        cmd = cmd_class(test_cli20.MyApp(sys.stdout), None)
+        self.mox.StubOutWithMock(cmd, "get_client")
+        cmd.get_client().MultipleTimes().AndReturn(self.client)
+        calls = []
+
+        def _request(url, method, body=None, headers=None):
+            calls.append((url, method))
+            return test_cli20.MyResp(status_code), resp_body
+
+        self.client.httpclient.request = _request
+        self.mox.ReplayAll()
+        shell.run_command(cmd, cmd.get_parser('port'), args)
+        return calls
+
+    def test_update_trusted_uuid_single_request(self):
+        _id = str(uuid.uuid4())
+        self.client.trust_uuids = True
+        calls = self._run_port_command(port.UpdatePort,
+                                       [_id, '--name', 'myname'], 204)
+        self.assertEqual(
+            [(test_cli20.end_url(self.client.port_path % _id), 'PUT')],
+            calls)
+
+    def _not_found_body(self, resource_type, _id):
+        return self.client.serialize(
+            {'NeutronError': {'type': '%sNotFound' % resource_type,
+                              'message': '%s %s could not be found' %
+                                         (resource_type, _id),
+                              'detail': ''}})
+
+    def test_delete_trusted_uuid_not_found(self):
+        _id = str(uuid.uuid4())
+        self.client.trust_uuids = True
+        e = self.assertRaises(exceptions.NeutronClientException,
+                              self._run_port_command, port.DeletePort,
+                              [_id], 404, self._not_found_body('Port', _id))
+        self.assertEqual(404, e.status_code)
+        self.assertEqual("Unable to find port with name '%s'" % _id,
+                         e.message)
+
+    def test_update_trusted_uuid_referenced_not_found(self):
+        _id = str(uuid.uuid4())
+        sg_id = str(uuid.uuid4())
+        self.client.trust_uuids = True
+        e = self.assertRaises(exceptions.NeutronClientException,
+                              self._run_port_command, port.UpdatePort,
+                              [_id, '--security-group', sg_id], 404,
+                              self._not_found_body('SecurityGroup', sg_id))
+        self.assertEqual(404, e.status_code)
+        self.assertEqual('SecurityGroup %s could not be found' % sg_id,
+                         e.message)
+
+    def _fake_networks(self, networks):
+        """Answer network listings filtered on id or name from a list."""
+        calls = []
+
+        def _request(url, method, body=None, headers=None):
+            query = urlparse.parse_qs(urlparse.urlparse(url).query)
+            calls.append(query)
+            found = [net for net in networks
+                     if net['id'] in query.get('id', []) or
+                     net['name'] in query.get('name', [])]
+            return (test_cli20.MyResp(200),
+                    self.client.serialize({'networks': found}))
+
+        self.client.httpclient.request = _request
+        return calls
+
+    def test_get_ids_batched(self):
+        nets = [{'id': str(uuid.uuid4()), 'name': 'net%d' % i}
+                for i in range(3)]
+        calls = self._fake_networks(nets)
+        unknown_uuid_name = str(uuid.uuid4())
+        nets.append({'id': str(uuid.uuid4()), 'name': unknown_uuid_name})
+        args = ['net1', nets[0]['id'], 'net2', unknown_uuid_name, 'net1']
+        ids = neutronV20.find_resourceids_by_names_or_ids(
+            self.client, 'network', args)
+        self.assertEqual([nets[1]['id'], nets[0]['id'], nets[2]['id'],
+                          nets[3]['id'], nets[1]['id']], ids)
+        self.assertEqual(2, len(calls))
+        self.assertEqual(sorted([nets[0]['id'], unknown_uuid_name]),
+                         sorted(calls[0]['id']))
+        self.assertEqual(sorted(['net1', 'net2', unknown_uuid_name]),
+                         sorted(calls[1]['name']))
+        # Everything is cached now
+        neutronV20.find_resourceids_by_names_or_ids(
+            self.client, 'network', args)
+        self.assertEqual(2, len(calls))
+
+    def test_get_ids_batched_chunks(self):
+        nets = [{'id': str(uuid.uuid4()), 'name': 'net%03d' % i}
+                for i in range(50)]
+        calls = self._fake_networks(nets)
+        self.client.MAX_URI_LEN = 100 + self.client._uri_length(
+            self.client.networks_path, {'fields': ['id', 'name']})
+        ids = neutronV20.find_resourceids_by_names_or_ids(
+            self.client, 'network', [net['name'] for net in nets])
+        self.assertEqual([net['id'] for net in nets], ids)
+        # Each "&name=netNNN" takes 12 of the 100 characters left, the
+        # chunks are listed concurrently.
+        self.assertEqual([2] + [8] * 6,
+                         sorted(len(call['name']) for call in calls))
+
+    def test_get_ids_batched_not_unique(self):
+        nets = [{'id': str(uuid.uuid4()), 'name': 'dup'},
+                {'id': str(uuid.uuid4()), 'name': 'dup'},
+                {'id': str(uuid.uuid4()), 'name': 'ok'}]
+        self._fake_networks(nets)
+        self.assertRaises(exceptions.NeutronClientNoUniqueMatch,
+                          neutronV20.find_resourceids_by_names_or_ids,
+                          self.client, 'network', ['ok', 'dup'])
+
+    def test_get_ids_batched_not_found(self):
+        self._fake_networks([{'id': str(uuid.uuid4()), 'name': 'ok'}])
+        e = self.assertRaises(exceptions.NeutronClientException,
+                              neutronV20.find_resourceids_by_names_or_ids,
+                              self.client, 'network', ['ok', 'missing'])
+        self.assertEqual(404, e.status_code)
+        self.assertEqual("Unable to find network with name 'missing'",
+                         e.message)
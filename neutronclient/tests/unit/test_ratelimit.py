@@ -0,0 +1,168 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import json
+import threading
+import time
+
+import testtools
+
+from neutronclient.common import ratelimit
+from neutronclient.openstack.common import strutils
+from neutronclient.tests.unit import test_cli20
+from neutronclient.tests.unit import test_retry
+from neutronclient.v2_0 import client
+
+
+class TokenBucketTest(testtools.TestCase):
+
+    def setUp(self):
+        super(TokenBucketTest, self).setUp()
+        self.clock = test_retry.FakeClock()
+
+    def _bucket(self, rate, burst=None):
+        return ratelimit.TokenBucket(rate, burst=burst, timer=self.clock,
+                                     sleep=self.clock.sleep)
+
+    def test_burst_then_rate(self):
+        bucket = self._bucket(2, burst=3)
+        for i in range(3):
+            self.assertEqual(0, bucket.acquire())
+        self.assertEqual(0.5, bucket.acquire())
+        self.assertEqual(0.5, bucket.acquire())
+        self.assertEqual([0.5, 0.5], self.clock.sleeps)
+
+    def test_refills_while_unused(self):
+        bucket = self._bucket(1, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 10
+        self.assertEqual(0, bucket.acquire())
+        self.assertEqual(0, bucket.acquire())
+        self.assertEqual(1, bucket.acquire())
+
+    def test_concurrent_callers_queue(self):
+        bucket = self._bucket(4)
+        for i in range(4):
+            bucket.reserve()
+        self.assertEqual([0.25, 0.5, 0.75],
+                         [bucket.reserve() for i in range(3)])
+
+    def test_slow_rate(self):
+        bucket = self._bucket(0.5)
+        self.assertEqual(0, bucket.acquire())
+        self.assertEqual(2, bucket.acquire())
+
+
+class RateLimiterTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RateLimiterTest, self).setUp()
+        self.clock = test_retry.FakeClock()
+
+    def _limiter(self, **kwargs):
+        return ratelimit.RateLimiter(timer=self.clock,
+                                     sleep=self.clock.sleep, **kwargs)
+
+    def test_reads_and_writes_limited_separately(self):
+        limiter = self._limiter(max_rps=10, max_write_rps=1)
+        for i in range(10):
+            with limiter.limit('GET'):
+                pass
+        with limiter.limit('POST'):
+            pass
+        with limiter.limit('DELETE'):
+            pass
+        self.assertEqual([1.0], self.clock.sleeps)
+        stats = limiter.stats()
+        self.assertEqual({'requests': 10, 'in_flight': 0,
+                          'max_in_flight': 1, 'throttled': 0,
+                          'throttled_seconds': 0.0}, stats['read'])
+        self.assertEqual({'requests': 2, 'in_flight': 0,
+                          'max_in_flight': 1, 'throttled': 1,
+                          'throttled_seconds': 1.0}, stats['write'])
+
+    def test_no_limit(self):
+        limiter = self._limiter()
+        with limiter.limit('GET'):
+            with limiter.limit('GET'):
+                self.assertEqual(2, limiter.stats()['read']['in_flight'])
+        self.assertEqual(0, limiter.stats()['read']['in_flight'])
+        self.assertEqual([], self.clock.sleeps)
+
+    def test_max_concurrency(self):
+        limiter = ratelimit.RateLimiter(max_concurrency=2)
+        release = threading.Event()
+
+        def _request():
+            with limiter.limit('GET'):
+                release.wait()
+        threads = [threading.Thread(target=_request) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        # Wait for the threads which are not throttled to be in flight
+        deadline = time.time() + 10
+        while (limiter.stats()['read']['in_flight'] < 2 and
+               time.time() < deadline):
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(2, limiter.stats()['read']['in_flight'])
+        release.set()
+        for thread in threads:
+            thread.join()
+        stats = limiter.stats()['read']
+        self.assertEqual(5, stats['requests'])
+        self.assertEqual(2, stats['max_in_flight'])
+        self.assertEqual(3, stats['throttled'])
+        self.assertEqual(0, stats['in_flight'])
+
+    def test_released_on_error(self):
+        limiter = self._limiter(max_concurrency=1)
+
+        def _failing():
+            with limiter.limit('PUT'):
+                raise ValueError()
+        self.assertRaises(ValueError, _failing)
+        self.assertRaises(ValueError, _failing)
+        self.assertEqual(0, limiter.stats()['write']['in_flight'])
+
+
+class ClientRateLimitTest(testtools.TestCase):
+
+    def test_every_request_is_limited(self):
+        clock = test_retry.FakeClock()
+        limiter = ratelimit.RateLimiter(max_rps=2, max_write_rps=1,
+                                        timer=clock, sleep=clock.sleep)
+        neutron = client.Client(token=test_cli20.TOKEN,
+                                endpoint_url=test_cli20.ENDURL,
+                                rate_limiter=limiter)
+
+        def _request(url, method, body=None, headers=None):
+            method = strutils.safe_decode(method)
+            if method == 'GET':
+                return (test_cli20.MyResp(200),
+                        json.dumps({'networks': [{'id': 'id'}]}))
+            return test_cli20.MyResp(201), json.dumps({'network': {}})
+        neutron.httpclient.request = _request
+
+        for i in range(3):
+            neutron.list_networks()
+        neutron.create_network({'network': {}})
+        neutron.create_network({'network': {}})
+        self.assertEqual([0.5, 1.0], clock.sleeps)
+        stats = limiter.stats()
+        self.assertEqual(3, stats['read']['requests'])
+        self.assertEqual(2, stats['write']['requests'])
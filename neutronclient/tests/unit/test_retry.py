@@ -0,0 +1,216 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import email.utils
+import json
+
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import retry
+from neutronclient.openstack.common import strutils
+from neutronclient.tests.unit import test_cli20
+from neutronclient.v2_0 import client
+
+
+class FakeClock(object):
+    """Timer whose sleep only moves the time forward."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _policy(clock, **kwargs):
+    kwargs.setdefault('rand', lambda: 0.5)
+    return retry.RetryPolicy(timer=clock, sleep=clock.sleep, **kwargs)
+
+
+def _unavailable(retry_after=None):
+    error = exceptions.ServiceUnavailable()
+    error.retry_after = retry_after
+    return error
+
+
+class RetryPolicyTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RetryPolicyTest, self).setUp()
+        self.clock = FakeClock()
+
+    def test_exponential_backoff_is_capped(self):
+        policy = _policy(self.clock, backoff_base=0.5, backoff_cap=3,
+                         jitter=False)
+        self.assertEqual([0.5, 1, 2, 3, 3],
+                         [policy.backoff(i) for i in range(5)])
+
+    def test_full_jitter(self):
+        draws = iter([0.0, 0.25, 1.0])
+        policy = _policy(self.clock, backoff_base=4, rand=lambda: next(draws))
+        self.assertEqual([0.0, 2.0, 16.0],
+                         [policy.backoff(i) for i in range(3)])
+
+    def test_retryable_failures(self):
+        policy = _policy(self.clock)
+        down = exceptions.ConnectionFailed(reason='down')
+        self.assertTrue(policy.is_retryable('GET', down))
+        self.assertTrue(policy.is_retryable('delete', _unavailable()))
+        self.assertTrue(policy.is_retryable(
+            'PUT', exceptions.NeutronClientException(status_code=429)))
+        self.assertFalse(policy.is_retryable('POST', down))
+        self.assertFalse(policy.is_retryable('GET', exceptions.NotFound()))
+        policy = _policy(self.clock, retry_methods=['post'],
+                         retry_status_codes=[500])
+        self.assertTrue(policy.is_retryable(
+            'POST', exceptions.NeutronClientException(status_code=500)))
+        self.assertFalse(policy.is_retryable('GET', down))
+
+    def test_retry_after(self):
+        policy = _policy(self.clock, jitter=False)
+        self.assertEqual(7, policy.backoff(0, _unavailable(retry_after=7)))
+        self.assertEqual(1, policy.backoff(0, _unavailable()))
+        policy.respect_retry_after = False
+        self.assertEqual(1, policy.backoff(0, _unavailable(retry_after=7)))
+
+    def test_retry_after_is_capped(self):
+        policy = _policy(self.clock, jitter=False, backoff_cap=30)
+        self.assertEqual(30, policy.backoff(0, _unavailable(86400)))
+        policy.max_retry_after = 120
+        self.assertEqual(120, policy.backoff(0, _unavailable(86400)))
+        self.assertEqual(60, policy.backoff(0, _unavailable(60)))
+
+    def test_deadline(self):
+        policy = _policy(self.clock, jitter=False, deadline=10)
+        started = self.clock()
+        self.assertEqual(8, policy.delay('GET', _unavailable(), 3, started))
+        self.clock.now += 3
+        self.assertIsNone(policy.delay('GET', _unavailable(), 3, started))
+        self.assertIsNone(policy.delay('GET', _unavailable(retry_after=60),
+                                       0, started))
+
+    def test_parse_retry_after(self):
+        self.assertEqual(120, retry.parse_retry_after('120'))
+        self.assertEqual(0, retry.parse_retry_after('-1'))
+        date = email.utils.formatdate(self.clock() + 30, usegmt=True)
+        self.assertEqual(30, retry.parse_retry_after(date, timer=self.clock))
+        self.assertIsNone(retry.parse_retry_after('soon'))
+        self.assertIsNone(retry.parse_retry_after(None))
+
+
+class ClientRetryTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ClientRetryTest, self).setUp()
+        self.clock = FakeClock()
+        self.requests = []
+        self.replies = []
+
+    def _client(self, retries=3, **kwargs):
+        neutron = client.Client(token=test_cli20.TOKEN,
+                                endpoint_url=test_cli20.ENDURL,
+                                retries=retries,
+                                retry_policy=_policy(self.clock, **kwargs))
+
+        def _request(url, method, body=None, headers=None):
+            method = strutils.safe_decode(method)
+            self.requests.append(method)
+            reply = self.replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        neutron.httpclient.request = _request
+        return neutron
+
+    def _reply(self, status_code, data=None, headers=None):
+        self.replies.append((test_cli20.MyResp(status_code, headers=headers),
+                             json.dumps(data) if data else ''))
+
+    def test_retries_unavailable_server(self):
+        neutron = self._client()
+        self._reply(503)
+        self._reply(429)
+        self._reply(200, {'networks': []})
+        self.assertEqual({'networks': []}, neutron.list_networks())
+        self.assertEqual(['GET'] * 3, self.requests)
+        self.assertEqual([0.5, 1.0], self.clock.sleeps)
+
+    def test_gives_up_after_retries(self):
+        neutron = self._client(retries=2)
+        for i in range(3):
+            self._reply(503)
+        error = self.assertRaises(exceptions.NeutronClientException,
+                                  neutron.show_network, 'id')
+        self.assertEqual(503, error.status_code)
+        self.assertEqual(3, len(self.requests))
+
+    def test_honours_retry_after(self):
+        neutron = self._client()
+        self._reply(503, headers={'Retry-After': '12'})
+        self._reply(204)
+        neutron.delete_network('id')
+        self.assertEqual([12], self.clock.sleeps)
+
+    def test_deadline(self):
+        neutron = self._client(retries=10, jitter=False, deadline=10)
+        for i in range(5):
+            self._reply(503)
+        error = self.assertRaises(exceptions.NeutronClientException,
+                                  neutron.show_network, 'id')
+        self.assertEqual(503, error.status_code)
+        # Waiting for 8 more seconds would exceed the deadline
+        self.assertEqual([1, 2, 4], self.clock.sleeps)
+
+    def test_retry_interval_is_backoff_base(self):
+        neutron = self._client(jitter=False)
+        neutron.retry_interval = 0.25
+        self.assertEqual(0.25, neutron.retry_policy.backoff_base)
+        self._reply(503)
+        self._reply(503)
+        self._reply(204)
+        neutron.delete_network('id')
+        self.assertEqual([0.25, 0.5], self.clock.sleeps)
+
+    def test_post_not_retried(self):
+        neutron = self._client()
+        self._reply(503)
+        error = self.assertRaises(exceptions.NeutronClientException,
+                                  neutron.create_network, {'network': {}})
+        self.assertEqual(503, error.status_code)
+        self.assertEqual(['POST'], self.requests)
+
+    def test_post_retried_when_allowed(self):
+        neutron = self._client(retry_methods=['POST'])
+        self._reply(503)
+        self._reply(201, {'network': {'id': 'id'}})
+        neutron.create_network({'network': {}})
+        self.assertEqual(['POST', 'POST'], self.requests)
+
+    def test_connection_failures(self):
+        neutron = self._client(retries=1)
+        neutron.raise_errors = False
+        down = exceptions.ConnectionFailed(reason='down')
+        self.replies = [down, down]
+        error = self.assertRaises(exceptions.ConnectionFailed,
+                                  neutron.list_networks)
+        self.assertIn('after 2 attempts', str(error))
+        self.assertEqual([0.5], self.clock.sleeps)
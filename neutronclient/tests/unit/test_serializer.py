@@ -0,0 +1,77 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import json
+
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import serializer
+
+
+def _chunks(body, size):
+    body = body.encode('utf-8')
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class JSONCollectionDeserializerTest(testtools.TestCase):
+
+    def _decode(self, body, size, collection='ports'):
+        extra = {}
+        deserializer = serializer.JSONCollectionDeserializer(
+            _chunks(body, size), collection, extra)
+        return list(deserializer), extra
+
+    def test_decode_any_chunk_size(self):
+        doc = {'ports': [{'id': 'id%d' % i, 'mtu': 1500 + i,
+                          'name': u'p\xf6rt "%d"' % i,
+                          'fixed_ips': [{'subnet_id': 'sub', 'ip': None}],
+                          'admin_state_up': i % 2 == 0}
+                         for i in range(5)],
+               'ports_links': [{'href': 'http://host/ports?marker=id4',
+                                'rel': 'next'}]}
+        body = json.dumps(doc, indent=1)
+        for size in (1, 2, 3, 7, 64, len(body)):
+            ports, extra = self._decode(body, size)
+            self.assertEqual(doc['ports'], ports)
+            self.assertEqual({'ports_links': doc['ports_links']}, extra)
+
+    def test_decode_number_split_across_chunks(self):
+        ports, extra = self._decode('{"ports": [12345, 6.5e3], "n": 789}', 1)
+        self.assertEqual([12345, 6.5e3], ports)
+        self.assertEqual({'n': 789}, extra)
+
+    def test_decode_extra_keys_before_collection(self):
+        body = '{"ports_links": [], "ports": [{"id": "a"}]}'
+        deserializer = serializer.JSONCollectionDeserializer(
+            _chunks(body, 4), 'ports')
+        ports = iter(deserializer)
+        self.assertEqual({'id': 'a'}, next(ports))
+        self.assertEqual({'ports_links': []}, deserializer.extra)
+
+    def test_decode_empty_collection(self):
+        self.assertEqual(([], {}), self._decode('{"ports": []}', 3))
+        self.assertEqual(([], {}), self._decode('{}', 1))
+
+    def test_decode_collection_not_a_list(self):
+        self.assertEqual(([], {'ports': None}),
+                         self._decode('{"ports": null}', 2))
+
+    def test_decode_malformed(self):
+        for body in ('', '[]', '{"ports": [1, 2', '{"ports": [1 2]}',
+                     '{"ports" [1]}', '{"ports": [1]'):
+            self.assertRaises(exceptions.MalformedResponseBody,
+                              self._decode, body, 2)
@@ -14,9 +14,11 @@
 #    under the License.
 
 import argparse
+import json
 import logging
 import os
 import re
+import subprocess
 import sys
 
 import fixtures
@@ -30,7 +32,10 @@ from keystoneclient.auth.identity import v2 as v2_auth
 from keystoneclient.auth.identity import v3 as v3_auth
 from keystoneclient import session
 
+import neutronclient
 from neutronclient.common import clientmanager
+from neutronclient.common import command
+from neutronclient.neutron.v2_0 import network
 from neutronclient import shell as openstack_shell
 from neutronclient.tests.unit import test_auth as auth
 
@@ -150,6 +155,10 @@ class ShellTest(testtools.TestCase):
             endpoint_type='publicURL', insecure=False, ca_cert=None,
             timeout=None,
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             retries=0,
             auth=mox.IsA(v3_auth.Password),
             session=mox.IsA(session.Session),
@@ -183,6 +192,10 @@ class ShellTest(testtools.TestCase):
             password='test', region_name='', api_version={'network': '2.0'},
             auth_strategy='keystone', service_type='network',
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             endpoint_type='publicURL', insecure=False, ca_cert=None, retries=0,
             timeout=None,
             auth=mox.IsA(v3_auth.Password),
@@ -221,6 +234,10 @@ class ShellTest(testtools.TestCase):
             endpoint_type='publicURL', insecure=False, ca_cert=None,
             timeout=None,
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             retries=0,
             auth=mox.IsA(v2_auth.Password),
             session=mox.IsA(session.Session),
@@ -256,6 +273,10 @@ class ShellTest(testtools.TestCase):
             endpoint_type='publicURL', insecure=False, ca_cert=None,
             timeout=None,
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             retries=0,
             auth=mox.IsA(v3_auth.Password),
             session=mox.IsA(session.Session),
@@ -292,6 +313,10 @@ class ShellTest(testtools.TestCase):
             endpoint_type='publicURL', insecure=False, ca_cert=None,
             timeout=None,
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             retries=0,
             auth=mox.IsA(v2_auth.Password),
             session=mox.IsA(session.Session),
@@ -327,6 +352,10 @@ class ShellTest(testtools.TestCase):
             endpoint_type='publicURL', insecure=False, ca_cert=None,
             timeout=None,
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             retries=0,
             auth=mox.IsA(v3_auth.Password),
             session=mox.IsA(session.Session),
@@ -363,6 +392,10 @@ class ShellTest(testtools.TestCase):
             endpoint_type='publicURL', insecure=False, ca_cert=None,
             timeout=None,
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             retries=0,
             auth=mox.IsA(v2_auth.Password),
             session=mox.IsA(session.Session),
@@ -398,6 +431,10 @@ class ShellTest(testtools.TestCase):
             endpoint_type='publicURL', insecure=True, ca_cert=None,
             timeout=None,
             raise_errors=False,
+            trust_uuids=False,
+            auth_cache=None,
+            rate_limiter=None,
+            coalesce_requests=True,
             retries=0,
             auth=mox.IgnoreArg(),
             session=mox.IgnoreArg(),
@@ -482,3 +519,125 @@ class ShellTest(testtools.TestCase):
 
         namespace = parser.parse_args([])
         self.assertEqual(50, namespace.http_timeout)
+
+    def test_rate_limit_options(self):
+        shell = openstack_shell.NeutronShell('2.0')
+        parser = shell.build_option_parser('descr', '2.0')
+
+        shell.options = parser.parse_args([])
+        self.assertIsNone(shell._get_rate_limiter())
+
+        shell.options = parser.parse_args(['--max-rps=2.5',
+                                           '--max-concurrency=4',
+                                           '--max-write-concurrency=1'])
+        limiter = shell._get_rate_limiter()
+        self.assertEqual(2.5, limiter._limits['read'].bucket.rate)
+        self.assertEqual(2.5, limiter._limits['write'].bucket.rate)
+        self.assertEqual(['read', 'write'], sorted(limiter.stats()))
+
+        self.assertRaises(SystemExit, parser.parse_args, ['--max-rps=-1'])
+
+
+class ShellCommandLoadingTest(testtools.TestCase):
+
+    # The cold start of the shell is compared with the import of the
+    # keystoneclient session and password plugins in a fresh interpreter,
+    # so that the budget follows the speed of the machine. The shell takes
+    # about 1.3 times as long, and took about twice as long when it
+    # imported every command module.
+    COLD_START_RATIO = 2.5
+    RUNS = 3
+
+    IMPORT_SCRIPT = """
+import json, sys, time
+start = time.time()
+from neutronclient import shell
+shell.NeutronShell(shell.NEUTRON_API_VERSION)
+elapsed = time.time() - start
+print(json.dumps({'elapsed': elapsed,
+                  'modules': [m for m, mod in sys.modules.items() if mod]}))
+"""
+
+    BASELINE_SCRIPT = """
+import json, time
+start = time.time()
+from keystoneclient.auth.identity import v2
+from keystoneclient.auth.identity import v3
+from keystoneclient import session
+print(json.dumps({'elapsed': time.time() - start}))
+"""
+
+    def _run_script(self, script):
+        env = dict(os.environ)
+        root = os.path.dirname(os.path.dirname(neutronclient.__file__))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [root] + [p for p in [env.get('PYTHONPATH')] if p])
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], env=env)
+        return json.loads(output.decode('utf-8').splitlines()[-1])
+
+    def _cold_start(self):
+        return self._run_script(self.IMPORT_SCRIPT)
+
+    def test_cold_start_imports_no_command_module(self):
+        result = self._cold_start()
+        loaded = [m for m in result['modules']
+                  if m.startswith('neutronclient.neutron.v2_0.') or
+                  m.startswith('keystoneclient')]
+        self.assertEqual([], loaded)
+        self.assertIn('neutronclient.shell', result['modules'])
+
+    def test_cold_start_budget(self):
+        # The fastest of a few runs is the least affected by the load
+        elapsed = min(self._cold_start()['elapsed']
+                      for i in range(self.RUNS))
+        baseline = min(self._run_script(self.BASELINE_SCRIPT)['elapsed']
+                       for i in range(self.RUNS))
+        self.assertThat(elapsed,
+                        matchers.LessThan(self.COLD_START_RATIO * baseline))
+
+    def test_all_commands_resolve(self):
+        shell = openstack_shell.NeutronShell('2.0')
+        for name in openstack_shell.COMMAND_V2:
+            cmd_class = shell.command_manager.commands[name].load()
+            self.assertTrue(issubclass(cmd_class, command.OpenStackCommand),
+                            name)
+
+    def test_command_loaded_on_first_use(self):
+        shell = openstack_shell.NeutronShell('2.0')
+        ep = shell.command_manager.commands['net-list']
+        self.assertIsNone(ep.command_class)
+        cmd_factory, name, argv = shell.command_manager.find_command(
+            ['net-list', '-c', 'id'])
+        self.assertIs(network.ListNetwork, cmd_factory)
+        self.assertIs(cmd_factory, ep.command_class)
+        self.assertEqual(['-c', 'id'], argv)
+
+    def test_command_table_returns_classes(self):
+        commands = openstack_shell.CommandTable(
+            openstack_shell.COMMAND_V2_PACKAGE,
+            {'net-list': 'network.ListNetwork',
+             'net-show': network.ShowNetwork})
+        self.assertEqual('network.ListNetwork',
+                         dict(commands.raw_items())['net-list'])
+        self.assertIs(network.ListNetwork, commands['net-list'])
+        self.assertIs(network.ListNetwork, commands.get('net-list'))
+        self.assertIsNone(commands.get('net-create'))
+        self.assertEqual([('net-list', network.ListNetwork),
+                          ('net-show', network.ShowNetwork)],
+                         sorted(commands.items()))
+        self.assertIn('net-show', commands)
+        self.assertIs(network.ShowNetwork,
+                      openstack_shell.COMMAND_V2['net-show'])
+        self.assertTrue(hasattr(openstack_shell.COMMAND_V2['net-list'],
+                                'get_parser'))
+
+    def test_command_class_still_accepted(self):
+        manager = openstack_shell.CommandManager(
+            'neutron.cli', package=openstack_shell.COMMAND_V2_PACKAGE)
+        manager.add_command('my-net-list', network.ListNetwork)
+        manager.add_command('my-net-show', 'network.ShowNetwork')
+        self.assertIs(network.ListNetwork,
+                      manager.find_command(['my-net-list'])[0])
+        self.assertIs(network.ShowNetwork,
+                      manager.find_command(['my-net-show'])[0])
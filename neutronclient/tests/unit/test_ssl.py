@@ -72,6 +72,10 @@ class TestSSL(testtools.TestCase):
             user_id=mox.IgnoreArg(),
             retries=mox.IgnoreArg(),
             raise_errors=mox.IgnoreArg(),
+            trust_uuids=mox.IgnoreArg(),
+            auth_cache=mox.IgnoreArg(),
+            rate_limiter=mox.IgnoreArg(),
+            coalesce_requests=True,
             log_credentials=mox.IgnoreArg(),
             timeout=mox.IgnoreArg(),
             auth=mox.IgnoreArg(),
@@ -119,6 +123,10 @@ class TestSSL(testtools.TestCase):
             user_id=mox.IgnoreArg(),
             retries=mox.IgnoreArg(),
             raise_errors=mox.IgnoreArg(),
+            trust_uuids=mox.IgnoreArg(),
+            auth_cache=mox.IgnoreArg(),
+            rate_limiter=mox.IgnoreArg(),
+            coalesce_requests=True,
             log_credentials=mox.IgnoreArg(),
             timeout=mox.IgnoreArg(),
             auth=mox.IgnoreArg(),
@@ -151,7 +159,14 @@ class TestSSL(testtools.TestCase):
             timeout=mox.IgnoreArg(),
             log_credentials=mox.IgnoreArg(),
             service_type=mox.IgnoreArg(),
-            endpoint_type=mox.IgnoreArg()
+            endpoint_type=mox.IgnoreArg(),
+            pool_connections=mox.IgnoreArg(),
+            pool_maxsize=mox.IgnoreArg(),
+            keep_alive=mox.IgnoreArg(),
+            auth_cache=mox.IgnoreArg(),
+            token_refresh_margin=mox.IgnoreArg(),
+            background_token_refresh=mox.IgnoreArg(),
+            response_cache=mox.IgnoreArg()
         )
         self.mox.ReplayAll()
 
@@ -0,0 +1,514 @@
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""asyncio flavour of the Neutron v2.0 client.
+
+Every API method of :class:`AsyncClient` returns an :mod:`asyncio` future
+instead of the decoded response, and the ``iter_<collection>`` methods (and
+``list_<collection>(retrieve_all=False)``) return asynchronous iterators::
+
+    neutron = async_client.AsyncClient(endpoint_url=URL, token=TOKEN)
+    port = await neutron.show_port(port_id)
+    async for network in neutron.iter_networks():
+        ...
+
+The module is written with futures and callbacks so that it can still be
+imported on Python 2, where it is simply not usable.
+"""
+
+import functools
+import logging
+import time
+
+import requests
+import six
+import six.moves.urllib.parse as urlparse
+
+try:
+    import asyncio
+    from concurrent import futures
+except ImportError:
+    asyncio = None
+
+from neutronclient.common import _
+from neutronclient.common import exceptions
+from neutronclient.common import retry
+from neutronclient.v2_0 import client
+
+
+_logger = logging.getLogger(__name__)
+
+_StopAsyncIteration = getattr(six.moves.builtins, 'StopAsyncIteration',
+                              StopIteration)
+_MISSING = object()
+
+
+def _new_future(loop):
+    if hasattr(loop, 'create_future'):
+        return loop.create_future()
+    return asyncio.Future(loop=loop)
+
+
+def _then(loop, awaitable, callback):
+    """Return a future resolved with ``callback(<result of awaitable>)``.
+
+    Exceptions raised by the awaitable or by the callback are set on the
+    returned future. If the callback returns a future, its outcome is the
+    one propagated.
+    """
+    result = _new_future(loop)
+
+    def _copy(source):
+        if result.cancelled():
+            return
+        if source.cancelled():
+            result.cancel()
+        elif source.exception() is not None:
+            result.set_exception(source.exception())
+        else:
+            result.set_result(source.result())
+
+    def _done(source):
+        if result.cancelled():
+            return
+        if source.cancelled():
+            result.cancel()
+            return
+        try:
+            value = callback(source.result())
+        except Exception as e:
+            result.set_exception(e)
+            return
+        if isinstance(value, asyncio.Future):
+            value.add_done_callback(_copy)
+        else:
+            result.set_result(value)
+
+    asyncio.ensure_future(awaitable, loop=loop).add_done_callback(_done)
+    return result
+
+
+class HTTPClientTransport(object):
+    """Default transport running the blocking HTTP client in an executor.
+
+    Any object providing the same ``do_request`` coroutine method, for
+    instance one built on an asyncio HTTP library, can be given to
+    :class:`AsyncClient` instead.
+    """
+
+    def __init__(self, httpclient, executor=None):
+        self.httpclient = httpclient
+        self.executor = executor
+
+    def do_request(self, action, method, body=None, content_type=None,
+                   loop=None):
+        """Send a request to the Neutron endpoint.
+
+        :returns: a future resolved with ``(response, body)``, response
+                  having the ``status_code``, ``reason`` and ``headers``
+                  attributes of a :class:`requests.Response`.
+        """
+        def _request():
+            return self.httpclient.do_request(action, method, body=body,
+                                              content_type=content_type)
+
+        loop = loop or asyncio.get_event_loop()
+        return loop.run_in_executor(self.executor, _request)
+
+
+class _AsyncPages(object):
+    """Asynchronous iterator over the pages of a collection."""
+
+    def __init__(self, client, collection, path, params):
+        self.client = client
+        self.collection = collection
+        self.path = path
+        self.params = params
+        if params.get('page_reverse', False):
+            self.linkrel = 'previous'
+        else:
+            self.linkrel = 'next'
+
+    def __aiter__(self):
+        return self
+
+    def _next_params(self, page):
+        for link in page.get('%s_links' % self.collection, []):
+            if link['rel'] == self.linkrel:
+                query_str = urlparse.urlparse(link['href']).query
+                return urlparse.parse_qs(query_str)
+        return None
+
+    def __anext__(self):
+        loop = self.client._get_loop()
+        if self.params is None:
+            done = _new_future(loop)
+            done.set_exception(_StopAsyncIteration())
+            return done
+
+        def _got_page(page):
+            self.params = self._next_params(page)
+            return page
+
+        return _then(loop, self.client.get(self.path, params=self.params),
+                     _got_page)
+
+
+class _AsyncMergedPages(object):
+    """Asynchronous iterator over the single page of merged listings."""
+
+    def __init__(self, client, collection, fetch):
+        self.client = client
+        self.collection = collection
+        self.fetch = fetch
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if self.fetch is None:
+            done = _new_future(self.client._get_loop())
+            done.set_exception(_StopAsyncIteration())
+            return done
+        fetch, self.fetch = self.fetch, None
+        return fetch()
+
+
+class _AsyncResources(object):
+    """Asynchronous iterator over the resources of a collection."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.resources = iter([])
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        loop = self.pages.client._get_loop()
+        resource = next(self.resources, _MISSING)
+        if resource is not _MISSING:
+            done = _new_future(loop)
+            done.set_result(resource)
+            return done
+
+        def _got_page(page):
+            self.resources = iter(page.get(self.pages.collection, []))
+            return self.__anext__()
+
+        return _then(loop, self.pages.__anext__(), _got_page)
+
+
+class AsyncClient(client.Client):
+    """asyncio client for the OpenStack Neutron v2.0 API.
+
+    Takes the same arguments as :class:`neutronclient.v2_0.client.Client`
+    and exposes the same methods, except that they return futures (and
+    asynchronous iterators for the paginated listings). Only the JSON
+    format is supported.
+
+    :param transport: Object sending the HTTP requests, see
+                      :class:`HTTPClientTransport`. (optional)
+    :param loop: Event loop to use. (default: the current event loop)
+    """
+
+    def __init__(self, transport=None, loop=None, **kwargs):
+        if asyncio is None:
+            raise exceptions.NeutronClientException(
+                message=_("AsyncClient requires the asyncio module"))
+        super(AsyncClient, self).__init__(**kwargs)
+        self.transport = transport or HTTPClientTransport(self.httpclient)
+        self.loop = loop
+        # The rate limiter blocks, so the requests wait for it in a thread
+        # of their own rather than in the event loop.
+        self._limiter_executor = None
+        if self.rate_limiter is not None:
+            self._limiter_executor = futures.ThreadPoolExecutor(1)
+
+    def _get_loop(self):
+        return self.loop or asyncio.get_event_loop()
+
+    def _failed(self, exc):
+        future = _new_future(self._get_loop())
+        future.set_exception(exc)
+        return future
+
+    def do_request(self, method, action, body=None, headers=None, params=None,
+                   stream_collection=None):
+        # The request is fully built here, before APIParamsCall restores
+        # the format of the client.
+        if self.format != 'json':
+            return self._failed(exceptions.NeutronClientException(
+                message=_("AsyncClient only supports the JSON format")))
+        path = action
+        action = self._build_action(action, params)
+        try:
+            if self.httpclient.endpoint_url:
+                self._check_uri_length(action)
+            if body:
+                body = self.serialize(body)
+        except Exception as e:
+            return self._failed(e)
+
+        loop = self._get_loop()
+        send = functools.partial(self.transport.do_request, action, method,
+                                 body=body, content_type=self.content_type(),
+                                 loop=loop)
+        if self.rate_limiter is None:
+            reply = send()
+        else:
+            reply = self._limited(loop, method, send)
+        return _then(loop, reply,
+                     functools.partial(self._handle_reply, method, path))
+
+    def _limited(self, loop, method, send):
+        """Call send once rate_limiter lets the request go, see do_request.
+
+        :returns: a future resolved like the one returned by send.
+        """
+        limit = self.rate_limiter.limit(method)
+        acquired = self._limiter_executor.submit(limit.__enter__)
+
+        def _release(entered):
+            if not entered.cancelled() and entered.exception() is None:
+                limit.__exit__(None, None, None)
+
+        reply = _then(loop, asyncio.wrap_future(acquired, loop=loop),
+                      lambda _: send())
+        reply.add_done_callback(
+            lambda _: acquired.add_done_callback(_release))
+        return reply
+
+    def _handle_reply(self, method, path, reply):
+        resp, replybody = reply
+        status_code = resp.status_code
+        if status_code in (requests.codes.ok,
+                           requests.codes.created,
+                           requests.codes.accepted,
+                           requests.codes.no_content):
+            if method != 'GET':
+                self.invalidate_resolutions(path)
+            return self.deserialize(replybody, status_code)
+        if not replybody:
+            replybody = resp.reason
+        try:
+            self._handle_fault_response(status_code, replybody)
+        except exceptions.NeutronClientException as e:
+            headers = getattr(resp, 'headers', None) or {}
+            e.retry_after = retry.parse_retry_after(
+                headers.get('Retry-After'), timer=self.retry_policy.timer)
+            raise
+
+    def retry_request(self, method, action, body=None,
+                      headers=None, params=None, stream_collection=None):
+        """Call do_request, retrying failures as allowed by retry_policy.
+
+        Only idempotent requests should retry failed connection attempts.
+        The retries wait on the event loop instead of sleeping.
+        :returns: a future, failing with ConnectionFailed if the maximum #
+                  of retries is exceeded
+        """
+        loop = self._get_loop()
+        result = _new_future(loop)
+        policy = self.retry_policy
+        started = policy.timer()
+
+        def _attempt(i):
+            attempt = self.do_request(method, action, body=body,
+                                      headers=headers, params=params)
+            attempt.add_done_callback(functools.partial(_done, i))
+
+        def _done(i, attempt):
+            if result.cancelled():
+                return
+            if attempt.cancelled():
+                result.cancel()
+                return
+            exc = attempt.exception()
+            if exc is None:
+                result.set_result(attempt.result())
+                return
+            delay = None
+            if (i < self.retries and
+                    isinstance(exc, exceptions.NeutronClientException)):
+                delay = policy.delay(method, exc, i, started)
+            if delay is not None:
+                _logger.debug('Retrying the request to Neutron service in '
+                              '%.2f seconds', delay)
+                loop.call_later(delay, _attempt, i + 1)
+            elif (self.raise_errors or
+                    not isinstance(exc, exceptions.ConnectionFailed) or
+                    not policy.is_retryable(method, exc)):
+                result.set_exception(exc)
+            else:
+                if i:
+                    msg = (_("Failed to connect to Neutron server after %d "
+                             "attempts") % (i + 1))
+                else:
+                    msg = _("Failed to connect Neutron server")
+                result.set_exception(exceptions.ConnectionFailed(reason=msg))
+
+        _attempt(0)
+        return result
+
+    def create_bulk(self, collection, path, resources, batch_size=None):
+        """Create resources of a collection in concurrent batches.
+
+        :returns: a future resolved with the list described in
+                  :meth:`neutronclient.v2_0.client.Client.create_bulk`.
+        """
+        loop = self._get_loop()
+        batches = list(self._batches(resources, batch_size))
+        if not batches:
+            done = _new_future(loop)
+            done.set_result([])
+            return done
+        posts = [self.post(path, body={collection: batch})
+                 for batch in batches]
+
+        def _collect(outcomes):
+            results = []
+            for batch, outcome in zip(batches, outcomes):
+                results.extend(self._batch_results(collection, batch,
+                                                   outcome))
+            return results
+
+        return _then(loop, asyncio.gather(*posts, return_exceptions=True),
+                     _collect)
+
+    def _run_bulk(self, calls, concurrency=1):
+        """Run ``(id, call)`` pairs, at most ``concurrency`` at a time.
+
+        :returns: a future resolved with the dict described in
+                  :meth:`neutronclient.v2_0.client.Client._run_bulk`.
+        """
+        result = _new_future(self._get_loop())
+        started = time.time()
+        outcomes = [None] * len(calls)
+        pending = iter(enumerate(calls))
+        running = [0]
+
+        def _start_next():
+            for i, (_id, call) in pending:
+                call().add_done_callback(
+                    functools.partial(_done, i, _id, time.time()))
+                return True
+            running[0] -= 1
+            if not running[0] and not result.cancelled():
+                result.set_result(self._bulk_summary(outcomes, started))
+            return False
+
+        def _done(i, _id, call_started, future):
+            if future.cancelled():
+                error = asyncio.CancelledError()
+            else:
+                error = future.exception()
+            if error is None:
+                outcomes[i] = self._bulk_outcome(_id, future.result(), None,
+                                                 call_started)
+            else:
+                outcomes[i] = self._bulk_outcome(_id, None, error,
+                                                 call_started)
+            _start_next()
+
+        running[0] = max(1, min(concurrency, len(calls)))
+        for _ in range(running[0]):
+            if not _start_next():
+                break
+        return result
+
+    def _list_partitions(self, collection, path, partitions, concurrency,
+                         params):
+        """List partitions of a collection, at most concurrency at a time.
+
+        :returns: a future resolved with a single page of the resources of
+                  the partitions, merged as described in
+                  :meth:`neutronclient.v2_0.client.Client.list`.
+        """
+        calls = []
+        for partition in partitions:
+            partition_params = dict(params)
+            partition_params.update(partition)
+            calls.append((partition, functools.partial(
+                self.list, collection, path, **partition_params)))
+
+        def _merge(summary):
+            for outcome in summary['results']:
+                if outcome['error'] is not None:
+                    raise outcome['error']
+            resources = [outcome['result'][collection]
+                         for outcome in summary['results']]
+            if params.get('sort_key'):
+                return {collection: client._merge_sorted(
+                    resources, params['sort_key'], params.get('sort_dir'))}
+            return {collection: [resource for part in resources
+                                 for resource in part]}
+
+        return _then(self._get_loop(),
+                     self._run_bulk(calls,
+                                    concurrency or self.LIST_CONCURRENCY),
+                     _merge)
+
+    def _async_pages(self, collection, path, partitions, concurrency,
+                     params):
+        if partitions is None:
+            return _AsyncPages(self, collection, path, params)
+        return _AsyncMergedPages(self, collection, functools.partial(
+            self._list_partitions, collection, path, partitions,
+            concurrency, params))
+
+    def list(self, collection, path, retrieve_all=True, prefetch=0,
+             partitions=None, concurrency=None, **params):
+        """List the resources of a collection.
+
+        Partitions are listed concurrently, and their resources returned
+        in a single page.
+        :returns: a future resolved with the resources, or an asynchronous
+                  iterator over the pages if not retrieve_all.
+        """
+        pages = self._async_pages(collection, path, partitions, concurrency,
+                                  params)
+        if not retrieve_all:
+            return pages
+        if partitions is not None:
+            return pages.__anext__()
+        result = _new_future(self._get_loop())
+        res = []
+
+        def _fetch():
+            pages.__anext__().add_done_callback(_got_page)
+
+        def _got_page(page):
+            if result.cancelled():
+                return
+            if page.cancelled():
+                result.cancel()
+            elif isinstance(page.exception(), _StopAsyncIteration):
+                result.set_result({collection: res})
+            elif page.exception() is not None:
+                result.set_exception(page.exception())
+            else:
+                res.extend(page.result()[collection])
+                _fetch()
+
+        _fetch()
+        return result
+
+    def iterate(self, collection, path, prefetch=0, partitions=None,
+                concurrency=None, **params):
+        """Asynchronously iterate over the resources of a collection."""
+        return _AsyncResources(self._async_pages(
+            collection, path, partitions, concurrency, params))
@@ -14,17 +14,32 @@
 #    under the License.
 #
 
+import collections
+import contextlib
+import functools
+import heapq
 import logging
+import multiprocessing.pool
+import socket
+import sys
+import threading
 import time
-import urllib
 
 import requests
-import six.moves.urllib.parse as urlparse
+import six
+from six.moves import queue
+# Bound once at import: six resolves its lazy moves in a way which is not
+# thread safe, and the requests may be sent from several threads.
+from six.moves.urllib.parse import parse_qs
+from six.moves.urllib.parse import urlencode
+from six.moves.urllib.parse import urlsplit
 
 from neutronclient import client
 from neutronclient.common import _
+from neutronclient.common import cache
 from neutronclient.common import constants
 from neutronclient.common import exceptions
+from neutronclient.common import retry
 from neutronclient.common import serializer
 from neutronclient.common import utils
 
@@ -32,6 +47,68 @@ from neutronclient.common import utils
 _logger = logging.getLogger(__name__)
 
 
+class _StreamedResources(six.Iterator):
+    """Resources of a streamed page, decoded as they are iterated."""
+
+    def __init__(self, resources):
+        self._resources = resources
+        self._read = collections.deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._read:
+            return self._read.popleft()
+        return next(self._resources)
+
+    def read_all(self):
+        """Read the rest of the response, keeping the resources not taken.
+
+        The members following the resources, like the links to the next
+        page, are only decoded once the whole array was read.
+        """
+        self._read.extend(self._resources)
+
+
+class _SortKey(object):
+    """Orders resources on sort keys the way the server sorts them."""
+
+    def __init__(self, resource, keys, reverse):
+        self.values = [resource.get(key) for key in keys]
+        self.reverse = reverse
+
+    def __lt__(self, other):
+        for mine, theirs, reverse in zip(self.values, other.values,
+                                         self.reverse):
+            if mine == theirs:
+                continue
+            if mine is None:
+                less = True
+            elif theirs is None:
+                less = False
+            else:
+                less = mine < theirs
+            return less != reverse
+        return False
+
+    def __eq__(self, other):
+        return not (self < other or other < self)
+
+
+def _merge_sorted(sorted_lists, sort_key, sort_dir=None):
+    """Merge lists of resources sorted by the server on the same keys."""
+    keys = sort_key if isinstance(sort_key, list) else [sort_key]
+    dirs = sort_dir or []
+    dirs = dirs if isinstance(dirs, list) else [dirs]
+    reverse = [i < len(dirs) and dirs[i] == 'desc' for i in range(len(keys))]
+    # The indexes keep the merge stable and spare comparing resources
+    return [entry[-1] for entry in heapq.merge(
+        *[[(_SortKey(resource, keys, reverse), i, j, resource)
+           for j, resource in enumerate(resources)]
+          for i, resources in enumerate(sorted_lists)])]
+
+
 def exception_handler_v20(status_code, error_content):
     """Exception handler for API v2.0 client
 
@@ -95,12 +172,10 @@ class APIParamsCall(object):
 
     def __get__(self, instance, owner):
         def with_params(*args, **kwargs):
-            _format = instance.format
-            if 'format' in kwargs:
-                instance.format = kwargs['format']
-            ret = self.function(instance, *args, **kwargs)
-            instance.format = _format
-            return ret
+            if 'format' not in kwargs:
+                return self.function(instance, *args, **kwargs)
+            with instance._request_format(kwargs['format']):
+                return self.function(instance, *args, **kwargs)
         return with_params
 
 
@@ -132,11 +207,62 @@ class Client(object):
     :param integer retries: How many times idempotent (GET, PUT, DELETE)
                             requests to Neutron server should be retried if
                             they fail (default: 0).
+    :param retry_policy: :class:`neutronclient.common.retry.RetryPolicy`
+                         deciding which failures are retried and how long
+                         to wait before, exponential backoff with jitter
+                         on connection failures and 429, 502, 503 and 504
+                         responses by default. (optional)
+    :param rate_limiter: :class:`neutronclient.common.ratelimit.RateLimiter`
+                         limiting the rate and the concurrency of the
+                         requests sent to the server. (optional)
+    :param bool coalesce_requests: If True, identical GET requests made at
+                                   the same time by several threads are
+                                   sent once and its result shared. A
+                                   write only waits for the GET requests
+                                   sent after it completed.
+                                   (default: False)
+    :param response_cache: :class:`neutronclient.common.cache.ResponseCache`
+                           reusing the responses of the GET requests, for
+                           instance of show calls repeated on the same
+                           resources. (optional)
     :param bool raise_errors: If True then exceptions caused by connection
                               failure are propagated to the caller.
                               (default: True)
     :param session: Keystone client auth session to use. (optional)
     :param auth: Keystone auth plugin to use. (optional)
+    :param integer pool_connections: Number of per-host connection pools to
+                                     keep in the HTTP session.
+                                     (default: 10)
+    :param integer pool_maxsize: Maximum number of connections kept open
+                                 to a single host. (default: 10)
+    :param bool keep_alive: If False, connections are closed after every
+                            request instead of being reused.
+                            (default: True)
+    :param auth_cache: :class:`neutronclient.common.auth_cache.AuthCache`
+                       to reuse a token obtained by a previous client.
+                       (optional)
+    :param integer token_refresh_margin: Seconds before its expiry at which
+                                         a token obtained with the password
+                                         is renewed. (default: 60)
+    :param bool background_token_refresh: If True, the token is renewed
+                                          from a background thread while
+                                          requests keep using the current
+                                          one. (default: False)
+    :param integer resolution_cache_size: Number of resolved resource names
+                                          to remember. (default: 1000)
+    :param integer resolution_cache_ttl: Seconds after which a resolved
+                                         name is looked up again.
+                                         (default: 60)
+    :param integer extension_cache_ttl: Seconds for which the extensions
+                                        of an endpoint, needed by the XML
+                                        format, are cached. (default: 600)
+    :param bool trust_uuids: If True, commands take a UUID given for a
+                             resource as its id without checking that it
+                             exists first. (default: False)
+    :param bool incremental_decode: If True, JSON list responses are decoded
+                                    while they are read from the socket
+                                    instead of after the whole body has
+                                    been received. (default: False)
 
     Example::
 
@@ -257,19 +383,45 @@ class Client(object):
                      }
     # 8192 Is the default max URI len for eventlet.wsgi.server
     MAX_URI_LEN = 8192
+    # Size of the chunks read from the socket for incremental decoding
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # Number of resources sent in a single bulk create request
+    BULK_BATCH_SIZE = 100
+    # Number of the partitions of a listing, or of the chunks of a split
+    # list filter, fetched at the same time by default
+    LIST_CONCURRENCY = 4
+    # List parameters which are not filters, and are never split
+    UNSPLIT_PARAMS = ('fields', 'sort_key', 'sort_dir')
 
     def get_attr_metadata(self):
         if self.format == 'json':
             return {}
-        old_request_format = self.format
-        self.format = 'json'
-        exts = self.list_extensions()['extensions']
-        self.format = old_request_format
+        metadata = self.extension_cache.get(self.httpclient.endpoint_url)
+        if metadata is None:
+            metadata = self.refresh_extension_metadata()
+        return metadata
+
+    def refresh_extension_metadata(self):
+        """Fetch the extension namespaces used by the XML serializer.
+
+        The result is cached per endpoint for extension_cache_ttl seconds,
+        this forces a new lookup.
+        """
+        with self._request_format('json'):
+            exts = self.list_extensions()['extensions']
         ns = dict([(ext['alias'], ext['namespace']) for ext in exts])
-        self.EXTED_PLURALS.update(constants.PLURALS)
-        return {'plurals': self.EXTED_PLURALS,
-                'xmlns': constants.XML_NS_V20,
-                constants.EXT_NS: ns}
+        plurals = dict(self.EXTED_PLURALS)
+        plurals.update(constants.PLURALS)
+        metadata = {'plurals': plurals,
+                    'xmlns': constants.XML_NS_V20,
+                    constants.EXT_NS: ns}
+        entry = self._serializers.get('xml')
+        if entry is not None and entry[0] == metadata:
+            # Unchanged, keep the serializer built from it
+            metadata = entry[0]
+        # The endpoint is only known once list_extensions() authenticated
+        self.extension_cache.set(self.httpclient.endpoint_url, metadata)
+        return metadata
 
     @APIParamsCall
     def get_quotas_tenant(self, **_params):
@@ -315,6 +467,11 @@ class Client(object):
         return self.list('ports', self.ports_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_ports(self, **_params):
+        """Iterates over all ports for a tenant, one at a time."""
+        return self.iterate('ports', self.ports_path, **_params)
+
     @APIParamsCall
     def show_port(self, port, **_params):
         """Fetches information of a certain network."""
@@ -325,6 +482,12 @@ class Client(object):
         """Creates a new port."""
         return self.post(self.ports_path, body=body)
 
+    @APIParamsCall
+    def create_ports_bulk(self, ports, batch_size=None):
+        """Creates many ports, a batch of them per request."""
+        return self.create_bulk('ports', self.ports_path, ports,
+                                batch_size=batch_size)
+
     @APIParamsCall
     def update_port(self, port, body=None):
         """Updates a port."""
@@ -342,6 +505,11 @@ class Client(object):
         return self.list('networks', self.networks_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_networks(self, **_params):
+        """Iterates over all networks for a tenant, one at a time."""
+        return self.iterate('networks', self.networks_path, **_params)
+
     @APIParamsCall
     def show_network(self, network, **_params):
         """Fetches information of a certain network."""
@@ -352,6 +520,12 @@ class Client(object):
         """Creates a new network."""
         return self.post(self.networks_path, body=body)
 
+    @APIParamsCall
+    def create_networks_bulk(self, networks, batch_size=None):
+        """Creates many networks, a batch of them per request."""
+        return self.create_bulk('networks', self.networks_path, networks,
+                                batch_size=batch_size)
+
     @APIParamsCall
     def update_network(self, network, body=None):
         """Updates a network."""
@@ -368,6 +542,11 @@ class Client(object):
         return self.list('subnets', self.subnets_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_subnets(self, **_params):
+        """Iterates over all subnets for a tenant, one at a time."""
+        return self.iterate('subnets', self.subnets_path, **_params)
+
     @APIParamsCall
     def show_subnet(self, subnet, **_params):
         """Fetches information of a certain subnet."""
@@ -378,6 +557,12 @@ class Client(object):
         """Creates a new subnet."""
         return self.post(self.subnets_path, body=body)
 
+    @APIParamsCall
+    def create_subnets_bulk(self, subnets, batch_size=None):
+        """Creates many subnets, a batch of them per request."""
+        return self.create_bulk('subnets', self.subnets_path, subnets,
+                                batch_size=batch_size)
+
     @APIParamsCall
     def update_subnet(self, subnet, body=None):
         """Updates a subnet."""
@@ -395,6 +580,11 @@ class Client(object):
         return self.list('routers', self.routers_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_routers(self, **_params):
+        """Iterates over all routers for a tenant, one at a time."""
+        return self.iterate('routers', self.routers_path, **_params)
+
     @APIParamsCall
     def show_router(self, router, **_params):
         """Fetches information of a certain router."""
@@ -446,6 +636,11 @@ class Client(object):
         return self.list('floatingips', self.floatingips_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_floatingips(self, **_params):
+        """Iterates over all floatingips for a tenant, one at a time."""
+        return self.iterate('floatingips', self.floatingips_path, **_params)
+
     @APIParamsCall
     def show_floatingip(self, floatingip, **_params):
         """Fetches information of a certain floatingip."""
@@ -483,6 +678,12 @@ class Client(object):
         return self.list('security_groups', self.security_groups_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_security_groups(self, **_params):
+        """Iterates over all security groups for a tenant, one at a time."""
+        return self.iterate('security_groups', self.security_groups_path,
+                            **_params)
+
     @APIParamsCall
     def show_security_group(self, security_group, **_params):
         """Fetches information of a certain security group."""
@@ -512,6 +713,13 @@ class Client(object):
                          self.security_group_rules_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_security_group_rules(self, **_params):
+        """Iterates over all security group rules, one at a time."""
+        return self.iterate('security_group_rules',
+                            self.security_group_rules_path,
+                            **_params)
+
     @APIParamsCall
     def show_security_group_rule(self, security_group_rule, **_params):
         """Fetches information of a certain security group rule."""
@@ -524,6 +732,11 @@ class Client(object):
         return self.list('vpnservices', self.vpnservices_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_vpnservices(self, **_params):
+        """Iterates over all vpnservices for a tenant, one at a time."""
+        return self.iterate('vpnservices', self.vpnservices_path, **_params)
+
     @APIParamsCall
     def show_vpnservice(self, vpnservice, **_params):
         """Fetches information of a specific VPN service."""
@@ -552,6 +765,13 @@ class Client(object):
                          retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_ipsec_site_connections(self, **_params):
+        """Iterates over all ipsec site connections, one at a time."""
+        return self.iterate('ipsec_site_connections',
+                            self.ipsec_site_connections_path,
+                            **_params)
+
     @APIParamsCall
     def show_ipsec_site_connection(self, ipsecsite_conn, **_params):
         """Fetches information of a specific IPsecSiteConnection."""
@@ -582,6 +802,11 @@ class Client(object):
         return self.list('ikepolicies', self.ikepolicies_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_ikepolicies(self, **_params):
+        """Iterates over all ikepolicies for a tenant, one at a time."""
+        return self.iterate('ikepolicies', self.ikepolicies_path, **_params)
+
     @APIParamsCall
     def show_ikepolicy(self, ikepolicy, **_params):
         """Fetches information of a specific IKEPolicy."""
@@ -610,6 +835,12 @@ class Client(object):
                          retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_ipsecpolicies(self, **_params):
+        """Iterates over all ipsecpolicies for a tenant, one at a time."""
+        return self.iterate('ipsecpolicies', self.ipsecpolicies_path,
+                            **_params)
+
     @APIParamsCall
     def show_ipsecpolicy(self, ipsecpolicy, **_params):
         """Fetches information of a specific IPsecPolicy."""
@@ -637,6 +868,11 @@ class Client(object):
         return self.list('vips', self.vips_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_vips(self, **_params):
+        """Iterates over all vips for a tenant, one at a time."""
+        return self.iterate('vips', self.vips_path, **_params)
+
     @APIParamsCall
     def show_vip(self, vip, **_params):
         """Fetches information of a certain load balancer vip."""
@@ -664,6 +900,11 @@ class Client(object):
         return self.list('pools', self.pools_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_pools(self, **_params):
+        """Iterates over all pools for a tenant, one at a time."""
+        return self.iterate('pools', self.pools_path, **_params)
+
     @APIParamsCall
     def show_pool(self, pool, **_params):
         """Fetches information of a certain load balancer pool."""
@@ -696,6 +937,11 @@ class Client(object):
         return self.list('members', self.members_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_members(self, **_params):
+        """Iterates over all members for a tenant, one at a time."""
+        return self.iterate('members', self.members_path, **_params)
+
     @APIParamsCall
     def show_member(self, member, **_params):
         """Fetches information of a certain load balancer member."""
@@ -723,6 +969,12 @@ class Client(object):
         return self.list('health_monitors', self.health_monitors_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_health_monitors(self, **_params):
+        """Iterates over all health monitors for a tenant, one at a time."""
+        return self.iterate('health_monitors', self.health_monitors_path,
+                            **_params)
+
     @APIParamsCall
     def show_health_monitor(self, health_monitor, **_params):
         """Fetches information of a certain load balancer health monitor."""
@@ -913,6 +1165,12 @@ class Client(object):
         return self.list('firewall_rules', self.firewall_rules_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_firewall_rules(self, **_params):
+        """Iterates over all firewall rules for a tenant, one at a time."""
+        return self.iterate('firewall_rules', self.firewall_rules_path,
+                            **_params)
+
     @APIParamsCall
     def show_firewall_rule(self, firewall_rule, **_params):
         """Fetches information of a certain firewall rule."""
@@ -942,6 +1200,12 @@ class Client(object):
         return self.list('firewall_policies', self.firewall_policies_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_firewall_policies(self, **_params):
+        """Iterates over all firewall policies for a tenant, one at a time."""
+        return self.iterate('firewall_policies', self.firewall_policies_path,
+                            **_params)
+
     @APIParamsCall
     def show_firewall_policy(self, firewall_policy, **_params):
         """Fetches information of a certain firewall policy."""
@@ -984,6 +1248,11 @@ class Client(object):
         return self.list('firewalls', self.firewalls_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_firewalls(self, **_params):
+        """Iterates over all firewalls for a tenant, one at a time."""
+        return self.iterate('firewalls', self.firewalls_path, **_params)
+
     @APIParamsCall
     def show_firewall(self, firewall, **_params):
         """Fetches information of a certain firewall."""
@@ -1029,6 +1298,12 @@ class Client(object):
         return self.list('service_providers', self.service_providers_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_service_providers(self, **_params):
+        """Iterates over all service providers for a tenant, one at a time."""
+        return self.iterate('service_providers', self.service_providers_path,
+                            **_params)
+
     def list_credentials(self, **_params):
         """Fetch a list of all credentials for a tenant."""
         return self.get(self.credentials_path, params=_params)
@@ -1118,6 +1393,12 @@ class Client(object):
         return self.list('metering_labels', self.metering_labels_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_metering_labels(self, **_params):
+        """Iterates over all metering labels for a tenant, one at a time."""
+        return self.iterate('metering_labels', self.metering_labels_path,
+                            **_params)
+
     @APIParamsCall
     def show_metering_label(self, metering_label, **_params):
         """Fetches information of a certain metering label."""
@@ -1141,6 +1422,13 @@ class Client(object):
                          self.metering_label_rules_path, retrieve_all,
                          **_params)
 
+    @APIParamsCall
+    def iter_metering_label_rules(self, **_params):
+        """Iterates over all metering label rules, one at a time."""
+        return self.iterate('metering_label_rules',
+                            self.metering_label_rules_path,
+                            **_params)
+
     @APIParamsCall
     def show_metering_label_rule(self, metering_label_rule, **_params):
         """Fetches information of a certain metering label rule."""
@@ -1184,6 +1472,12 @@ class Client(object):
         return self.list('packet_filters', self.packet_filters_path,
                          retrieve_all, **_params)
 
+    @APIParamsCall
+    def iter_packet_filters(self, **_params):
+        """Iterates over all packet filters for a tenant, one at a time."""
+        return self.iterate('packet_filters', self.packet_filters_path,
+                            **_params)
+
     @APIParamsCall
     def show_packet_filter(self, packet_filter_id, **_params):
         """Fetch information of a certain packet filter."""
@@ -1195,16 +1489,39 @@ class Client(object):
         """Delete the specified packet filter."""
         return self.delete(self.packet_filter_path % packet_filter_id)
 
+    @property
+    def retry_interval(self):
+        """Seconds waited before the first retry, the backoff base."""
+        return self.retry_policy.backoff_base
+
+    @retry_interval.setter
+    def retry_interval(self, value):
+        self.retry_policy.backoff_base = value
+
     def __init__(self, **kwargs):
         """Initialize a new client for the Neutron v2.0 API."""
         super(Client, self).__init__()
         self.retries = kwargs.pop('retries', 0)
+        self.retry_policy = (kwargs.pop('retry_policy', None) or
+                             retry.RetryPolicy())
+        self.rate_limiter = kwargs.pop('rate_limiter', None)
+        self.single_flight = None
+        if kwargs.pop('coalesce_requests', False):
+            self.single_flight = cache.SingleFlight()
         self.raise_errors = kwargs.pop('raise_errors', True)
+        self.incremental_decode = kwargs.pop('incremental_decode', False)
+        self.trust_uuids = kwargs.pop('trust_uuids', False)
+        self.resolution_cache = cache.LRUCache(
+            maxsize=kwargs.pop('resolution_cache_size', 1000),
+            ttl=kwargs.pop('resolution_cache_ttl', 60))
+        self.extension_cache = cache.LRUCache(
+            maxsize=16, ttl=kwargs.pop('extension_cache_ttl', 600))
+        self._serializers = {}
         self.httpclient = client.construct_http_client(**kwargs)
         self.version = '2.0'
+        self._thread_state = threading.local()
         self.format = 'json'
         self.action_prefix = "/v%s" % (self.version)
-        self.retry_interval = 1
 
     def _handle_fault_response(self, status_code, response_body):
         # Create exception with HTTP status code and message
@@ -1225,31 +1542,96 @@ class Client(object):
             raise exceptions.RequestURITooLong(
                 excess=uri_len - self.MAX_URI_LEN)
 
-    def do_request(self, method, action, body=None, headers=None, params=None):
-        # Add format and tenant_id
-        action += ".%s" % self.format
-        action = self.action_prefix + action
+    def _build_action(self, action, params=None):
+        """Add the version, the format and the query to a request path."""
+        action = "%s%s.%s" % (self.action_prefix, action, self.format)
         if type(params) is dict and params:
             params = utils.safe_encode_dict(params)
-            action += '?' + urllib.urlencode(params, doseq=1)
+            action += '?' + urlencode(params, doseq=1)
+        return action
+
+    def _uri_length(self, path, params=None):
+        return (len(self.httpclient.endpoint_url or '') +
+                len(self._build_action(path, params)))
+
+    def do_request(self, method, action, body=None, headers=None, params=None,
+                   stream_collection=None):
+        path = action
+        action = self._build_action(action, params)
         # Ensure client always has correct uri - do not guesstimate anything
         self.httpclient.authenticate_and_fetch_endpoint_url()
         self._check_uri_length(action)
 
         if body:
             body = self.serialize(body)
-        self.httpclient.content_type = self.content_type()
-        resp, replybody = self.httpclient.do_request(action, method, body=body)
+        kwargs = {'content_type': self.content_type()}
+        if stream_collection and method == 'GET' and self.format == 'json':
+            kwargs['stream'] = True
+        resp, replybody = self._send_request(action, method, body, **kwargs)
         status_code = resp.status_code
         if status_code in (requests.codes.ok,
                            requests.codes.created,
                            requests.codes.accepted,
                            requests.codes.no_content):
+            if method != 'GET':
+                self.invalidate_resolutions(path)
+            if kwargs.get('stream') and replybody is None:
+                return self._stream_collection(resp, stream_collection)
             return self.deserialize(replybody, status_code)
         else:
             if not replybody:
                 replybody = resp.reason
-            self._handle_fault_response(status_code, replybody)
+            try:
+                self._handle_fault_response(status_code, replybody)
+            except exceptions.NeutronClientException as e:
+                e.retry_after = retry.parse_retry_after(
+                    resp.headers.get('Retry-After'),
+                    timer=self.retry_policy.timer)
+                raise
+
+    def _send_request(self, action, method, body, **kwargs):
+        if self.rate_limiter is None:
+            return self.httpclient.do_request(action, method, body=body,
+                                              **kwargs)
+        with self.rate_limiter.limit(method):
+            return self.httpclient.do_request(action, method, body=body,
+                                              **kwargs)
+
+    def _stream_collection(self, resp, collection):
+        """Return a page whose resources are decoded as they are read."""
+        page = {}
+
+        def _resources():
+            chunks = resp.iter_content(self.STREAM_CHUNK_SIZE)
+            try:
+                for resource in serializer.JSONCollectionDeserializer(
+                        chunks, collection, page):
+                    yield resource
+            except (requests.exceptions.RequestException,
+                    socket.error) as e:
+                # The body is read after _cs_request() returned, wrap the
+                # errors of the connection the same way it does
+                _logger.debug("throwing ConnectionFailed : %s", e)
+                raise exceptions.ConnectionFailed(reason=e)
+            finally:
+                resp.close()
+
+        page[collection] = _StreamedResources(_resources())
+        return page
+
+    def invalidate_resolutions(self, path=None):
+        """Forget the resolved names of the collections in ``path``.
+
+        Called when a resource is created, updated or deleted, so that
+        names resolved by find_resourceid_by_name_or_id do not go stale.
+        All the resolved names are dropped if no path is given.
+        """
+        if path is None:
+            self.resolution_cache.invalidate()
+            return
+        segments = set(segment.replace('-', '_')
+                       for segment in path.split('/'))
+        self.resolution_cache.invalidate(lambda key: key[2] in segments)
 
     def get_auth_info(self):
         return self.httpclient.get_auth_info()
@@ -1263,8 +1645,8 @@ class Client(object):
         if data is None:
             return None
         elif type(data) is dict:
-            return serializer.Serializer(
-                self.get_attr_metadata()).serialize(data, self.content_type())
+            return self._get_serializer().serialize(data,
+                                                    self.content_type())
         else:
             raise Exception(_("Unable to serialize object of type = '%s'") %
                             type(data))
@@ -1273,9 +1655,47 @@ class Client(object):
         """Deserializes an XML or JSON string into a dictionary."""
         if status_code == 204:
             return data
-        return serializer.Serializer(self.get_attr_metadata()).deserialize(
+        return self._get_serializer().deserialize(
             data, self.content_type())['body']
 
+    def _get_serializer(self):
+        """Return the serializer of the current format.
+
+        The serializers are kept per format and only rebuilt when the
+        metadata they were built from is replaced, refreshing the extension
+        metadata keeps the same dict when its content did not change.
+        """
+        _format = self.format
+        entry = self._serializers.get(_format)
+        if entry is not None and _format == 'json':
+            return entry[1]
+        metadata = self.get_attr_metadata()
+        if entry is None or entry[0] is not metadata:
+            entry = (metadata, serializer.Serializer(metadata))
+            self._serializers[_format] = entry
+        return entry[1]
+
+    @property
+    def format(self):
+        """Format of the requests, the one of the current call if given."""
+        return getattr(self._thread_state, 'format', None) or self._format
+
+    @format.setter
+    def format(self, value):
+        self._format = value
+
+    @contextlib.contextmanager
+    def _request_format(self, _format):
+        # The format is only overridden for the calling thread, so that the
+        # client can be shared by several threads.
+        state = self._thread_state
+        previous = getattr(state, 'format', None)
+        state.format = _format
+        try:
+            yield
+        finally:
+            state.format = previous
+
     def content_type(self, _format=None):
         """Returns the mime-type for either 'xml' or 'json'.
 
@@ -1285,28 +1705,68 @@ class Client(object):
         return "application/%s" % (_format)
 
     def retry_request(self, method, action, body=None,
-                      headers=None, params=None):
-        """Call do_request with the default retry configuration.
+                      headers=None, params=None, stream_collection=None):
+        """Call do_request, retrying failures as allowed by retry_policy.
 
         Only idempotent requests should retry failed connection attempts.
+        Identical GET requests made at the same time by several threads are
+        sent once if coalesce_requests is True.
         :raises: ConnectionFailed if the maximum # of retries is exceeded
         """
+        if (method == 'GET' and self.single_flight is not None and
+                not (body or headers or stream_collection)):
+            key = (action, self.format, self._params_key(params))
+            return self.single_flight.do(key, self._retry_request, method,
+                                         action, params=params)
+        try:
+            return self._retry_request(method, action, body=body,
+                                       headers=headers, params=params,
+                                       stream_collection=stream_collection)
+        finally:
+            if method != 'GET' and self.single_flight is not None:
+                # The GET requests in flight may have been answered before
+                # the write, the ones following it must not join them.
+                self.single_flight.forget(
+                    lambda key: cache.related_paths(key[0], action))
+
+    @staticmethod
+    def _params_key(params):
+        if not params:
+            return None
+        return urlencode(
+            sorted(utils.safe_encode_dict(params).items()), doseq=1)
+
+    def _retry_request(self, method, action, body=None,
+                       headers=None, params=None, stream_collection=None):
         max_attempts = self.retries + 1
+        kwargs = {}
+        if stream_collection:
+            kwargs['stream_collection'] = stream_collection
+        policy = self.retry_policy
+        started = policy.timer()
         for i in range(max_attempts):
             try:
                 return self.do_request(method, action, body=body,
-                                       headers=headers, params=params)
-            except exceptions.ConnectionFailed:
+                                       headers=headers, params=params,
+                                       **kwargs)
+            except exceptions.NeutronClientException as e:
                 # Exception has already been logged by do_request()
+                delay = None
                 if i < self.retries:
-                    _logger.debug('Retrying connection to Neutron service')
-                    time.sleep(self.retry_interval)
-                elif self.raise_errors:
-                    raise
-
-        if self.retries:
+                    delay = policy.delay(method, e, i, started)
+                if delay is None:
+                    if (self.raise_errors or
+                            not isinstance(e, exceptions.ConnectionFailed) or
+                            not policy.is_retryable(method, e)):
+                        raise
+                    break
+                _logger.debug('Retrying the request to Neutron service in '
+                              '%.2f seconds', delay)
+                policy.sleep(delay)
+
+        if i:
             msg = (_("Failed to connect to Neutron server after %d attempts")
-                   % max_attempts)
+                   % (i + 1))
         else:
             msg = _("Failed to connect Neutron server")
 
@@ -1316,43 +1776,351 @@ class Client(object):
         return self.retry_request("DELETE", action, body=body,
                                   headers=headers, params=params)
 
-    def get(self, action, body=None, headers=None, params=None):
+    def get(self, action, body=None, headers=None, params=None,
+            stream_collection=None):
         return self.retry_request("GET", action, body=body,
-                                  headers=headers, params=params)
+                                  headers=headers, params=params,
+                                  stream_collection=stream_collection)
 
     def post(self, action, body=None, headers=None, params=None):
-        # Do not retry POST requests to avoid the orphan objects problem.
-        return self.do_request("POST", action, body=body,
-                               headers=headers, params=params)
+        # POST requests are not retried by the default retry policy to
+        # avoid the orphan objects problem.
+        return self.retry_request("POST", action, body=body,
+                                  headers=headers, params=params)
 
     def put(self, action, body=None, headers=None, params=None):
         return self.retry_request("PUT", action, body=body,
                                   headers=headers, params=params)
 
-    def list(self, collection, path, retrieve_all=True, **params):
+    def create_bulk(self, collection, path, resources, batch_size=None):
+        """Create resources of a collection in batches.
+
+        ``resources`` is a list of attribute dicts. They are sent in
+        batches of ``batch_size`` (default: BULK_BATCH_SIZE) resources,
+        one request per batch. The server creates the resources of a batch
+        atomically, so when a batch is rejected, the exception raised is
+        reported for each of its resources.
+
+        :returns: a list with, for each input resource in order, either
+                  the created resource or the exception which made its
+                  batch fail.
+        """
+        results = []
+        for batch in self._batches(resources, batch_size):
+            try:
+                outcome = self.post(path, body={collection: batch})
+            except exceptions.NeutronClientException as e:
+                outcome = e
+            results.extend(self._batch_results(collection, batch, outcome))
+        return results
+
+    def _batches(self, resources, batch_size=None):
+        batch_size = batch_size or self.BULK_BATCH_SIZE
+        resources = list(resources)
+        for i in range(0, len(resources), batch_size):
+            yield resources[i:i + batch_size]
+
+    def _batch_results(self, collection, batch, outcome):
+        if isinstance(outcome, Exception):
+            return [outcome] * len(batch)
+        created = outcome[collection]
+        if len(created) != len(batch):
+            msg = (_("Bulk create of %(collection)s returned %(created)d "
+                     "resources instead of %(expected)d") %
+                   {'collection': collection, 'created': len(created),
+                    'expected': len(batch)})
+            return [exceptions.NeutronClientException(message=msg)] * len(
+                batch)
+        return created
+
+    def bulk_delete(self, resource, ids, concurrency=1):
+        """Delete many resources, up to ``concurrency`` at a time.
+
+        :param resource: Name of the resource (e.g. 'port'), used to find
+                         its ``<resource>_path``.
+        :returns: see :meth:`_run_bulk`.
+        """
+        path = getattr(self, "%s_path" % resource)
+        return self._run_bulk(
+            [(_id, functools.partial(self.retry_request, "DELETE",
+                                     path % _id))
+             for _id in ids], concurrency)
+
+    def bulk_update(self, resource, updates, concurrency=1):
+        """Update many resources, up to ``concurrency`` at a time.
+
+        :param resource: Name of the resource (e.g. 'port').
+        :param updates: Iterable of ``(id, attributes)`` pairs, each sent
+                        as ``{resource: attributes}``.
+        :returns: see :meth:`_run_bulk`.
+        """
+        path = getattr(self, "%s_path" % resource)
+        return self._run_bulk(
+            [(_id, functools.partial(self.retry_request, "PUT", path % _id,
+                                     body={resource: attributes}))
+             for _id, attributes in updates], concurrency)
+
+    def _run_bulk(self, calls, concurrency=1):
+        """Run ``(id, call)`` pairs on a pool of ``concurrency`` threads.
+
+        :returns: a dict holding, under 'results', a dict per id in input
+                  order with the 'id', the 'result' of the call or the
+                  'error' it raised and its 'elapsed' time, and the
+                  aggregated 'succeeded', 'failed' and 'elapsed' (wall
+                  clock seconds) values.
+        """
+        started = time.time()
+        # Authenticate once rather than from every worker thread
+        if calls:
+            self.httpclient.authenticate_and_fetch_endpoint_url()
+
+        def _call(item):
+            _id, call = item
+            call_started = time.time()
+            try:
+                result, error = call(), None
+            except exceptions.NeutronClientException as e:
+                result, error = None, e
+            return self._bulk_outcome(_id, result, error, call_started)
+
+        concurrency = max(1, min(concurrency, len(calls)))
+        if concurrency == 1:
+            outcomes = [_call(item) for item in calls]
+        else:
+            workers = multiprocessing.pool.ThreadPool(concurrency)
+            try:
+                outcomes = workers.map(_call, calls, chunksize=1)
+            finally:
+                workers.close()
+                workers.join()
+        return self._bulk_summary(outcomes, started)
+
+    def _bulk_outcome(self, _id, result, error, started):
+        return {'id': _id, 'result': result, 'error': error,
+                'elapsed': time.time() - started}
+
+    def _bulk_summary(self, outcomes, started):
+        failed = len([o for o in outcomes if o['error'] is not None])
+        return {'results': outcomes,
+                'succeeded': len(outcomes) - failed,
+                'failed': failed,
+                'elapsed': time.time() - started}
+
+    def list(self, collection, path, retrieve_all=True, prefetch=0,
+             partitions=None, concurrency=None, **params):
+        """List the resources of a collection.
+
+        :param prefetch: Number of pages fetched ahead of the caller.
+        :param partitions: Filters splitting the collection in disjoint
+                           parts, e.g. ``[{'network_id': id} for id in
+                           network_ids]``. Their page chains are fetched in
+                           parallel, and the resources of the parts are
+                           merged in the order given by sort_key and
+                           sort_dir if any, or returned one part after
+                           the other.
+        :param concurrency: Maximum number of partitions fetched at the
+                            same time (default: LIST_CONCURRENCY).
+        """
+        pages = self._pages(collection, path, prefetch, partitions,
+                            concurrency, **params)
         if retrieve_all:
             res = []
-            for r in self._pagination(collection, path, **params):
+            for r in pages:
                 res.extend(r[collection])
             return {collection: res}
         else:
-            return self._pagination(collection, path, **params)
+            return pages
+
+    def iterate(self, collection, path, prefetch=0, partitions=None,
+                concurrency=None, **params):
+        """Yield the resources of a collection one at a time.
+
+        Unlike list(), only the page currently being consumed is kept in
+        memory, whatever the size of the collection, unless it is
+        partitioned.
+        """
+        for page in self._pages(collection, path, prefetch, partitions,
+                                concurrency, **params):
+            for resource in page.get(collection, []):
+                yield resource
+
+    def _pages(self, collection, path, prefetch=0, partitions=None,
+               concurrency=None, **params):
+        if partitions is not None:
+            chunks = []
+            for partition in partitions:
+                partition_params = dict(params)
+                partition_params.update(partition)
+                chunks.extend(self._split_filters(path, partition_params))
+        else:
+            chunks = self._split_filters(path, params)
+        if len(chunks) > 1 or partitions is not None:
+            return self._parallel_pagination(collection, path, chunks,
+                                             self.format, concurrency,
+                                             params.get('sort_key'),
+                                             params.get('sort_dir'))
+        if prefetch:
+            return self._prefetch_pagination(prefetch, collection, path,
+                                             self.format, **params)
+        return self._pagination(collection, path, **params)
+
+    def _prefetch_pagination(self, prefetch, collection, path, _format,
+                             **params):
+        """Yield the pages of a collection fetched ahead of the caller.
+
+        Each page holds the marker of the next one, so a single worker
+        thread walks the page chain, in the format of the calling thread,
+        while the caller consumes what has already arrived. At most
+        ``prefetch`` pages are buffered.
+        """
+        pages = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def _put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def _fetch():
+            try:
+                with self._request_format(_format):
+                    for page in self._pagination(collection, path, **params):
+                        # A streamed page has to be read completely before
+                        # the marker of the next one is known.
+                        if collection in page:
+                            page[collection] = list(page[collection])
+                        if not _put(('page', page)):
+                            return
+            except Exception:
+                _put(('error', sys.exc_info()))
+            else:
+                _put(('done', None))
+
+        worker = threading.Thread(target=_fetch)
+        worker.daemon = True
+        worker.start()
+        try:
+            while True:
+                kind, value = pages.get()
+                if kind == 'done':
+                    break
+                if kind == 'error':
+                    six.reraise(*value)
+                yield value
+        finally:
+            stop.set()
+
+    def _split_filters(self, path, params):
+        """Split the longest list filter of a query exceeding MAX_URI_LEN.
+
+        :returns: the params of each request to send, ``[params]`` when the
+                  URI is short enough or cannot be shortened by splitting a
+                  single filter.
+        """
+        filters = [key for key, value in six.iteritems(params)
+                   if isinstance(value, list) and len(value) > 1 and
+                   key not in self.UNSPLIT_PARAMS]
+        if not filters:
+            return [params]
+        self.httpclient.authenticate_and_fetch_endpoint_url()
+        if self._uri_length(path, params) <= self.MAX_URI_LEN:
+            return [params]
+        key = max(filters, key=lambda key: self._query_length(
+            {key: params[key]}))
+        others = dict((k, v) for k, v in six.iteritems(params) if k != key)
+        budget = self.MAX_URI_LEN - self._uri_length(path, others)
+        chunks = []
+        chunk = []
+        length = 0
+        for value in params[key]:
+            # With the '?' or '&' before it
+            size = self._query_length({key: [value]}) + 1
+            if size > budget:
+                return [params]
+            if chunk and length + size > budget:
+                chunks.append(chunk)
+                chunk = []
+                length = 0
+            chunk.append(value)
+            length += size
+        chunks.append(chunk)
+        _logger.debug("Splitting the %(key)s filter of %(path)s in "
+                      "%(count)d requests",
+                      {'key': key, 'path': path, 'count': len(chunks)})
+        split = []
+        for chunk in chunks:
+            chunk_params = dict(others)
+            chunk_params[key] = chunk
+            split.append(chunk_params)
+        return split
+
+    @staticmethod
+    def _query_length(params):
+        return len(urlencode(utils.safe_encode_dict(params), doseq=1))
+
+    def _parallel_pagination(self, collection, path, chunks, _format,
+                             concurrency=None, sort_key=None, sort_dir=None):
+        """Yield the pages of the listings of disjoint parts of a collection.
+
+        The parts are the partitions of a listing or the chunks of a split
+        filter. Up to ``concurrency`` of them are listed at the same time,
+        in the format of the calling thread. If the listings are sorted,
+        their resources are merged into a single sorted page, otherwise
+        the pages are yielded in the order of the parts.
+        """
+        def _fetch(params):
+            with self._request_format(_format):
+                pages = []
+                for page in self._pagination(collection, path, **params):
+                    if collection in page:
+                        page[collection] = list(page[collection])
+                    pages.append(page)
+                return pages
+
+        if not chunks:
+            return
+        concurrency = concurrency or self.LIST_CONCURRENCY
+        workers = multiprocessing.pool.ThreadPool(
+            max(1, min(len(chunks), concurrency)))
+        try:
+            chunk_pages = workers.map(_fetch, chunks, chunksize=1)
+        finally:
+            workers.close()
+            workers.join()
+        if sort_key:
+            yield {collection: _merge_sorted(
+                [[r for page in pages for r in page.get(collection, [])]
+                 for pages in chunk_pages], sort_key, sort_dir)}
+            return
+        for pages in chunk_pages:
+            for page in pages:
+                yield page
 
     def _pagination(self, collection, path, **params):
         if params.get('page_reverse', False):
             linkrel = 'previous'
         else:
             linkrel = 'next'
+        stream_collection = self.incremental_decode and collection or None
         next = True
         while next:
-            res = self.get(path, params=params)
+            res = self.get(path, params=params,
+                           stream_collection=stream_collection)
             yield res
+            # The caller may have moved on before reading a whole streamed
+            # page, whose links follow its resources.
+            if isinstance(res.get(collection), _StreamedResources):
+                res[collection].read_all()
             next = False
             try:
                 for link in res['%s_links' % collection]:
                     if link['rel'] == linkrel:
-                        query_str = urlparse.urlparse(link['href']).query
-                        params = urlparse.parse_qs(query_str)
+                        query_str = urlsplit(link['href']).query
+                        params = parse_qs(query_str)
                         next = True
                         break
             except KeyError:
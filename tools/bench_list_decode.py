@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compare the peak RSS of full and incremental decoding of a port list.
+
+Usage: bench_list_decode.py [NUMBER_OF_PORTS]
+
+Each mode runs in its own interpreter which writes a synthetic
+``GET /ports.json`` body to a temporary file, then reads it back the way the
+client would: either the whole body followed by a single ``loads`` (what
+``Client.deserialize`` does), or in 64 KiB chunks through
+``JSONCollectionDeserializer``, counting the ports without keeping them.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _port(i):
+    return {'id': '%08d-0000-4000-8000-000000000000' % i,
+            'name': 'port-%d' % i,
+            'network_id': '3a3f4b1c-0000-4000-8000-000000000000',
+            'tenant_id': 'b0e4b2f2a6b84d5f9b1d4c9e8b8f5b8a',
+            'mac_address': 'fa:16:3e:%02x:%02x:%02x' % (
+                i >> 16 & 0xff, i >> 8 & 0xff, i & 0xff),
+            'admin_state_up': True,
+            'status': 'ACTIVE',
+            'device_owner': 'compute:nova',
+            'device_id': '%08d-1111-4000-8000-000000000000' % i,
+            'fixed_ips': [{'subnet_id': '5c3f4b1c-0000-4000-8000-0000000000'
+                                        '00',
+                           'ip_address': '10.%d.%d.%d' % (
+                               i >> 16 & 0xff, i >> 8 & 0xff, i & 0xff)}],
+            'security_groups': ['9f3f4b1c-0000-4000-8000-000000000000'],
+            'binding:vnic_type': 'normal'}
+
+
+def _write_body(path, count):
+    with open(path, 'w') as f:
+        f.write('{"ports": [')
+        for i in range(count):
+            if i:
+                f.write(', ')
+            f.write(json.dumps(_port(i)))
+        f.write(']}')
+
+
+def _chunks(f):
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run(mode, count):
+    from neutronclient.common import serializer
+
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        _write_body(path, count)
+        baseline = _peak_rss_kb()
+        with open(path, 'rb') as f:
+            if mode == 'full':
+                text = f.read().decode('utf-8')
+                ports = len(json.loads(text)['ports'])
+            else:
+                ports = sum(1 for _ in
+                            serializer.JSONCollectionDeserializer(
+                                _chunks(f), 'ports'))
+        assert ports == count
+        print('%-12s ports=%d peak_rss_delta=%d KiB size=%d KiB' % (
+            mode, ports, _peak_rss_kb() - baseline,
+            os.path.getsize(path) // 1024))
+    finally:
+        os.unlink(path)
+
+
+def main(argv):
+    if len(argv) > 2 and argv[1] == '--run':
+        _run(argv[2], int(argv[3]))
+        return
+    count = argv[1] if len(argv) > 1 else '100000'
+    for mode in ('full', 'incremental'):
+        subprocess.check_call([sys.executable, __file__, '--run', mode,
+                               count])
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# Copyright 2014 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the per call overhead of Client.serialize/deserialize.
+
+Usage: bench_serializer.py [ITERATIONS]
+
+For a ``show_port`` and a ``list_ports`` body (20 ports), in both formats,
+times a serialize + deserialize round trip done the way the client used to,
+building a ``Serializer`` for every call, and through the client which
+reuses its serializers.
+"""
+
+import sys
+import timeit
+
+from neutronclient.common import constants
+from neutronclient.common import serializer
+from neutronclient.v2_0 import client
+
+ENDPOINT = 'http://localhost:9696'
+# Best of REPEAT runs, to leave out the noise of the machine
+REPEAT = 5
+
+
+def _port(i):
+    return {'id': '%08d-0000-4000-8000-000000000000' % i,
+            'name': 'port-%d' % i,
+            'network_id': '3a3f4b1c-0000-4000-8000-000000000000',
+            'tenant_id': 'b0e4b2f2a6b84d5f9b1d4c9e8b8f5b8a',
+            'admin_state_up': True,
+            'status': 'ACTIVE',
+            'fixed_ips': [{'subnet_id': '5c3f4b1c-0000-4000-8000-'
+                                        '000000000000',
+                           'ip_address': '10.0.0.%d' % i}]}
+
+
+def _client(fmt):
+    neutron = client.Client(endpoint_url=ENDPOINT, token='token')
+    neutron.format = fmt
+    if fmt == 'xml':
+        # Pre-seed the metadata so no extension listing is attempted.
+        plurals = dict(constants.PLURALS, fixed_ips='fixed_ip')
+        neutron.extension_cache.set(ENDPOINT, {'plurals': plurals})
+    return neutron
+
+
+def _per_call(neutron):
+    content_type = neutron.content_type()
+
+    def _round_trip(data):
+        metadata = neutron.get_attr_metadata()
+        body = serializer.Serializer(metadata).serialize(data, content_type)
+        return serializer.Serializer(metadata).deserialize(
+            body, content_type)['body']
+    return _round_trip
+
+
+def _reused(neutron):
+    def _round_trip(data):
+        return neutron.deserialize(neutron.serialize(data), 200)
+    return _round_trip
+
+
+def main(argv):
+    iterations = int(argv[1]) if len(argv) > 1 else 10000
+    bodies = (('show', {'port': _port(0)}),
+              ('list', {'ports': [_port(i) for i in range(20)]}))
+    for fmt in ('json', 'xml'):
+        neutron = _client(fmt)
+        for name, data in bodies:
+            for mode, factory in (('per-call', _per_call),
+                                  ('reused', _reused)):
+                round_trip = factory(neutron)
+                elapsed = min(timeit.repeat(lambda: round_trip(data),
+                                            repeat=REPEAT,
+                                            number=iterations))
+                print('%-4s %-4s %-8s %8.2f us/call' % (
+                    fmt, name, mode, elapsed * 1e6 / iterations))
+
+
+if __name__ == '__main__':
+    main(sys.argv)